@@ -0,0 +1,227 @@
+"""Fixed-seed benchmarks for the simulation core, with tracked baselines.
+
+    python3 benchmarks/bench.py                      # run all, print table
+    python3 benchmarks/bench.py --only month_mid draw_map
+    python3 benchmarks/bench.py --save               # refresh baseline.json
+    python3 benchmarks/bench.py --compare            # exit 1 on regression
+
+Each workload is timed several times from identical starting state; the
+best run is what gets compared, since it is least disturbed by noise.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, HERE)
+
+from euv import ai, engine, save, worldgen          # noqa: E402
+from euv import sim as simulation                   # noqa: E402
+from euv.render import MapView, draw_map            # noqa: E402
+from fake_curses import FakePalette, FakeWindow     # noqa: E402
+
+BASELINE = os.path.join(HERE, "baseline.json")
+SEED = 7
+_worlds: dict[int | str, object] = {}
+
+
+def world_at(years: int):
+    """The all-AI seed-7 world after `years` (built once, then copied)."""
+    if years not in _worlds:
+        g = worldgen.generate(SEED)
+        simulation.simulate(g, years)
+        _worlds[years] = g
+    return copy.deepcopy(_worlds[years])
+
+
+def _worldgen_5k(seed):
+    worldgen.generate_scaled(seed, 400, 150, 5000, 300)
+
+
+def one_month(years):
+    def setup():
+        return world_at(years)
+
+    def run(g):
+        engine.advance_month(g, ai_module=ai)
+    return setup, run
+
+
+def _century_setup():
+    return worldgen.generate(SEED)
+
+
+def _century(g):
+    simulation.simulate(g, 100)
+
+
+def _save_load_setup(name="bench.json"):
+    # saved once already, like a game in progress: its map is cached
+    g = world_at(50)
+    d = tempfile.TemporaryDirectory()
+    path = os.path.join(d.name, name)
+    save.save(g, path)
+    return g, d, path
+
+
+def _save_load(state):
+    g, _, path = state
+    save.save(g, path)
+    save.load(path)
+
+
+def _big_world():
+    # the 5,000-province world one month in, built once: forking leaves
+    # the original alone, so every run can fork the same one
+    if "5k" not in _worlds:
+        g = worldgen.generate_scaled(SEED, 400, 150, 5000, 300)
+        engine.advance_month(g, ai_module=ai)
+        _worlds["5k"] = g
+    return _worlds["5k"]
+
+
+def _fork(g):
+    g.fork()
+
+
+class _UI:
+    def __init__(self, g):
+        self.cursor = g.provinces[0].center
+        self.sel_pid = None
+        self.sel_aid = None
+        self.mapmode = 1
+        self.mode = "normal"
+
+
+def _draw_setup():
+    g = world_at(50)
+    g.player = max((t for t, n in g.nations.items() if n.alive),
+                   key=lambda t: len(g.provinces_of(t)))
+    return g, FakeWindow(g.height + 2, g.width + 2), FakePalette(), _UI(g)
+
+
+def _draw_map(state):
+    g, win, pal, ui = state
+    for mode in (1, 2, 3, 4, 5):        # one frame in every map mode
+        ui.mapmode = mode
+        draw_map(win, g, pal, ui)
+
+
+def _cursor_setup():
+    g, win, pal, ui = _draw_setup()
+    view = MapView()
+    draw_map(win, g, pal, ui, view)
+    return g, win, pal, ui, view
+
+
+def _draw_cursor(state):
+    g, win, pal, ui, view = state
+    x, y = ui.cursor
+    for dx in range(20):                # the cursor walks; the map stays
+        ui.cursor = ((x + dx) % g.width, y)
+        draw_map(win, g, pal, ui, view)
+
+
+# name -> (setup, run, repeats); setup output is passed to run, untimed
+WORKLOADS = {
+    "worldgen": (lambda: SEED, worldgen.generate, 10),
+    "worldgen_5k": (lambda: SEED, _worldgen_5k, 3),
+    "month_start": (*one_month(0), 20),
+    "month_mid": (*one_month(50), 20),
+    "month_late": (*one_month(100), 20),
+    "century": (_century_setup, _century, 3),
+    "save_load": (_save_load_setup, _save_load, 10),
+    "save_load_bin": (lambda: _save_load_setup("bench.sav"), _save_load,
+                      10),
+    "draw_map": (_draw_setup, _draw_map, 10),
+    "draw_cursor": (_cursor_setup, _draw_cursor, 10),
+    "fork": (lambda: world_at(50), _fork, 20),
+    "fork_5k": (_big_world, _fork, 5),
+}
+
+
+def measure(name: str, quick: bool = False) -> dict:
+    setup, run, repeats = WORKLOADS[name]
+    if quick:
+        repeats = max(1, repeats // 5)
+    times = []
+    for _ in range(repeats):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - start)
+    return {"best_ms": round(min(times) * 1e3, 3),
+            "median_ms": round(statistics.median(times) * 1e3, 3),
+            "runs": repeats}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Names whose best time is over (1 + threshold) x the baseline's."""
+    slow = []
+    print(f"{'workload':<12}{'baseline':>11}{'now':>11}{'change':>9}")
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<12}{'-':>11}{r['best_ms']:>9.1f}ms{'new':>9}")
+            continue
+        ratio = r["best_ms"] / base["best_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            slow.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<12}{base['best_ms']:>9.1f}ms{r['best_ms']:>9.1f}ms"
+              f"{(ratio - 1) * 100:>+8.1f}%{flag}")
+    return slow
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--only", nargs="+", choices=sorted(WORKLOADS),
+                    help="run just these workloads")
+    ap.add_argument("--quick", action="store_true",
+                    help="fewer repeats (noisier)")
+    ap.add_argument("--save", nargs="?", const=BASELINE, metavar="PATH",
+                    help="write results as the new baseline")
+    ap.add_argument("--compare", nargs="?", const=BASELINE, metavar="PATH",
+                    help="compare against a baseline; exit 1 on regression")
+    ap.add_argument("--threshold", type=float, default=0.15,
+                    help="allowed slowdown before flagging (default 0.15)")
+    ap.add_argument("--json", metavar="PATH", help="also write results here")
+    args = ap.parse_args(argv)
+
+    results = {}
+    for name in args.only or WORKLOADS:
+        results[name] = measure(name, args.quick)
+        if not args.compare:
+            r = results[name]
+            print(f"{name:<12} best {r['best_ms']:>9.1f}ms  "
+                  f"median {r['median_ms']:>9.1f}ms  ({r['runs']} runs)")
+    report = {"python": platform.python_version(),
+              "machine": platform.machine(),
+              "date": time.strftime("%Y-%m-%d"),
+              "results": results}
+    for path in (args.save, args.json):
+        if path:
+            with open(path, "w") as f:
+                json.dump(report, f, indent=1)
+                f.write("\n")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        slow = compare(results, baseline, args.threshold)
+        if slow:
+            print(f"slower than baseline by over {args.threshold:.0%}: "
+                  + ", ".join(slow))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Stand-ins for a curses window and Palette, so renderers run headless.
+
+FakeWindow keeps a character/attribute grid and counts the calls made on
+it; FakePalette hands out color-pair attributes without a terminal.
+"""
+from __future__ import annotations
+
+import curses
+
+from euv.render import Palette
+
+
+class FakeWindow:
+    def __init__(self, height: int = 40, width: int = 140):
+        self.h, self.w = height, width
+        self.cells = [[(" ", 0)] * width for _ in range(height)]
+        self.calls: dict[str, int] = {}
+
+    def _count(self, name: str):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def getmaxyx(self):
+        return self.h, self.w
+
+    def erase(self):
+        self._count("erase")
+        for row in self.cells:
+            row[:] = [(" ", 0)] * self.w
+
+    def box(self):
+        self._count("box")
+
+    def addstr(self, y, x, s, attr=0):
+        self._count("addstr")
+        if not (0 <= y < self.h) or x + len(s) > self.w:
+            raise curses.error("addstr out of bounds")
+        row = self.cells[y]
+        for i, ch in enumerate(s):
+            row[x + i] = (ch, attr)
+
+    def inch(self, y, x):
+        ch, attr = self.cells[y][x]
+        return ord(ch) | attr
+
+    def noutrefresh(self):
+        self._count("noutrefresh")
+
+    def refresh(self):
+        self._count("refresh")
+
+    def text(self) -> list[str]:
+        return ["".join(ch for ch, _ in row) for row in self.cells]
+
+
+class FakePalette(Palette):
+    """A 256-color Palette whose pair numbers are plain shifted ints."""
+
+    def __init__(self):
+        self.has256 = True
+        self._terr_idx = {t: i for i, t in enumerate(self.TERRAIN_256)}
+        self.dev_levels = len(self.DEV_256)
+
+    @staticmethod
+    def _pair(n: int) -> int:
+        return n << 8
+
+    def nation_bg(self, color_idx: int) -> int:
+        return self._pair(self.N_BG + color_idx % len(self.NATION_256))
+
+    def nation_fg(self, color_idx: int) -> int:
+        return self._pair(self.N_FG + color_idx % len(self.NATION_256)) \
+            | curses.A_BOLD
+
+    def terrain_bg(self, terr: str) -> int:
+        return self._pair(self.T_BG + self._terr_idx[terr])
+
+    def dev_bg(self, dev: int) -> int:
+        lvl = min(self.dev_levels - 1, dev * self.dev_levels // 25)
+        return self._pair(self.DEV + lvl)
+
+    def sea(self):
+        return self._pair(self.UI + 0)
+
+    def mil(self, rel: int) -> int:
+        return self._pair(self.MIL + rel)
+
+    def chip(self, rel: int) -> int:
+        return self._pair(self.CHIP + min(rel, 3))
+
+    def ui(self, i: int) -> int:
+        return self._pair(self.UI + i)
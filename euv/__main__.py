@@ -1,18 +1,51 @@
 """Entry point: python3 -m euv"""
 import argparse
+import os
+import sys
 
 
-def cli():
+def cli(argv=None):
     ap = argparse.ArgumentParser(
         prog="euv",
         description="EUV: a terminal grand strategy game set in the "
                     "fictional world of Eryndor.")
     ap.add_argument("--seed", type=int, default=None,
                     help="world seed (default: random)")
-    args = ap.parse_args()
+    ap.add_argument("--record", default=None, metavar="FILE",
+                    help="record a new game's commands to FILE")
+    ap.add_argument("--bytes", action="store_true",
+                    help="count bytes sent to the terminal per frame; "
+                         "prints a summary on exit")
+    sub = ap.add_subparsers(dest="command")
+    sp = sub.add_parser("sim", help="run headless all-AI simulations")
+    sp.add_argument("--seeds", default="7",
+                    help="seeds to run, e.g. 7, 1-1000 or 1,5,9-12")
+    sp.add_argument("--years", type=int, default=100,
+                    help="years per run (default: 100)")
+    sp.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="parallel processes (default: all cores)")
+    sp.add_argument("--world", default=None, metavar="WxH:PROVS:NATIONS",
+                    help="generated world instead of the standard map, "
+                         "e.g. 400x150:5000:300")
+    sp.add_argument("--out", default=None,
+                    help="output file, .csv or .jsonl (default: JSONL "
+                         "on stdout)")
+    sp.add_argument("--hashes", action="store_true",
+                    help="add every month's state hash to each row "
+                         "(a JSON list in CSV)")
+    rp = sub.add_parser("replay", help="rebuild a recorded game headlessly "
+                                       "and check its checksums")
+    rp.add_argument("file", help="recording made with --record")
+    args = ap.parse_args(argv)
+    if args.command == "sim":
+        from .sim import main
+        return main(args)
+    if args.command == "replay":
+        from .replay import main
+        return main(args)
     from .app import run
-    run(args.seed)
+    run(args.seed, args.record, args.bytes)
 
 
 if __name__ == "__main__":
-    cli()
+    sys.exit(cli())
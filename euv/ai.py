@@ -1,21 +1,26 @@
 """AI nation behaviour: economy, war planning, army control, peace, coalitions."""
 from __future__ import annotations
 
-from . import data, engine
+from . import data, engine, pathfind, timing
 from .model import Army, Game, Nation, War
 
 
 def run_all(g: Game):
+    run = timing.runner(g)
     for tag in sorted(g.nations):
         n = g.nations[tag]
         if not n.alive or n.is_player or tag == data.REBEL_TAG:
             continue
-        _economy(g, tag)
-        _diplomacy(g, tag)
-        _military(g, tag)
-        _consider_peace(g, tag)
-    _rebels(g)
-    _coalitions(g)
+        run("ai " + tag, _turn, g, tag)
+    run("ai rebels", _rebels, g)
+    run("ai coalitions", _coalitions, g)
+
+
+def _turn(g: Game, tag: str):
+    _economy(g, tag)
+    _diplomacy(g, tag)
+    _military(g, tag)
+    _consider_peace(g, tag)
 
 
 # ----------------------------------------------------------------- economy
@@ -34,6 +39,7 @@ def _economy(g: Game, tag: str):
             if a.regiments > 1:
                 a.regiments -= 1
                 a.men = min(a.men, a.regiments * data.RECRUIT_MANPOWER)
+                g.armies.refresh(a)
             else:
                 engine.disband_army(g, a.aid)
         return
@@ -115,7 +121,7 @@ def _diplomacy(g: Game, tag: str):
 
     # court strong neighbours: improve relations, then ally
     if not at_war and len(n.allies) < 2 and rng.random() < 0.15:
-        cands = [t for t in neighbours
+        cands = [t for t in sorted(neighbours)
                  if t not in n.allies and not g.truce_between(tag, t)
                  and not g.nations[t].is_player
                  and not g.nations[t].overlord
@@ -133,7 +139,7 @@ def _diplomacy(g: Game, tag: str):
     # fabricate claims on tempting weak neighbours (rivals always tempt)
     if not at_war and n.fabricating is None and rng.random() < 0.08:
         targets = []
-        for t in neighbours:
+        for t in sorted(neighbours):
             if g.truce_between(tag, t) or t in n.allies:
                 continue
             if g.nations[t].overlord == tag:
@@ -158,11 +164,11 @@ def _diplomacy(g: Game, tag: str):
     if not at_war and n.stability >= 0 and rng.random() < aggression:
         # count only allies who would actually answer a call to arms
         my = g.nation_strength(tag) + sum(
-            g.nation_strength(a) * 0.5 for a in n.allies
+            g.nation_strength(a) * 0.5 for a in sorted(n.allies)
             if not g.wars_of(a)
             and g.nations[a].opinion_of(tag) >= 0)
         best, best_ratio = None, 0.0
-        for t in neighbours:
+        for t in sorted(neighbours):
             o = g.nations[t]
             if g.truce_between(tag, t) or t in n.allies or not o.alive:
                 continue
@@ -175,7 +181,7 @@ def _diplomacy(g: Game, tag: str):
                                   or g.at_war_with(tag, real.tag)):
                 continue
             their = g.nation_strength(real.tag) + sum(
-                g.nation_strength(a) * 0.7 for a in real.allies
+                g.nation_strength(a) * 0.7 for a in sorted(real.allies)
                 if not g.wars_of(a))
             ratio = my / max(their, 1)
             has_claim = any(g.provinces[c].owner == t for c in n.claims)
@@ -198,9 +204,8 @@ def _diplomacy(g: Game, tag: str):
 
 def _military(g: Game, tag: str):
     enemies = g.enemies_of(tag)
-    rebel_stacks = [a for a in g.armies.values()
-                    if a.owner == data.REBEL_TAG
-                    and g.provinces[a.location].owner == tag]
+    rebel_stacks = [a for a in g.armies_of(data.REBEL_TAG)
+                    if g.provinces[a.location].owner == tag]
     reb_occupied = [p for p in g.provinces_of(tag)
                     if p.occupier == data.REBEL_TAG]
     if not enemies and not rebel_stacks and not reb_occupied:
@@ -219,7 +224,9 @@ def _military(g: Game, tag: str):
     my_armies = g.armies_of(tag)
     if not my_armies:
         return
-    enemy_armies = [a for a in g.armies.values() if a.owner in enemies]
+    dist = pathfind.topology(g).dist
+    enemy_armies = sorted((a for t in enemies for a in g.armies_of(t)),
+                          key=lambda a: a.aid)
     hostile = enemies | {data.REBEL_TAG}
 
     for a in my_armies:
@@ -231,8 +238,7 @@ def _military(g: Game, tag: str):
         threats = [e for e in threats if _local_power(g, a) >
                    _enemy_power_at(g, hostile, e.location) * 1.05]
         if threats:
-            target = min(threats, key=lambda e: _dist(g, a.location,
-                                                      e.location))
+            target = min(threats, key=lambda e: dist(a.location, e.location))
             engine.move_army(g, a.aid, target.location)
             continue
         # 2) avoid doom: much stronger enemy stack adjacent
@@ -250,7 +256,7 @@ def _military(g: Game, tag: str):
         if a.move_target is not None:
             continue
         targets = []
-        for et in enemies:
+        for et in sorted(enemies):
             for p in g.provinces_of(et):
                 if p.occupier is None:
                     targets.append(p)
@@ -260,7 +266,7 @@ def _military(g: Game, tag: str):
         if not targets:
             continue
         def value(p):
-            d = _dist(g, a.location, p.pid)
+            d = dist(a.location, p.pid)
             bonus = -6 if any(p.pid == w.cb_target
                               for w in g.wars_of(tag)) else 0
             # small tiebreak: prefer siege camps the land can feed
@@ -269,11 +275,32 @@ def _military(g: Game, tag: str):
             if p.occupier == data.REBEL_TAG:
                 bonus -= 8      # retaking home soil beats foreign sieges
             return d + p.fort_level * 1.5 + bonus
-        best = min(targets, key=value)
+        best = _best_target(g, a.location, targets, value)
         if best.pid != a.location:
             engine.move_army(g, a.aid, best.pid)
 
 
+# the most _military's value() can take off a target's distance:
+# war goal (-6) plus rebel-held home soil (-8), with no fort
+_VALUE_FLOOR = 14
+
+
+def _best_target(g: Game, here: int, targets, value):
+    """min(targets, key=value), visiting targets nearest-first and stopping
+    once distance alone rules the rest out."""
+    order = {p.pid: i for i, p in enumerate(targets)}
+    spatial = pathfind.topology(g).spatial
+    best, best_key = None, None
+    for d2, pid in spatial.nearby(g.provinces[here].center, order):
+        if best_key is not None and d2 ** 0.5 - _VALUE_FLOOR > best_key[0]:
+            break
+        p = g.provinces[pid]
+        key = (value(p), order[pid])
+        if best_key is None or key < best_key:
+            best, best_key = p, key
+    return best
+
+
 def _spread_for_supply(g: Game, tag: str, a: Army):
     """Peacetime: keep armies within supply so manpower does not bleed.
 
@@ -284,14 +311,14 @@ def _spread_for_supply(g: Game, tag: str, a: Army):
     if engine.attrition_fraction(g, a) <= 0:
         return
     rooms = []
+    dist = pathfind.topology(g).dist
     for p in g.provinces_of(tag):
         if p.pid == a.location or p.occupier:
             continue
-        here = sum(b.regiments for b in g.armies.values()
-                   if b.owner == tag and b.location == p.pid)
+        here = g.army_index.regiments(p.pid, tag)
         room = engine.supply_limit(g, tag, p.pid) - here
         if room > 0 and engine.find_path(g, tag, a.location, p.pid):
-            rooms.append((room, -_dist(g, a.location, p.pid), p.pid))
+            rooms.append((room, -dist(a.location, p.pid), p.pid))
     if rooms:
         room, _, pid = max(rooms)
         if a.regiments <= room:
@@ -310,6 +337,7 @@ def _spread_for_supply(g: Game, tag: str, a: Army):
         men_shed = a.men * shed // a.regiments
         a.regiments -= shed
         a.men -= men_shed
+        g.armies.refresh(a)
         n = g.nations[tag]
         n.manpower = min(g.manpower_max(tag), n.manpower + men_shed * 0.5)
 
@@ -336,13 +364,8 @@ def _local_power(g: Game, a: Army) -> float:
 
 
 def _enemy_power_at(g: Game, enemies: set[str], pid: int) -> float:
-    return sum(_local_power(g, e) for e in g.armies.values()
-               if e.owner in enemies and e.location == pid)
-
-
-def _dist(g: Game, a: int, b: int) -> float:
-    ca, cb = g.provinces[a].center, g.provinces[b].center
-    return ((ca[0] - cb[0]) ** 2 + (ca[1] - cb[1]) ** 2 * 4) ** 0.5
+    return sum(_local_power(g, e) for e in g.army_index.at(pid)
+               if e.owner in enemies)
 
 
 # ------------------------------------------------------------------- peace
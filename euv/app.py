@@ -4,12 +4,20 @@ from __future__ import annotations
 import curses
 import os
 
-from . import ai, data, engine, render, save, worldgen
+from . import (ai, data, engine, render, replay, save, termbytes, viewmodel,
+               worldgen)
+from .fastforward import FastForward
 from .model import Game
 from .render import (popup_menu, popup_text, popup_toggle_list, read_key,
                      safe_addstr, show_help, show_ledger, show_log)
 
 
+# January autosaves, written off the main thread
+autosaver = save.Autosaver(save.AUTOSAVE_PATH)
+# bytes sent to the terminal per frame, with --bytes
+meter: termbytes.ByteMeter | None = None
+
+
 class UIState:
     def __init__(self):
         self.cursor = (30, 11)
@@ -18,9 +26,10 @@ class UIState:
         self.mapmode = 1
         self.mode = "normal"          # or "move"
         self.status = ""              # transient message on the key bar
+        self.screen: Screen | None = None   # windows kept between frames
 
 
-def main(stdscr, seed: int | None = None):
+def main(stdscr, seed: int | None = None, record: str | None = None):
     curses.curs_set(0)
     if hasattr(curses, "set_escdelay"):
         curses.set_escdelay(25)   # snappy ESC; sequences arrive in one burst
@@ -45,24 +54,24 @@ def main(stdscr, seed: int | None = None):
             tag = nation_select(stdscr, g, pal)
             if tag is None:
                 continue
-            g.player = tag
-            g.nations[tag].is_player = True
-            engine._missions_phase(g)   # initial objectives
-            g.pending_events.clear()    # no fanfare before the first turn
-            g.say("event", f"You now guide the destiny of "
-                           f"{g.nations[tag].name}. ({g.date_str})")
+            if record:
+                g.recorder = replay.Recorder(g, record)
+            replay.command(g, "choose_nation", tag)
         game_loop(stdscr, g, pal)
+        if g.recorder is not None:
+            g.recorder.write()
+        autosaver.flush()           # before the title offers it for loading
 
 
 def pick_save(stdscr, pal) -> str | None:
-    import time
-    cands = []
-    for label, path in (("Manual save", save.SAVE_PATH),
-                        ("Autosave", save.AUTOSAVE_PATH)):
-        if os.path.exists(path):
-            ts = time.strftime("%Y-%m-%d %H:%M",
-                               time.localtime(os.path.getmtime(path)))
-            cands.append((f"{label}  ({ts})", path))
+    places = [(f"Slot {i}", save.slot_path(i))
+              for i in range(1, save.SLOTS + 1)]
+    places += [("Autosave" if i == 0 else f"Autosave -{i}", path)
+               for i, path in enumerate(save.autosave_paths())]
+    places += [("Manual save, JSON", save.LEGACY_SAVE_PATH),
+               ("Autosave, JSON", save.LEGACY_AUTOSAVE_PATH)]
+    cands = [(f"{label}  {describe_save(path)}", path)
+             for label, path in places if os.path.exists(path)]
     if not cands:
         popup_text(stdscr, pal, "Load", "No save file found.")
         return None
@@ -73,6 +82,35 @@ def pick_save(stdscr, pal) -> str | None:
     return cands[sel][1] if sel is not None else None
 
 
+def describe_save(path: str) -> str:
+    """One line about a save file, from its header alone."""
+    import time
+    ts = time.strftime("%Y-%m-%d %H:%M",
+                       time.localtime(os.path.getmtime(path)))
+    try:
+        info = save.read_info(path)
+    except OSError:
+        info = None
+    if info is None or not info.player:
+        return f"({ts})"
+    return (f"{info.nation} ({info.player}), {info.date_str}, score "
+            f"{info.score:.0f}, {info.provinces} provinces  ({ts})")
+
+
+def save_to_slot(stdscr, g, pal, ui):
+    names = []
+    for i in range(1, save.SLOTS + 1):
+        path = save.slot_path(i)
+        names.append(f"Slot {i}  " + (describe_save(path)
+                                      if os.path.exists(path) else "empty"))
+    sel = popup_menu(stdscr, pal, "Save to which slot?", names)
+    if sel is None:
+        return
+    path = save.slot_path(sel + 1)
+    save.save(g, path)
+    ui.status = f"Saved to {path}"
+
+
 # ------------------------------------------------------------------ screens
 
 TITLE_ART = r"""
@@ -134,6 +172,7 @@ def game_loop(stdscr, g: Game, pal):
         ui.cursor = g.provinces[g.nations[g.player].capital].center
         ui.sel_pid = g.nations[g.player].capital
     while True:
+        autosaver.report(g)
         draw(stdscr, g, pal, ui)
         process_popups(stdscr, g, pal)
         if g.game_over:
@@ -147,47 +186,123 @@ def game_loop(stdscr, g: Game, pal):
             return
 
 
+class Screen:
+    """The game screen's windows, kept between frames: top bar, map,
+    sidebar, log and key bar. Each frame redraws into them and one
+    doupdate() sends only what changed. Rebuilt when the terminal is
+    resized."""
+
+    def __init__(self, stdscr, g: Game):
+        self.size = h, w = stdscr.getmaxyx()
+        map_h, map_w = g.height + 2, g.width + 2
+        log_top = 1 + map_h
+        stdscr.erase()              # under the windows; never drawn again
+        stdscr.noutrefresh()
+        self.top = curses.newwin(1, w, 0, 0)
+        self.map = curses.newwin(map_h, map_w, 1, 0)
+        self.side = curses.newwin(map_h, w - map_w, 1, map_w)
+        self.log = curses.newwin(h - log_top - 1, w, log_top, 0)
+        self.keys = curses.newwin(1, w, h - 1, 0)
+        self.windows = (self.top, self.map, self.side, self.log, self.keys)
+        for win in self.windows:
+            win.leaveok(True)       # the cursor is hidden: don't send moves
+        self.map_view = render.MapView()
+        self.view: viewmodel.ViewModel | None = None
+        self.shown: dict[str, object] = {}  # region -> what it last showed
+
+    def changed(self, region: str, key) -> bool:
+        if self.shown.get(region) == key:
+            return False
+        self.shown[region] = key
+        return True
+
+    def draw(self, g: Game, pal, ui):
+        if self.changed("view", view_key(g, ui)):
+            self.view = viewmodel.build(g, ui.sel_pid, ui.sel_aid)
+            render.draw_topbar(self.top, self.view, pal)
+            render.draw_sidebar(self.side, self.view, pal)
+        render.draw_map(self.map, g, pal, ui, self.map_view)
+        lines = self.log.getmaxyx()[0]
+        if self.changed("log", g.log[-lines:]):
+            self.log.erase()
+            render.draw_log(self.log, g, pal, 0, lines)
+        if self.changed("keys", ui.status):
+            self.keys.erase()
+            render.draw_keybar(self.keys, pal, ui, ui.status)
+        for win in self.windows:
+            win.touchwin()          # a popup may have covered any of them
+            win.noutrefresh()
+        curses.doupdate()
+
+
+def view_key(g: Game, ui) -> tuple:
+    """What the top bar and sidebar are built from. A load brings new
+    provinces but may bring back a changes count already shown."""
+    return id(g.provinces), g.changes, ui.sel_pid, ui.sel_aid
+
+
 def draw(stdscr, g, pal, ui):
-    stdscr.erase()
+    if meter is not None:
+        meter.start()
     h, w = stdscr.getmaxyx()
     if h < render.MIN_ROWS or w < render.MIN_COLS:
+        ui.screen = None
+        stdscr.erase()
         safe_addstr(stdscr, 0, 0, f"Terminal too small ({w}x{h}); need "
                                   f"{render.MIN_COLS}x{render.MIN_ROWS}.")
         stdscr.refresh()
-        return
-    render.draw_topbar(stdscr, g, pal)
-    map_h = g.height + 2
-    map_w = g.width + 2
-    mapwin = stdscr.derwin(map_h, map_w, 1, 0)
-    render.draw_map(mapwin, g, pal, ui)
-    side = stdscr.derwin(map_h, w - map_w, 1, map_w)
-    render.draw_sidebar(side, g, pal, ui)
-    log_top = 1 + map_h
-    render.draw_log(stdscr, g, pal, log_top, h - log_top - 1)
-    render.draw_keybar(stdscr, pal, ui, ui.status)
-    stdscr.refresh()
+    else:
+        if ui.screen is None or ui.screen.size != (h, w):
+            ui.screen = Screen(stdscr, g)
+        ui.screen.draw(g, pal, ui)
+    if meter is not None:
+        meter.stop()
 
 
 def end_turn(stdscr, g, pal, ui, months=1):
-    me = g.nations[g.player]
-    wars_before = len(g.wars_of(g.player))
-    for _ in range(months):
-        engine.advance_month(g, ai_module=ai)
-        if g.month == 0 and not g.game_over:
-            try:
-                save.save(g, save.AUTOSAVE_PATH)
-            except OSError:
-                pass
-        if g.pending_events or g.game_over:
-            break
-        if len(g.wars_of(g.player)) != wars_before:
-            break
-        if g.year >= data.END_YEAR and g.month == 0:
-            break
+    ff = FastForward(g, months, ai_module=ai, on_month=new_month)
+    ff.start()
+    if not ff.wait(0.05):           # a month or a quiet year: no flicker
+        follow(stdscr, g, pal, ui, ff)
+    if ff.result() == "stopped":
+        ui.status = f"Stopped after {ff.done} month(s)."
     if g.year == data.END_YEAR and g.month == 0 and not g.game_over:
         final_scores(stdscr, g, pal)
 
 
+def new_month(g):
+    """After each month of a turn: January autosave and checkpoint."""
+    if g.month == 0 and not g.game_over:
+        autosaver.request(g)
+        if g.recorder is not None:
+            g.recorder.check()
+            g.recorder.write()
+
+
+def follow(stdscr, g, pal, ui, ff):
+    """Redraw with a progress line while ff runs; Esc stops it. Other keys
+    typed meanwhile are pushed back, to be read once it is done."""
+    typed = []
+    try:
+        while not ff.wait(0):
+            with ff.lock:
+                ui.status = (f"Advancing: {g.date_str}, month {ff.done}/"
+                             f"{ff.months}, {ff.rate():.0f} months/s   "
+                             f"[Esc] stop")
+                draw(stdscr, g, pal, ui)
+            stdscr.timeout(50)      # read_key restores blocking reads
+            k = read_key(stdscr)
+            if k == 27:
+                ff.stop()
+            elif k != -1:
+                typed.append(k)
+    finally:
+        stdscr.timeout(-1)
+        ui.status = ""
+    for k in reversed(typed):
+        curses.ungetch(k)
+
+
 def final_scores(stdscr, g, pal):
     rows = sorted((t for t, n in g.nations.items()
                    if n.alive and t != data.REBEL_TAG),
@@ -223,6 +338,8 @@ def handle_key(stdscr, g, pal, ui, k) -> bool:
         ui.cursor = (cx, min(g.height - 1, cy + 1))
     elif k in (10, 13, curses.KEY_ENTER):
         select_at_cursor(g, ui)
+    elif k == curses.KEY_RESIZE:
+        ui.screen = None            # new windows for the new size
     elif k == 27 and ui.mode == "move":
         ui.mode = "normal"
         ui.status = "Move cancelled."
@@ -238,32 +355,30 @@ def handle_key(stdscr, g, pal, ui, k) -> bool:
             ui.status = "Select one of your armies first (Tab)."
     elif k == ord("G"):
         if ui.sel_aid in g.armies and g.armies[ui.sel_aid].owner == g.player:
-            ok, msg = engine.hire_general(g, ui.sel_aid)
+            ok, msg = replay.command(g, "hire_general", ui.sel_aid)
             ui.status = msg
         else:
             ui.status = "Select one of your armies first (Tab)."
     elif k == ord("x"):
         if ui.sel_aid in g.armies and g.armies[ui.sel_aid].owner == g.player:
-            ok, msg = engine.split_army(g, ui.sel_aid)
+            ok, msg = replay.command(g, "split_army", ui.sel_aid)
             ui.status = msg
     elif k == ord("i"):
         if ui.sel_aid in g.armies and g.armies[ui.sel_aid].owner == g.player:
-            a = g.armies[ui.sel_aid]
-            a.reinforce = not a.reinforce
-            ui.status = (f"{a.name}: reinforcement "
-                         f"{'on' if a.reinforce else 'off'}.")
+            ok, msg = replay.command(g, "toggle_reinforce", ui.sel_aid)
+            ui.status = msg
         else:
             ui.status = "Select one of your armies first (Tab)."
     elif k == ord("X"):
         if ui.sel_aid in g.armies and g.armies[ui.sel_aid].owner == g.player:
             if popup_menu(stdscr, pal, "Disband army?",
                           ["Yes, disband", "No"]) == 0:
-                ok, msg = engine.disband_army(g, ui.sel_aid)
+                ok, msg = replay.command(g, "disband_army", ui.sel_aid)
                 ui.sel_aid = None
                 ui.status = msg
     elif k == ord("r"):
         if ui.sel_pid is not None:
-            ok, msg = engine.recruit(g, g.player, ui.sel_pid)
+            ok, msg = replay.command(g, "recruit", g.player, ui.sel_pid)
             ui.status = msg
     elif k == ord("R"):
         if ui.sel_pid is not None:
@@ -272,7 +387,7 @@ def handle_key(stdscr, g, pal, ui, k) -> bool:
                 regs = sum(a.regiments for a in g.armies_of(g.player))
                 if regs >= g.force_limit(g.player):
                     break
-                ok, msg = engine.recruit(g, g.player, ui.sel_pid)
+                ok, msg = replay.command(g, "recruit", g.player, ui.sel_pid)
                 if not ok:
                     break
                 done += 1
@@ -280,19 +395,20 @@ def handle_key(stdscr, g, pal, ui, k) -> bool:
                          else "Cannot recruit (gold/manpower/force limit).")
     elif k == ord("d"):
         if ui.sel_pid is not None:
-            ok, msg = engine.develop(g, g.player, ui.sel_pid)
+            ok, msg = replay.command(g, "develop", g.player, ui.sel_pid)
             ui.status = msg
     elif k == ord("b"):
         if ui.sel_pid is not None:
             build_menu(stdscr, g, pal, ui)
     elif k == ord("c"):
         if ui.sel_pid is not None:
-            ok, msg = engine.fabricate_claim(g, g.player, ui.sel_pid)
+            ok, msg = replay.command(g, "fabricate_claim", g.player,
+                                     ui.sel_pid)
             ui.status = msg
     elif k == ord("D"):
         diplomacy_menu(stdscr, g, pal, ui)
     elif k == ord("+"):
-        ok, msg = engine.raise_stability(g, g.player)
+        ok, msg = replay.command(g, "raise_stability", g.player)
         ui.status = msg
     elif k == ord("o"):
         show_ledger(stdscr, g, pal)
@@ -309,13 +425,13 @@ def handle_key(stdscr, g, pal, ui, k) -> bool:
     elif k == ord("S"):
         save.save(g)
         ui.status = f"Saved to {save.SAVE_PATH}"
+    elif k == ord("W"):
+        save_to_slot(stdscr, g, pal, ui)
     elif k == ord("L"):
-        try:
-            g2 = save.load()
-            g.__dict__.update(g2.__dict__)
-            ui.status = "Game loaded."
-        except Exception as e:
-            ui.status = f"Load failed: {e}"
+        autosaver.flush()
+        path = pick_save(stdscr, pal)
+        if path is not None:
+            load_game(g, ui, path)
     elif k == ord("q"):
         sel = popup_menu(stdscr, pal, "Quit?",
                          ["Save and quit", "Quit without saving", "Cancel"])
@@ -327,6 +443,23 @@ def handle_key(stdscr, g, pal, ui, k) -> bool:
     return True
 
 
+def load_game(g: Game, ui, path: str):
+    """Replace g's state with the save at path; the result in ui.status.
+    A recording in progress is written and ends there."""
+    try:
+        g2 = save.load(path)
+    except Exception as e:
+        ui.status = f"Load failed: {e}"
+        return
+    rec = g.recorder
+    if rec is not None:             # a replay can't go on from a loaded state
+        rec.write()
+    g.__dict__.update(g2.__dict__)
+    ui.status = "Game loaded."
+    if rec is not None:
+        ui.status += f" Recording stopped; {rec.path} ends at the load."
+
+
 def select_at_cursor(g, ui):
     cx, cy = ui.cursor
     pid = g.grid[cy][cx]
@@ -334,7 +467,7 @@ def select_at_cursor(g, ui):
         if pid < 0:
             ui.status = "Cannot march into the sea."
             return
-        ok, msg = engine.move_army(g, ui.sel_aid, pid)
+        ok, msg = replay.command(g, "move_army", ui.sel_aid, pid)
         ui.status = msg
         if ok:
             ui.mode = "normal"
@@ -343,8 +476,7 @@ def select_at_cursor(g, ui):
         ui.sel_pid = None
         ui.sel_aid = None
         return
-    here = [a for a in g.armies.values()
-            if a.location == pid and a.owner == g.player]
+    here = g.army_index.stack(pid, g.player)
     if ui.sel_pid == pid and here:
         # already selected: cycle own armies on this province
         if ui.sel_aid in [a.aid for a in here]:
@@ -391,7 +523,7 @@ def build_menu(stdscr, g, pal, ui):
             f"treasury {g.nations[g.player].gold:.0f}g"]
     sel = popup_menu(stdscr, pal, "Construct Building", opts, info)
     if sel is not None:
-        ok, msg = engine.build(g, g.player, ui.sel_pid, keys[sel])
+        ok, msg = replay.command(g, "build", g.player, ui.sel_pid, keys[sel])
         ui.status = msg
 
 
@@ -494,23 +626,23 @@ def nation_diplomacy(stdscr, g, pal, ui, target):
         return
     act = actions[sel]
     if act == "improve":
-        ok, msg = engine.improve_relations(g, g.player, target)
+        ok, msg = replay.command(g, "improve_relations", g.player, target)
     elif act == "ally":
-        ok, msg = engine.offer_alliance(g, g.player, target)
+        ok, msg = replay.command(g, "offer_alliance", g.player, target)
     elif act == "break":
-        ok, msg = engine.break_alliance(g, g.player, target)
+        ok, msg = replay.command(g, "break_alliance", g.player, target)
     elif act == "rival":
-        ok, msg = engine.declare_rival(g, g.player, target)
+        ok, msg = replay.command(g, "declare_rival", g.player, target)
     elif act == "end_rival":
-        ok, msg = engine.end_rivalry(g, g.player, target)
+        ok, msg = replay.command(g, "end_rivalry", g.player, target)
     elif act == "annex":
-        ok, msg = engine.start_annex_vassal(g, g.player, target)
+        ok, msg = replay.command(g, "start_annex_vassal", g.player, target)
     elif act == "release":
         conf = popup_menu(stdscr, pal, f"Release {o.name} from vassalage?",
                           ["Release them", "Keep them"])
         if conf != 0:
             return
-        ok, msg = engine.release_vassal(g, g.player, target)
+        ok, msg = replay.command(g, "release_vassal", g.player, target)
     elif act == "independence":
         conf = popup_menu(
             stdscr, pal,
@@ -519,8 +651,8 @@ def nation_diplomacy(stdscr, g, pal, ui, target):
             ["Declare independence!", "Endure"])
         if conf != 0:
             return
-        ok, msg = engine.declare_war(g, g.player, target,
-                                     independence=True)
+        ok, msg = replay.command(g, "declare_war", g.player, target,
+                                 independence=True)
     elif act == "war":
         extra = ""
         if g.truce_between(g.player, target):
@@ -531,11 +663,8 @@ def nation_diplomacy(stdscr, g, pal, ui, target):
         if conf != 0:
             return
         if g.truce_between(g.player, target):
-            me.truces.pop(target, None)
-            o.truces.pop(g.player, None)
-            me.stability = max(data.MIN_STAB, me.stability - 1)
-            me.prestige -= 10
-        ok, msg = engine.declare_war(g, g.player, target)
+            replay.command(g, "break_truce", g.player, target)
+        ok, msg = replay.command(g, "declare_war", g.player, target)
     elif act == "peace":
         peace_menu(stdscr, g, pal, ui, target)
         return
@@ -569,12 +698,12 @@ def peace_menu(stdscr, g, pal, ui, target):
     if mode is None:
         return
     if mode == 2:
-        ok, msg = engine.offer_peace(g, w, g.player, [], 0)
+        ok, msg = replay.command(g, "offer_peace", w, g.player, [], 0)
         ui.status = msg
         return
     if mode == 3:
-        ok, msg = engine.offer_peace(g, w, g.player, [], 0,
-                                     vassalize=True)
+        ok, msg = replay.command(g, "offer_peace", w, g.player, [], 0,
+                                 vassalize=True)
         ui.status = msg
         return
     if mode == 0:
@@ -601,8 +730,8 @@ def peace_menu(stdscr, g, pal, ui, target):
         return
     chosen, gold = res
     take = [pids[i] for i in chosen]
-    ok, msg = engine.offer_peace(g, w, g.player, take, gold,
-                                 beneficiary=taker)
+    ok, msg = replay.command(g, "offer_peace", w, g.player, take, gold,
+                             beneficiary=taker)
     ui.status = msg
 
 
@@ -648,7 +777,7 @@ def handle_event_popup(stdscr, g, pal, ev):
     _, title, text, _, choices = event
     body = text.format(nation=g.nations[g.player].name)
     sel = popup_text(stdscr, pal, title, body, [c[0] for c in choices])
-    engine.apply_event_choice(g, g.player, event, sel)
+    replay.command(g, "apply_event_choice", g.player, event, sel)
 
 
 def handle_peace_popup(stdscr, g, pal, offer):
@@ -690,9 +819,10 @@ def handle_peace_popup(stdscr, g, pal, offer):
     sel = popup_text(stdscr, pal, f"Peace offer - {w.name}", body,
                      ["Accept", refuse])
     if sel == 0:
-        engine.execute_peace(g, w, ben, pids, gold, vassalize=vassalize)
+        replay.command(g, "execute_peace", w, ben, pids, gold,
+                       vassalize=vassalize)
     else:
-        engine.refuse_peace(g, w, offer)
+        replay.command(g, "refuse_peace", w, offer)
 
 
 def handle_alliance_popup(stdscr, g, pal, tag):
@@ -705,13 +835,7 @@ def handle_alliance_popup(stdscr, g, pal, tag):
             f"Their opinion of you: {o.opinion_of(g.player):+.0f}")
     sel = popup_text(stdscr, pal, "An Offer of Alliance", body,
                      ["Accept alliance", "Decline"])
-    if sel == 0:
-        me = g.nations[g.player]
-        me.allies.add(tag)
-        o.allies.add(g.player)
-        g.say("diplo", f"You are now allied with {o.name}.")
-    else:
-        o.opinions[g.player] = o.opinion_of(g.player) - 10
+    replay.command(g, "answer_alliance", g.player, tag, sel == 0)
 
 
 def handle_cta_popup(stdscr, g, pal, cta):
@@ -730,17 +854,21 @@ def handle_cta_popup(stdscr, g, pal, cta):
     sel = popup_text(stdscr, pal, "Call to Arms!", body,
                      ["Honor the alliance (join the war)",
                       "Refuse (break alliance, -10 prestige)"])
-    me = g.nations[g.player]
-    if sel == 0:
-        (w.attackers if side == "att" else w.defenders).append(g.player)
-        g.say("war", f"You join the {w.name} on the side of "
-                     f"{caller.name}.")
-    else:
-        engine.break_alliance(g, g.player, caller.tag)
-        me.prestige -= 10
+    replay.command(g, "answer_call_to_arms", g.player, w, side, caller.tag,
+                   sel == 0)
 
 
-def run(seed: int | None = None):
+def run(seed: int | None = None, record: str | None = None,
+        count_bytes: bool = False):
+    global meter
     import locale
     locale.setlocale(locale.LC_ALL, "")
-    curses.wrapper(main, seed)
+    if count_bytes:
+        meter = termbytes.ByteMeter()
+        meter.install()
+    try:
+        curses.wrapper(main, seed, record)
+    finally:
+        if meter is not None:
+            meter.close()
+            print(meter.summary())
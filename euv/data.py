@@ -78,6 +78,7 @@ CAPITULATION_MONTHS = 12   # ...held this long forces capitulation
 
 # unrest & rebels
 REBEL_TAG = "REB"          # special hostile-to-all nation
+REBEL_COLOR = 14           # its palette slot (gray); nations cycle the rest
 UNREST_MOVE_RATE = 0.15    # monthly drift when unrest is rising
 UNREST_DECAY_RATE = 0.04   # anger cools far slower than it rises
 UNREST_STAB_COEF = 1.5     # unrest per point of negative stability
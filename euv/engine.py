@@ -2,9 +2,8 @@
 from __future__ import annotations
 
 import math
-from collections import deque
 
-from . import data
+from . import data, pathfind, timing
 from .model import Army, Game, Nation, Province, War
 
 
@@ -28,26 +27,9 @@ def can_pass(g: Game, tag: str, pid: int) -> bool:
 
 
 def find_path(g: Game, tag: str, start: int, goal: int) -> list[int] | None:
-    """BFS path through passable provinces. Returns [start..goal] or None."""
-    if start == goal:
-        return [start]
-    prev = {start: -1}
-    q = deque([start])
-    while q:
-        cur = q.popleft()
-        for nb in sorted(g.provinces[cur].neighbors):
-            if nb in prev:
-                continue
-            if nb != goal and not can_pass(g, tag, nb):
-                continue
-            prev[nb] = cur
-            if nb == goal:
-                path = [goal]
-                while path[-1] != start:
-                    path.append(prev[path[-1]])
-                return path[::-1]
-            q.append(nb)
-    return None
+    """Shortest path through passable provinces. Returns [start..goal] or
+    None; ties go to the lowest province ids (see pathfind)."""
+    return pathfind.find_path(g, tag, start, goal)
 
 
 def morale_max(g: Game, tag: str) -> float:
@@ -76,8 +58,7 @@ def attrition_fraction(g: Game, army: Army) -> float:
     """
     tag, pid = army.owner, army.location
     limit = supply_limit(g, tag, pid)
-    regs = sum(a.regiments for a in g.armies.values()
-               if a.owner == tag and a.location == pid)
+    regs = g.army_index.regiments(pid, tag)
     if regs <= limit:
         return 0.0
     frac = data.ATTRITION_PER_EXCESS * (regs / limit - 1)
@@ -97,8 +78,10 @@ def army_upkeep(g: Game, tag: str) -> float:
 def monthly_balance(g: Game, tag: str) -> tuple[float, float, float]:
     """(income, expenses, net) for the ledger."""
     stab_mult = 1 + 0.03 * g.nations[tag].stability
-    income = sum(p.tax_income() for p in g.provinces_of(tag)) * stab_mult
-    forts = sum(1 for p in g.provinces_of(tag) if "fort" in p.buildings)
+    tax, forts = g.tick_cache.get(g.abs_month, tag, "balance", lambda: (
+        sum(p.tax_income() for p in g.provinces_of(tag)),
+        sum(1 for p in g.provinces_of(tag) if "fort" in p.buildings)))
+    income = tax * stab_mult
     expense = army_upkeep(g, tag) + forts * data.FORT_UPKEEP * 2
     n = g.nations[tag]
     if n.gold < 0:
@@ -114,6 +97,18 @@ def score(g: Game, tag: str) -> float:
 # =========================================================== player actions
 # All return (ok, message). They are also used by the AI.
 
+def choose_nation(g: Game, tag: str):
+    """Hand `tag` to the player at the start of a game."""
+    n = g.nations[tag]
+    g.player = tag
+    n.is_player = True
+    _missions_phase(g)            # initial objectives
+    g.pending_events.clear()      # no fanfare before the first turn
+    g.say("event", f"You now guide the destiny of {n.name}. "
+                   f"({g.date_str})")
+    return True, f"You play {n.name}."
+
+
 def develop(g: Game, tag: str, pid: int):
     p, n = g.provinces[pid], g.nations[tag]
     if p.owner != tag:
@@ -123,6 +118,7 @@ def develop(g: Game, tag: str, pid: int):
         return False, f"Need {cost} gold."
     n.gold -= cost
     p.dev += 1
+    g.invalidate(tag)
     return True, f"{p.name} developed to {p.dev}."
 
 
@@ -139,6 +135,7 @@ def build(g: Game, tag: str, pid: int, key: str):
         return False, f"Need {cost} gold."
     n.gold -= cost
     p.buildings.append(key)
+    g.invalidate(tag)
     return True, f"{name} built in {p.name}."
 
 
@@ -156,10 +153,11 @@ def recruit(g: Game, tag: str, pid: int, regiments: int = 1):
         return False, f"Need {men} manpower."
     n.gold -= cost
     n.manpower -= men
-    here = [a for a in g.armies_of(tag) if a.location == pid]
+    here = g.army_index.stack(pid, tag)
     if here:
         here[0].regiments += regiments
         here[0].men += men
+        g.armies.refresh(here[0])
     else:
         g.new_army(tag, pid, regiments)
     return True, f"Recruited {regiments} regiment(s) in {p.name}."
@@ -174,6 +172,8 @@ def move_army(g: Game, aid: int, target: int):
     if not path:
         return False, "No route there (need own/allied/enemy territory)."
     a.move_target = target
+    a.route = path[:0:-1]
+    a.route_key = (g.passage_epoch, a.location, target)
     return True, f"Moving to {g.provinces[target].name}."
 
 
@@ -185,6 +185,7 @@ def split_army(g: Game, aid: int):
     men_half = a.men * half // a.regiments
     a.regiments -= half
     a.men -= men_half
+    g.armies.refresh(a)
     b = g.new_army(a.owner, a.location, half, men_half)
     b.morale = a.morale
     return True, f"Split off {b.name}."
@@ -212,6 +213,13 @@ def hire_general(g: Game, aid: int):
     return True, f"{a.general_name} (skill {a.general}) takes command."
 
 
+def toggle_reinforce(g: Game, aid: int):
+    a = g.armies[aid]
+    a.reinforce = not a.reinforce
+    return True, (f"{a.name}: reinforcement "
+                  f"{'on' if a.reinforce else 'off'}.")
+
+
 def stability_cost(g: Game, tag: str) -> int:
     """Base cost rises with current stability and with empire size."""
     n = g.nations[tag]
@@ -354,8 +362,7 @@ def offer_alliance(g: Game, tag: str, other: str):
               and not o.in_coalition_against == tag)
     if not accept:
         return False, f"{o.name} declines (opinion {o.opinion_of(tag):.0f})."
-    n.allies.add(other)
-    o.allies.add(tag)
+    g.ally(tag, other)
     n.opinions[other] = n.opinion_of(other) + 10
     o.opinions[tag] = o.opinion_of(tag) + 10
     g.say("diplo", f"{n.name} and {o.name} form an alliance.")
@@ -364,13 +371,47 @@ def offer_alliance(g: Game, tag: str, other: str):
 
 def break_alliance(g: Game, tag: str, other: str):
     n, o = g.nations[tag], g.nations[other]
-    n.allies.discard(other)
-    o.allies.discard(tag)
+    g.unally(tag, other)
     o.opinions[tag] = o.opinion_of(tag) - 40
     g.say("diplo", f"{n.name} breaks its alliance with {o.name}.")
     return True, f"Alliance with {o.name} dissolved."
 
 
+def break_truce(g: Game, tag: str, other: str):
+    """Void a truce so war can be declared: -1 stability, -10 prestige."""
+    n, o = g.nations[tag], g.nations[other]
+    n.truces.pop(other, None)
+    o.truces.pop(tag, None)
+    n.stability = max(data.MIN_STAB, n.stability - 1)
+    n.prestige -= 10
+    return True, f"The truce with {o.name} is broken."
+
+
+def answer_alliance(g: Game, tag: str, other: str, accept: bool):
+    """The player's reply to an alliance offered by `other`."""
+    o = g.nations[other]
+    if accept:
+        g.ally(tag, other)
+        g.say("diplo", f"You are now allied with {o.name}.")
+        return True, f"Allied with {o.name}."
+    o.opinions[tag] = o.opinion_of(tag) - 10
+    return False, f"{o.name}'s offer declined."
+
+
+def answer_call_to_arms(g: Game, tag: str, w: War, side: str, caller: str,
+                        accept: bool):
+    """Join `caller`'s war on `side`, or refuse: the alliance ends and
+    prestige suffers."""
+    c = g.nations[caller]
+    if accept:
+        g.join_war(w, tag, side)
+        g.say("war", f"You join the {w.name} on the side of {c.name}.")
+        return True, f"Joined the {w.name}."
+    break_alliance(g, tag, caller)
+    g.nations[tag].prestige -= 10
+    return False, f"Refused {c.name}'s call to arms."
+
+
 def _find_cb(g: Game, tag: str, targets: list[str]) -> int | None:
     """A fabricated claim or a core acts as a casus belli."""
     n = g.nations[tag]
@@ -705,8 +746,7 @@ def execute_peace(g: Game, w: War, winner: str, pids: list[int],
                     lord = g.nations[n.overlord]
                     if lord.annexing and lord.annexing[0] == t:
                         lord.annexing = None
-                    n.overlord = None
-                    n.vassal_since = 0
+                    g.set_overlord(t, None)
                     g.say("diplo", f"{n.name} breaks free of "
                                    f"{lord.name}!")
             terms.append("independence")
@@ -718,6 +758,7 @@ def execute_peace(g: Game, w: War, winner: str, pids: list[int],
                 p.occupier = None
                 p.siege_progress = 0.0
                 p.sieging = None
+                g.invalidate(tag)
     until = g.abs_month + data.TRUCE_YEARS * 12
     for a in win_side:
         for b in lose_side:
@@ -755,18 +796,15 @@ def _spread_ae(g: Game, gainer: str, other: str, dev: float):
 def _make_vassal(g: Game, tag: str, overlord: str):
     """`tag` submits to `overlord`: a peace-imposed vassalization."""
     n, lord = g.nations[tag], g.nations[overlord]
-    n.overlord = overlord
-    n.vassal_since = g.abs_month
+    g.set_overlord(tag, overlord)
     # no chains of subjects: the new vassal's own vassals go free
     for v in g.vassals_of(tag):
-        g.nations[v].overlord = None
-        g.nations[v].vassal_since = 0
+        g.set_overlord(v, None)
         g.say("diplo", f"{g.nations[v].name} slips free as its overlord "
                        f"{n.name} is itself subjugated.")
     # a vassal keeps no alliances or coalition seats of its own
     for a in sorted(n.allies):
-        g.nations[a].allies.discard(tag)
-    n.allies.clear()
+        g.unally(tag, a)
     n.in_coalition_against = None
     _spread_ae(g, overlord, tag, g.total_dev(tag))
     g.say("war", f"*** {n.name} submits and becomes a vassal of "
@@ -800,8 +838,7 @@ def release_vassal(g: Game, tag: str, vassal: str):
     v = g.nations.get(vassal)
     if v is None or not v.alive or v.overlord != tag:
         return False, "Not your vassal."
-    v.overlord = None
-    v.vassal_since = 0
+    g.set_overlord(vassal, None)
     if n.annexing and n.annexing[0] == vassal:
         n.annexing = None
     v.opinions[tag] = v.opinion_of(tag) + 10
@@ -815,7 +852,7 @@ def _transfer_province(g: Game, pid: int, to: str,
                        integrated: bool = False):
     p = g.provinces[pid]
     old = p.owner
-    p.owner = to
+    g.set_owner(pid, to)
     p.owner_since = g.abs_month
     p.occupier = None
     p.siege_progress = 0.0
@@ -833,13 +870,10 @@ def _transfer_province(g: Game, pid: int, to: str,
 def _eliminate(g: Game, tag: str, by: str, integrated: bool = False):
     n = g.nations[tag]
     n.alive = False
-    for a in list(g.armies.values()):
-        if a.owner == tag:
-            del g.armies[a.aid]
-    for w in list(g.wars.values()):
-        for side in (w.attackers, w.defenders):
-            if tag in side:
-                side.remove(tag)
+    for a in g.armies_of(tag):
+        del g.armies[a.aid]
+    for w in g.wars_of(tag):
+        g.leave_war(w, tag)
         if not w.attackers or not w.defenders:
             del g.wars[w.wid]
     for o in g.nations.values():
@@ -855,6 +889,7 @@ def _eliminate(g: Game, tag: str, by: str, integrated: bool = False):
             o.vassal_since = 0
     n.overlord = None
     n.annexing = None
+    g.relations_changed()
     if integrated:
         g.say("war", f"*** {n.name} has been integrated into "
                      f"{g.nations[by].name}! ***")
@@ -868,32 +903,35 @@ def _eliminate(g: Game, tag: str, by: str, integrated: bool = False):
 
 
 def _send_strays_home(g: Game, tags: list[str]):
-    for a in list(g.armies.values()):
-        if a.owner not in tags:
-            continue
-        if not can_pass(g, a.owner, a.location):
-            n = g.nations[a.owner]
-            a.location = n.capital
-            a.move_target = None
+    for tag in tags:
+        for a in g.armies_of(tag):
+            if not can_pass(g, a.owner, a.location):
+                a.location = g.nations[a.owner].capital
+                g.armies.refresh(a)
+                a.move_target = None
 
 
 # ================================================================= the tick
 
 def advance_month(g: Game, ai_module=None):
-    """Advance the world by one month. ai_module avoids a circular import."""
+    """Advance the world by one month. ai_module avoids a circular import.
+
+    Each phase is timed when g.timing is set (see timing.enable).
+    """
+    run = timing.runner(g)
     g.month += 1
     if g.month >= 12:
         g.month = 0
         g.year += 1
-    _movement_phase(g)
-    _battle_phase(g)
-    _siege_phase(g)
-    _economy_phase(g)
-    _subjects_phase(g)
-    _supply_attrition(g)
-    _attrition_and_recovery(g)
-    _unrest_phase(g)
-    _diplomacy_phase(g)
+    run("movement", _movement_phase, g)
+    run("battle", _battle_phase, g)
+    run("siege", _siege_phase, g)
+    run("economy", _economy_phase, g)
+    run("subjects", _subjects_phase, g)
+    run("supply", _supply_attrition, g)
+    run("attrition", _attrition_and_recovery, g)
+    run("unrest", _unrest_phase, g)
+    run("diplomacy", _diplomacy_phase, g)
     for w in g.wars.values():
         _tick_goal_score(g, w)
         update_warscore(g, w)
@@ -901,10 +939,13 @@ def advance_month(g: Game, ai_module=None):
         ai_module.run_all(g)
     for w in g.wars.values():
         update_warscore(g, w)
-    _capitulation_phase(g)
-    _missions_phase(g)
-    _events_phase(g)
+    run("capitulation", _capitulation_phase, g)
+    run("missions", _missions_phase, g)
+    run("events", _events_phase, g)
     _check_end(g)
+    g.changes += 1
+    if g.check_indexes:
+        g.verify_indexes()
 
 
 def _capitulation_phase(g: Game):
@@ -961,6 +1002,22 @@ def _capitulation_terms(g: Game, w: War, winner: str,
     return picks
 
 
+def _next_step(g: Game, a: Army) -> int | None:
+    """Next province on a's way to its move_target. The planned route is
+    reused for as long as no one's right of passage has changed, since
+    every tail of a shortest path is the shortest path from there."""
+    if a.route_key != (g.passage_epoch, a.location, a.move_target) \
+            or not a.route:
+        path = find_path(g, a.owner, a.location, a.move_target)
+        if not path or len(path) < 2:
+            a.route, a.route_key = [], None
+            return None
+        a.route = path[:0:-1]
+    step = a.route.pop()
+    a.route_key = (g.passage_epoch, step, a.move_target)
+    return step
+
+
 def _movement_phase(g: Game):
     for a in sorted(g.armies.values(), key=lambda a: a.aid):
         if a.aid not in g.armies or a.move_target is None:
@@ -968,17 +1025,17 @@ def _movement_phase(g: Game):
         if a.move_target == a.location:
             a.move_target = None
             continue
-        path = find_path(g, a.owner, a.location, a.move_target)
-        if not path or len(path) < 2:
+        step = _next_step(g, a)
+        if step is None:
             a.move_target = None
             continue
-        a.location = path[1]
+        a.location = step
+        g.armies.refresh(a)
         if a.location == a.move_target:
             a.move_target = None
         # auto-merge with friendly army present
-        for b in list(g.armies.values()):
-            if (b.aid != a.aid and b.owner == a.owner
-                    and b.location == a.location):
+        for b in g.army_index.stack(a.location, a.owner):
+            if b.aid != a.aid:
                 b.regiments += a.regiments
                 b.men += a.men
                 b.morale = min(a.morale, b.morale)
@@ -986,16 +1043,14 @@ def _movement_phase(g: Game):
                     b.general, b.general_name = a.general, a.general_name
                 if a.move_target and not b.move_target:
                     b.move_target = a.move_target
+                g.armies.refresh(b)
                 del g.armies[a.aid]
                 break
 
 
 def _battle_phase(g: Game):
     # find provinces holding mutually hostile armies
-    by_loc: dict[int, list[Army]] = {}
-    for a in g.armies.values():
-        by_loc.setdefault(a.location, []).append(a)
-    for pid, armies in by_loc.items():
+    for pid, armies in g.army_index.by_location().items():
         tags = {a.owner for a in armies}
         if len(tags) < 2:
             continue
@@ -1111,22 +1166,17 @@ def _retreat(g: Game, a: Army):
     if a.men < 50:
         del g.armies[a.aid]
         return
-    own = [p.pid for p in g.provinces_of(a.owner) if p.pid != a.location]
+    own = {p.pid for p in g.provinces_of(a.owner)} - {a.location}
     if not own:
         del g.armies[a.aid]
         return
     here = g.provinces[a.location].center
-    dest = min(own, key=lambda pid:
-               (g.provinces[pid].center[0] - here[0]) ** 2
-               + (g.provinces[pid].center[1] - here[1]) ** 2)
-    a.location = dest
+    a.location = pathfind.topology(g).spatial.nearest(here, own)
+    g.armies.refresh(a)
 
 
 def _siege_phase(g: Game):
-    by_loc: dict[int, list[Army]] = {}
-    for a in g.armies.values():
-        by_loc.setdefault(a.location, []).append(a)
-    for pid, armies in by_loc.items():
+    for pid, armies in g.army_index.by_location().items():
         p = g.provinces[pid]
         controller = p.occupier or p.owner
         # armies contesting the current controller (incl. owner retaking)
@@ -1149,6 +1199,7 @@ def _siege_phase(g: Game):
         if p.siege_progress >= 100:
             p.siege_progress = 0.0
             p.sieging = None
+            g.invalidate(p.owner)
             if side_tag == p.owner or side_tag in g.nations[p.owner].allies:
                 p.occupier = None
                 g.say("siege", f"{g.nations[p.owner].name} retakes "
@@ -1191,6 +1242,7 @@ def _economy_phase(g: Game):
                 a.regiments = max(1, a.regiments // 2)
                 a.men = min(a.men, a.regiments * data.RECRUIT_MANPOWER)
                 a.morale = 0.5
+                g.armies.refresh(a)
             g.say("econ", f"{n.name} declares bankruptcy! Its armies "
                           f"desert and the realm is in chaos.")
 
@@ -1203,6 +1255,7 @@ def _subjects_phase(g: Game):
             continue
         if p.cores != {p.owner}:
             p.cores = {p.owner}
+            g.invalidate(p.owner)
             if g.nations[p.owner].is_player:
                 g.say("econ", f"{p.name} is now a core province.")
     # vassals in the black pay tribute; years of peace breed loyalty
@@ -1257,10 +1310,7 @@ def _supply_attrition(g: Game):
     Runs before reinforcement, so a stack must draw fresh manpower every
     month merely to stand still.
     """
-    by_key: dict[tuple[int, str], list[Army]] = {}
-    for a in g.armies.values():
-        by_key.setdefault((a.location, a.owner), []).append(a)
-    for (pid, tag), armies in sorted(by_key.items()):
+    for (pid, tag), armies in g.army_index.stacks():
         frac = attrition_fraction(g, armies[0])
         if frac <= 0:
             continue
@@ -1342,6 +1392,7 @@ def _unrest_phase(g: Game):
             over = p.reb_months - data.REBEL_GRACE_MONTHS
             if over > 0 and over % 12 == 0 and p.dev > 1:
                 p.dev -= 1
+                g.invalidate(p.owner)
                 g.say("revolt", f"{p.name} is pillaged under rebel rule "
                                 f"(dev {p.dev}).")
             continue
@@ -1452,6 +1503,7 @@ def apply_event_choice(g: Game, tag: str, ev, choice: int):
                 o.ae[tag] = o.ae.get(tag, 0) + fx["ae"] * 0.3
     if fx.get("dev_capital"):
         g.provinces[n.capital].dev += fx["dev_capital"]
+        g.invalidate(tag)
     if n.is_player:
         g.say("event", f"{ev[1]}: {label}")
 
@@ -0,0 +1,104 @@
+"""Months simulated on a worker thread, so the screen stays live.
+
+    ff = FastForward(g, 120, ai_module=ai, on_month=new_year)
+    ff.start()
+    while not ff.wait(0.05):
+        with ff.lock:               # between months, never inside one
+            draw(...)
+    reason = ff.result()
+
+The worker stops at a month boundary when stop() asks it to, or when the
+player should look: an event or offer is waiting, the player's wars
+changed, the game ended or the final year began -- the rules turns have
+always stopped on.
+"""
+from __future__ import annotations
+
+import threading
+import time
+
+from . import data, engine
+from .model import Game
+
+
+class FastForward:
+    def __init__(self, g: Game, months: int, ai_module=None, on_month=None):
+        self.g = g
+        self.months = months
+        self.ai_module = ai_module
+        self.on_month = on_month    # after each month, on the worker
+        self.lock = threading.Lock()        # held through each month
+        self.done = 0               # months advanced
+        self.reason = ""            # why it stopped, see _month
+        self._stop = threading.Event()
+        self._finished = threading.Event()
+        self._error: BaseException | None = None
+        self._started = self._ended = 0.0
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="fast-forward")
+        self._thread.start()
+
+    def stop(self):
+        """Stop at the next month boundary."""
+        self._stop.set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """True once the worker has stopped."""
+        return self._finished.wait(timeout)
+
+    def rate(self) -> float:
+        """Months per second so far."""
+        span = (self._ended or time.perf_counter()) - self._started
+        return self.done / span if span > 0 else 0.0
+
+    def result(self) -> str:
+        """Wait for the worker and return why it stopped; re-raises
+        anything it raised."""
+        self._finished.wait()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self.reason
+
+    def _run(self):
+        reason = "error"
+        try:
+            with self.lock:
+                wars = len(self.g.wars_of(self.g.player))
+            while True:
+                with self.lock:
+                    reason = self._month(wars)
+                if reason:
+                    break
+                time.sleep(0)       # a reader waiting on the lock gets in
+        except BaseException as e:  # handed to result() on the UI thread
+            self._error = e
+        finally:
+            self.reason = reason
+            self._ended = time.perf_counter()
+            self._finished.set()
+
+    def _month(self, wars_before: int) -> str | None:
+        """Advance one month unless it is time to stop; the reason if so."""
+        g = self.g
+        if self._stop.is_set():
+            return "stopped"
+        if self.done >= self.months:
+            return "done"
+        engine.advance_month(g, ai_module=self.ai_module)
+        self.done += 1
+        if self.on_month is not None:
+            self.on_month(g)
+        if g.game_over:
+            return "over"
+        if g.pending_events:
+            return "event"
+        if len(g.wars_of(g.player)) != wars_before:
+            return "war"
+        if g.year >= data.END_YEAR and g.month == 0:
+            return "end"
+        return None
@@ -67,6 +67,11 @@ class Army:
     general: int = 0                # battle dice bonus, 0 = no general
     general_name: str = ""
     reinforce: bool = True          # draw replacements from manpower
+    # planned route (not saved): steps left, nearest last, and the
+    # (passage epoch, location, target) it was planned under
+    route: list[int] = field(default_factory=list, repr=False,
+                             compare=False)
+    route_key: tuple | None = field(default=None, repr=False, compare=False)
 
     @property
     def strength(self) -> float:
@@ -109,6 +114,243 @@ class War:
         return self.score if tag in self.attackers else -self.score
 
 
+class _IndexedTable(dict):
+    """A dict whose derived indexes follow every insert and delete, so
+    `del g.armies[aid]` or `g.wars.pop(wid)` anywhere stays consistent.
+    Subclasses implement _reset, _index and _unindex."""
+
+    def __init__(self, items=()):
+        super().__init__()
+        self.version = 0           # bumped on every change to the table
+        self._reset()
+        for k, v in dict(items).items():
+            self[k] = v
+
+    def __setitem__(self, key, value):
+        self.version += 1
+        if key in self:
+            self._unindex(self[key])
+        super().__setitem__(key, value)
+        self._index(value)
+
+    def __delitem__(self, key):
+        self.version += 1
+        self._unindex(self[key])
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self[key]
+        del self[key]
+        return value
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+        self._reset()
+
+    def __reduce__(self):
+        return self.__class__, (dict(self),)
+
+
+class ArmyIndex:
+    """Armies by location and by (location, owner), with the regiment
+    total of every (location, owner) stack.
+
+    Each army's filed position is remembered, so one moved or resized in
+    place can still be refiled exactly; call refresh(a) afterwards. Lists
+    come out in aid order, which is the army table's own order.
+    """
+
+    def __init__(self):
+        self._filed: dict[int, tuple[int, str, int]] = {}
+        self._at: dict[int, dict[int, Army]] = {}
+        self._stacks: dict[tuple[int, str], dict[int, Army]] = {}
+        self._regs: dict[tuple[int, str], int] = {}
+
+    def add(self, a: Army):
+        self._filed[a.aid] = (a.location, a.owner, a.regiments)
+        self._at.setdefault(a.location, {})[a.aid] = a
+        key = (a.location, a.owner)
+        self._stacks.setdefault(key, {})[a.aid] = a
+        self._regs[key] = self._regs.get(key, 0) + a.regiments
+
+    def remove(self, a: Army):
+        pid, owner, regs = self._filed.pop(a.aid)
+        here = self._at[pid]
+        del here[a.aid]
+        if not here:
+            del self._at[pid]
+        key = (pid, owner)
+        stack = self._stacks[key]
+        del stack[a.aid]
+        if stack:
+            self._regs[key] -= regs
+        else:
+            del self._stacks[key]
+            del self._regs[key]
+
+    def refresh(self, a: Army):
+        self.remove(a)
+        self.add(a)
+
+    def at(self, pid: int) -> list[Army]:
+        here = self._at.get(pid, {})
+        return [here[aid] for aid in sorted(here)]
+
+    def stack(self, pid: int, owner: str) -> list[Army]:
+        here = self._stacks.get((pid, owner), {})
+        return [here[aid] for aid in sorted(here)]
+
+    def regiments(self, pid: int, owner: str) -> int:
+        return self._regs.get((pid, owner), 0)
+
+    def by_location(self) -> dict[int, list[Army]]:
+        """Snapshot pid -> armies there, in the order a scan of the table
+        would build it (locations by their lowest aid)."""
+        out = [self.at(pid) for pid in self._at]
+        out.sort(key=lambda armies: armies[0].aid)
+        return {armies[0].location: armies for armies in out}
+
+    def stacks(self) -> list[tuple[tuple[int, str], list[Army]]]:
+        """Snapshot of every (pid, owner) stack, sorted by key."""
+        return [(key, self.stack(*key)) for key in sorted(self._stacks)]
+
+
+class ArmyTable(_IndexedTable):
+    """aid -> Army, indexed by owner and by location (see ArmyIndex).
+
+    Per-owner buckets are insertion-ordered like the table itself, so
+    `owned_by` yields armies in the same order a full scan would. Call
+    `refresh(a)` after moving an army or changing its regiments in place.
+    """
+
+    def _reset(self):
+        self._by_owner: dict[str, dict[int, Army]] = {}
+        self.index = ArmyIndex()
+
+    def _index(self, a: Army):
+        self._by_owner.setdefault(a.owner, {})[a.aid] = a
+        self.index.add(a)
+
+    def _unindex(self, a: Army):
+        bucket = self._by_owner.get(a.owner)
+        if bucket is not None:
+            bucket.pop(a.aid, None)
+            if not bucket:
+                del self._by_owner[a.owner]
+        self.index.remove(a)
+
+    def refresh(self, a: Army):
+        self.version += 1
+        self.index.refresh(a)
+
+    def owned_by(self, tag: str) -> list[Army]:
+        return list(self._by_owner.get(tag, {}).values())
+
+
+class WarTable(_IndexedTable):
+    """wid -> War, indexed by participant and by hostile pair.
+
+    The sides each war was indexed with are remembered, so a war whose
+    lists were edited since can still be unindexed exactly; call
+    `refresh(w)` after changing a war's sides in place.
+    """
+
+    def _reset(self):
+        self._sides: dict[int, tuple[tuple[str, ...], tuple[str, ...]]] = {}
+        self._members: dict[str, set[int]] = {}
+        # tag -> enemy tag -> number of wars they face each other in
+        self._hostile: dict[str, dict[str, int]] = {}
+
+    def _index(self, w: War):
+        att, dfn = tuple(w.attackers), tuple(w.defenders)
+        self._sides[w.wid] = (att, dfn)
+        for t in att + dfn:
+            self._members.setdefault(t, set()).add(w.wid)
+        for a in att:
+            for d in dfn:
+                for x, y in ((a, d), (d, a)):
+                    foes = self._hostile.setdefault(x, {})
+                    foes[y] = foes.get(y, 0) + 1
+
+    def _unindex(self, w: War):
+        att, dfn = self._sides.pop(w.wid)
+        for t in att + dfn:
+            wids = self._members.get(t)
+            if wids is not None:
+                wids.discard(w.wid)
+                if not wids:
+                    del self._members[t]
+        for a in att:
+            for d in dfn:
+                for x, y in ((a, d), (d, a)):
+                    foes = self._hostile[x]
+                    foes[y] -= 1
+                    if not foes[y]:
+                        del foes[y]
+                        if not foes:
+                            del self._hostile[x]
+
+    def refresh(self, w: War):
+        self.version += 1
+        self._unindex(w)
+        self._index(w)
+
+    def hostile(self, a: str, b: str) -> bool:
+        return b in self._hostile.get(a, ())
+
+    def of(self, tag: str) -> list[War]:
+        return [self[wid] for wid in sorted(self._members.get(tag, ()))]
+
+
+class TickCache:
+    """Values derived from a nation's provinces, memoized for one month.
+
+    Everything empties when the month turns. Within a month, call
+    Game.invalidate(tag) after changing the dev, buildings, owner,
+    occupier or cores of a province `tag` holds. hits / misses count
+    lookups per value name.
+    """
+
+    def __init__(self):
+        self.month = -1
+        self._by_tag: dict[str, dict[str, tuple]] = {}   # name -> (v, fn)
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+
+    def get(self, month: int, tag: str, name: str, compute):
+        if month != self.month:
+            self._by_tag.clear()
+            self.month = month
+        values = self._by_tag.setdefault(tag, {})
+        hit = values.get(name)
+        if hit is not None:
+            self.hits[name] = self.hits.get(name, 0) + 1
+            return hit[0]
+        self.misses[name] = self.misses.get(name, 0) + 1
+        value = compute()
+        values[name] = (value, compute)
+        return value
+
+    def forget(self, tag: str):
+        self._by_tag.pop(tag, None)
+
+    def stale(self) -> list[tuple[str, str]]:
+        """(tag, name) of every entry that no longer matches a recompute."""
+        return [(tag, name) for tag, values in self._by_tag.items()
+                for name, (value, compute) in values.items()
+                if compute() != value]
+
+    def hit_rates(self) -> dict[str, float]:
+        return {name: self.hits.get(name, 0)
+                / (self.hits.get(name, 0) + self.misses[name])
+                for name in sorted(self.misses)}
+
+
 @dataclass
 class Nation:
     tag: str
@@ -153,19 +395,34 @@ class Game:
         self.month = 0                # 0-11
         self.provinces: dict[int, Province] = {}
         self.nations: dict[str, Nation] = {}
-        self.armies: dict[int, Army] = {}
-        self.wars: dict[int, War] = {}
+        self.armies: ArmyTable = ArmyTable()
+        self.wars: WarTable = WarTable()
         self.player: str = ""
         self.grid: list[list[int]] = []   # cell -> province id, -1 = sea
         self.straits: set[tuple[int, int]] = set()  # special sea crossings
         self.width = 0
         self.height = 0
+        # worldgen arguments that rebuild this map from seed: () for
+        # generate(), generate_scaled()'s otherwise; None when unknown
+        self.world: tuple | None = None
+        self.recorder = None                # replay.Recorder, if recording
         self.log: list[tuple[str, str]] = []   # (category, message)
         self.pending_events: list[dict] = []   # popups queued for the player
         self.missions: list[dict] = []         # player objectives
         self._next_army = 1
         self._next_war = 1
         self.game_over: str | None = None      # message when player eliminated
+        # derived: tag -> owned province ids (see set_owner / reindex)
+        self._owned: dict[str, set[int]] = {}
+        # derived: frozen map graph and passage bitmaps (see pathfind)
+        self.topology = None
+        self._relations = 0           # bumped when passage rights change
+        self.changes = 0              # bumped each month and player command
+        self._passable: dict[str, bytes] = {}
+        self._passable_key: tuple | None = None
+        self.tick_cache = TickCache()  # see invalidate
+        self.timing = None            # timing.Timings while profiling
+        self.check_indexes = False    # verify indexes every month (tests)
 
     # ------------------------------------------------------------- helpers
 
@@ -183,32 +440,163 @@ class Game:
             del self.log[:100]
 
     def provinces_of(self, tag: str) -> list[Province]:
-        return [p for p in self.provinces.values() if p.owner == tag]
+        return [self.provinces[pid] for pid in sorted(self._owned.get(tag, ()))]
 
     def armies_of(self, tag: str) -> list[Army]:
-        return [a for a in self.armies.values() if a.owner == tag]
+        return self.armies.owned_by(tag)
+
+    @property
+    def army_index(self) -> ArmyIndex:
+        return self.armies.index
+
+    def set_owner(self, pid: int, tag: str):
+        """The one place province ownership changes; keeps the index."""
+        p = self.provinces[pid]
+        prev = p.owner
+        old = self._owned.get(prev)
+        if old is not None:
+            old.discard(pid)
+            if not old:
+                del self._owned[prev]
+        p.owner = tag
+        self._owned.setdefault(tag, set()).add(pid)
+        self._relations += 1
+        self.invalidate(prev, tag)
+
+    def invalidate(self, *tags: str):
+        """Drop this month's derived values (total_dev, balance...) for
+        nations whose provinces just changed."""
+        for tag in tags:
+            self.tick_cache.forget(tag)
+
+    @property
+    def passage_epoch(self) -> tuple[int, int]:
+        """Changes whenever any nation's right of passage may have:
+        ownership, alliances, vassalage, or the war table."""
+        return self._relations, self.wars.version
+
+    def relations_changed(self):
+        """Note a direct edit of allies / overlord (see ally, unally)."""
+        self._relations += 1
+
+    def ally(self, a: str, b: str):
+        self.nations[a].allies.add(b)
+        self.nations[b].allies.add(a)
+        self._relations += 1
+
+    def unally(self, a: str, b: str):
+        self.nations[a].allies.discard(b)
+        self.nations[b].allies.discard(a)
+        self._relations += 1
+
+    def set_overlord(self, tag: str, overlord: str | None):
+        """Make tag a vassal of overlord, or free it (None)."""
+        n = self.nations[tag]
+        n.overlord = overlord
+        n.vassal_since = self.abs_month if overlord else 0
+        self._relations += 1
+
+    def verify_indexes(self):
+        """Compare every maintained index against a brute-force scan.
+
+        Raises AssertionError naming the first disagreement. Check mode
+        (check_indexes = True) runs this at the end of every month.
+        """
+        by_loc: dict[int, list[Army]] = {}
+        for a in self.armies.values():
+            by_loc.setdefault(a.location, []).append(a)
+        assert list(self.army_index.by_location().items()) == \
+            list(by_loc.items()), "army_index.by_location()"
+        for pid, armies in by_loc.items():
+            for tag in {a.owner for a in armies}:
+                regs = sum(a.regiments for a in armies if a.owner == tag)
+                assert self.army_index.regiments(pid, tag) == regs, \
+                    f"army_index.regiments({pid}, {tag})"
+        assert not self.tick_cache.stale(), \
+            f"tick_cache {self.tick_cache.stale()}"
+        tags = list(self.nations)
+        for tag in tags:
+            scan = [p for p in self.provinces.values() if p.owner == tag]
+            assert self.provinces_of(tag) == scan, f"provinces_of({tag})"
+            scan = [a for a in self.armies.values() if a.owner == tag]
+            assert self.armies_of(tag) == scan, f"armies_of({tag})"
+            scan = [w for w in self.wars.values() if w.side_of(tag)]
+            assert self.wars_of(tag) == scan, f"wars_of({tag})"
+            for other in tags:
+                if other == tag:
+                    continue
+                scan = any(w.side_of(tag) and w.side_of(other)
+                           and w.side_of(tag) != w.side_of(other)
+                           for w in self.wars.values())
+                assert self.wars.hostile(tag, other) == scan, \
+                    f"at_war_with({tag}, {other})"
+
+    def reindex(self):
+        """Rebuild derived indexes from scratch (after load / worldgen)."""
+        self._owned = {}
+        for p in self.provinces.values():
+            self._owned.setdefault(p.owner, set()).add(p.pid)
+
+    def fork(self) -> Game:
+        """An independent copy to play ahead in, e.g. to preview a peace
+        deal or let the AI look a few months forward.
+
+        The map is shared: grid, straits, topology and each province's
+        name, terrain, cells, center and neighbors never change after
+        worldgen. Everything a month can change is copied, the RNG too,
+        so the fork plays on exactly as the original would. This month's
+        derived values are recomputed; recorder and timing stay behind.
+        """
+        from . import timing
+        f = object.__new__(Game)
+        f.__dict__.update(self.__dict__)
+        for name in timing.HELPERS:     # wrappers bound to self, if timed
+            f.__dict__.pop(name, None)
+        f.rng = random.Random()
+        f.rng.setstate(self.rng.getstate())
+        f.provinces = {pid: _fork_province(p)
+                       for pid, p in self.provinces.items()}
+        f.nations = {tag: _fork_nation(n) for tag, n in self.nations.items()}
+        f.armies = ArmyTable({aid: _fork_army(a)
+                              for aid, a in self.armies.items()})
+        f.armies.version = self.armies.version
+        f.wars = WarTable({wid: _fork_war(w) for wid, w in self.wars.items()})
+        f.wars.version = self.wars.version
+        f.log = list(self.log)
+        f.pending_events = [dict(e) for e in self.pending_events]
+        f.missions = [dict(m) for m in self.missions]
+        f._owned = {tag: set(pids) for tag, pids in self._owned.items()}
+        f._passable = dict(self._passable)
+        f.tick_cache = TickCache()
+        f.recorder = None
+        f.timing = None
+        return f
 
     def total_dev(self, tag: str) -> int:
-        return sum(p.dev for p in self.provinces_of(tag))
+        return self.tick_cache.get(
+            self.abs_month, tag, "total_dev",
+            lambda: sum(p.dev for p in self.provinces_of(tag)))
 
     def force_limit(self, tag: str) -> int:
-        return data.FORCE_LIMIT_BASE + int(
-            self.total_dev(tag) * data.FORCE_LIMIT_PER_DEV)
+        return self.tick_cache.get(
+            self.abs_month, tag, "force_limit",
+            lambda: data.FORCE_LIMIT_BASE + int(
+                self.total_dev(tag) * data.FORCE_LIMIT_PER_DEV))
 
     def manpower_max(self, tag: str) -> float:
-        return sum(p.manpower_cap() for p in self.provinces_of(tag))
+        return self.tick_cache.get(
+            self.abs_month, tag, "manpower_max",
+            lambda: sum(p.manpower_cap() for p in self.provinces_of(tag)))
 
     def at_war_with(self, a: str, b: str) -> bool:
         if a == b:
             return False
         if a == data.REBEL_TAG or b == data.REBEL_TAG:
             return True            # rebels are hostile to everyone
-        return any(w.side_of(a) and w.side_of(b)
-                   and w.side_of(a) != w.side_of(b)
-                   for w in self.wars.values())
+        return self.wars.hostile(a, b)
 
     def wars_of(self, tag: str) -> list[War]:
-        return [w for w in self.wars.values() if w.side_of(tag)]
+        return self.wars.of(tag)
 
     def enemies_of(self, tag: str) -> set[str]:
         out: set[str] = set()
@@ -250,6 +638,17 @@ class Game:
         self.armies[a.aid] = a
         return a
 
+    def join_war(self, w: War, tag: str, side: str):
+        """Add tag to one side of a running war ("att" or "def")."""
+        (w.attackers if side == "att" else w.defenders).append(tag)
+        self.wars.refresh(w)
+
+    def leave_war(self, w: War, tag: str):
+        for side in (w.attackers, w.defenders):
+            if tag in side:
+                side.remove(tag)
+        self.wars.refresh(w)
+
     def new_war(self, attackers: list[str], defenders: list[str],
                 cb_target: int | None) -> War:
         w = War(self._next_war, attackers, defenders, cb_target,
@@ -258,3 +657,45 @@ class Game:
         self._next_war += 1
         self.wars[w.wid] = w
         return w
+
+
+# ----------------------------------------------------------------- forking
+# Game.fork() copies records field by field: the dataclass __dict__ in one
+# go, then the containers a month mutates. Sets, dicts and lists left out
+# here (cells, neighbors) are the shared map.
+
+def _copy(obj):
+    new = object.__new__(type(obj))
+    new.__dict__ = obj.__dict__.copy()
+    return new
+
+
+def _fork_province(p: Province) -> Province:
+    f = _copy(p)
+    f.buildings = list(p.buildings)
+    f.cores = set(p.cores)
+    return f
+
+
+def _fork_nation(n: Nation) -> Nation:
+    f = _copy(n)
+    f.opinions = dict(n.opinions)
+    f.ae = dict(n.ae)
+    f.truces = dict(n.truces)
+    f.allies = set(n.allies)
+    f.claims = set(n.claims)
+    f.rivals = set(n.rivals)
+    return f
+
+
+def _fork_army(a: Army) -> Army:
+    f = _copy(a)
+    f.route = list(a.route)
+    return f
+
+
+def _fork_war(w: War) -> War:
+    f = _copy(w)
+    f.attackers = list(w.attackers)
+    f.defenders = list(w.defenders)
+    return f
@@ -0,0 +1,249 @@
+"""Army pathfinding: static map topology, passability bitmaps and A*.
+
+The map graph never changes after worldgen, so its sorted adjacency is
+frozen once into a Topology, along with lazily filled province-to-province
+distance and hop-count tables. Who may walk where changes with wars,
+alliances, vassalage and ownership; each nation's passable provinces
+are kept as a bitmap rebuilt at most once per month, or sooner when
+Game.passage_epoch moves.
+
+find_path returns exactly the route the old breadth-first search did:
+among all shortest paths, the lexicographically smallest by province id.
+"""
+from __future__ import annotations
+
+import heapq
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from . import data
+from .model import Game
+from .spatial import SpatialIndex, d2
+
+
+TABLE_BYTES = 16 << 20     # memory bound per RowTable
+UNREACHABLE = 0xFFFF       # hop count to a province with no land route
+
+
+class RowTable:
+    """An N x N table of `array` rows, one per source province.
+
+    Rows are made on first use and the least recently fetched dropped
+    once the table would pass TABLE_BYTES, so huge maps stay bounded; at
+    the standard map size every row fits (`complete`).
+    """
+    typecode = "d"
+
+    def __init__(self, size: int):
+        self.size = size
+        per_row = max(1, size * array(self.typecode).itemsize)
+        self.max_rows = max(16, TABLE_BYTES // per_row)
+        self.complete = self.max_rows >= size
+        self._rows: OrderedDict[int, array] = OrderedDict()
+
+    def row(self, a: int) -> array:
+        r = self._rows.get(a)
+        if r is None:
+            r = self._rows[a] = self.build_row(a)
+            if len(self._rows) > self.max_rows:
+                self._rows.popitem(last=False)
+        else:
+            self._rows.move_to_end(a)
+        return r
+
+    def __call__(self, a: int, b: int):
+        return self.row(a)[b]
+
+    def build_row(self, a: int) -> array:
+        raise NotImplementedError
+
+
+class DistanceTable(RowTable):
+    """Center-to-center map distance (rows weighted double).
+
+    Entries are filled on first lookup: an army weighing a handful of
+    targets should not pay for a row across the whole map.
+    """
+    typecode = "d"
+
+    def __init__(self, centers: tuple[tuple[int, int], ...]):
+        super().__init__(len(centers))
+        self.centers = centers
+
+    def build_row(self, a: int) -> array:
+        return array("d", [-1.0]) * self.size
+
+    def __call__(self, a: int, b: int) -> float:
+        row = self._rows.get(a)
+        if row is None:
+            row = self.row(a)
+        d = row[b]
+        if d < 0:
+            d = row[b] = d2(self.centers[a], self.centers[b]) ** 0.5
+        return d
+
+
+class HopTable(RowTable):
+    """Fewest province steps between two provinces, ignoring who owns
+    what; UNREACHABLE where no land or strait route exists."""
+    typecode = "H"
+
+    def __init__(self, adj: tuple[tuple[int, ...], ...]):
+        super().__init__(len(adj))
+        self.adj = adj
+
+    def build_row(self, a: int) -> array:
+        row = array("H", [UNREACHABLE]) * self.size
+        row[a] = 0
+        frontier, d = [a], 0
+        while frontier:
+            d += 1
+            nxt = []
+            for v in frontier:
+                for u in self.adj[v]:
+                    if row[u] == UNREACHABLE:
+                        row[u] = d
+                        nxt.append(u)
+            frontier = nxt
+        return row
+
+
+@dataclass(frozen=True)
+class Topology:
+    adj: tuple[tuple[int, ...], ...]      # pid -> sorted neighbour ids
+    centers: tuple[tuple[int, int], ...]  # pid -> map center
+    max_step: float                       # longest center_dist of any edge
+    spatial: SpatialIndex = field(compare=False)   # nearest-center queries
+    dist: DistanceTable = field(compare=False)     # dist(a, b) == center_dist
+    hops: HopTable = field(compare=False)          # graph steps, all land
+
+
+def build_topology(g: Game) -> Topology:
+    """Freeze the province graph; call once the map is final."""
+    size = max(g.provinces) + 1 if g.provinces else 0
+    adj: list[tuple[int, ...]] = [()] * size
+    centers: list[tuple[int, int]] = [(0, 0)] * size
+    for pid, p in g.provinces.items():
+        adj[pid] = tuple(sorted(p.neighbors))
+        centers[pid] = p.center
+    step = 0.0
+    for a, nbs in enumerate(adj):
+        for b in nbs:
+            step = max(step, d2(centers[a], centers[b]) ** 0.5)
+    spatial = SpatialIndex({pid: p.center for pid, p in g.provinces.items()})
+    adj_t, centers_t = tuple(adj), tuple(centers)
+    return Topology(adj_t, centers_t, step or 1.0, spatial,
+                    DistanceTable(centers_t), HopTable(adj_t))
+
+
+def topology(g: Game) -> Topology:
+    if g.topology is None:
+        g.topology = build_topology(g)
+    return g.topology
+
+
+def center_dist(g: Game, a: int, b: int) -> float:
+    """Straight-line distance between two province centers."""
+    return topology(g).dist(a, b)
+
+
+def hop_count(g: Game, a: int, b: int) -> int:
+    """Province steps from a to b on the full map graph (UNREACHABLE if
+    none); a lower bound on any army route between them."""
+    return topology(g).hops(a, b)
+
+
+# ------------------------------------------------------------ passability
+
+def _passable_owners(g: Game, tag: str) -> set[str]:
+    """Owners whose land `tag` may enter; mirrors engine.can_pass."""
+    n = g.nations[tag]
+    ok = {tag, data.REBEL_TAG} | n.allies
+    if n.overlord:
+        ok.add(n.overlord)
+    ok.update(t for t, o in g.nations.items() if o.overlord == tag)
+    for w in g.wars_of(tag):       # enemies and co-belligerents alike
+        ok.update(w.attackers)
+        ok.update(w.defenders)
+    return ok
+
+
+def passable(g: Game, tag: str) -> bytes:
+    """pid -> 1 if armies of `tag` may pass through, else 0."""
+    key = (g.abs_month, g.passage_epoch)
+    if g._passable_key != key:
+        g._passable.clear()
+        g._passable_key = key
+    bits = g._passable.get(tag)
+    if bits is None:
+        size = len(topology(g).adj)
+        if tag == data.REBEL_TAG:      # hostile to all, so free to go anywhere
+            bits = bytes([1]) * size
+        else:
+            ok = _passable_owners(g, tag)
+            row = bytearray(size)
+            for pid, p in g.provinces.items():
+                if p.owner in ok:
+                    row[pid] = 1
+            bits = bytes(row)
+        g._passable[tag] = bits
+    return bits
+
+
+# ------------------------------------------------------------------ search
+
+def find_path(g: Game, tag: str, start: int, goal: int) -> list[int] | None:
+    """Shortest path [start..goal] through land `tag` may pass, or None.
+
+    A* runs backwards from the goal and settles every province with
+    f <= the path length. The heuristic is the all-land hop count to the
+    start (no route through passable land is shorter) when the hop table
+    fits in memory whole, else the center metric scaled by the longest
+    edge; neither overestimates hops. Those labels are
+    exact distances-to-goal, so walking forward from the start and always
+    taking the lowest-id neighbour one hop closer gives the same path a
+    breadth-first search over sorted neighbours would.
+    """
+    if start == goal:
+        return [start]
+    topo = topology(g)
+    adj, centers, ok = topo.adj, topo.centers, passable(g, tag)
+    h = topo.hops.row(start) if topo.hops.complete else None
+    if h is not None and h[goal] == UNREACHABLE:
+        return None
+    origin, scale = centers[start], 1.0 / topo.max_step
+    dist = {goal: 0}
+    done: set[int] = set()
+    heap = [(h[goal] if h is not None
+             else d2(centers[goal], origin) ** 0.5 * scale, goal)]
+    hops = -1
+    while heap:
+        f, v = heapq.heappop(heap)
+        if hops >= 0 and f > hops + 1e-9:
+            break
+        if v in done:
+            continue
+        done.add(v)
+        if v == start:
+            hops = dist[v]
+            continue             # paths never pass back through the start
+        d = dist[v] + 1
+        for u in adj[v]:
+            if u != start and not ok[u]:
+                continue
+            if d < dist.get(u, d + 1):
+                dist[u] = d
+                if h is not None:
+                    heapq.heappush(heap, (d + h[u], u))
+                else:
+                    heapq.heappush(heap, (d + d2(centers[u], origin) ** 0.5
+                                          * scale, u))
+    if hops < 0:
+        return None
+    path = [start]
+    cur = start
+    for left in range(hops - 1, -1, -1):
+        cur = next(u for u in adj[cur] if u in done and dist[u] == left)
+        path.append(cur)
+    return path
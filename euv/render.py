@@ -6,6 +6,7 @@ import textwrap
 
 from . import data
 from .model import Game
+from .viewmodel import ViewModel
 
 MAP_W, MAP_H = 60, 22
 SIDEBAR_MIN = 36
@@ -184,198 +185,322 @@ def rel_to_player(g: Game, tag: str) -> int:
     return 4
 
 
+def _diplo_attr(g: Game, pal: Palette, tag: str) -> int:
+    me = g.player
+    n = g.nations[me] if me in g.nations else None
+    if tag == me:
+        return pal.ui(5) | curses.A_REVERSE
+    if n and tag in n.allies:
+        return pal.ui(4) | curses.A_REVERSE
+    if n and g.at_war_with(me, tag):
+        return pal.ui(7)
+    if n and g.truce_between(me, tag):
+        return pal.ui(3) | curses.A_REVERSE
+    return pal.ui(1)
+
+
+def province_attrs(g: Game, pal: Palette, mode: int, p, memo: dict):
+    """Attributes of p's cells in map `mode`, as (even, odd) by x + y:
+    they differ only where an occupier's stripes show. `memo` keeps
+    per-nation values for one frame."""
+    def of(tag):
+        a = memo.get(tag)
+        if a is None:
+            if mode == 1:
+                a = pal.nation_bg(g.nations[tag].color)
+            elif mode == 4:
+                a = _diplo_attr(g, pal, tag)
+            else:
+                a = pal.mil(rel_to_player(g, tag))
+            memo[tag] = a
+        return a
+    if mode == 2:       # terrain
+        return (pal.terrain_bg(p.terrain),) * 2
+    if mode == 3:       # development
+        return (pal.dev_bg(p.dev),) * 2
+    if mode == 4:       # diplomatic
+        return (of(p.owner),) * 2
+    # political, or military: muted relationship tints; units pop
+    attr = of(p.owner)
+    return (of(p.occupier) if p.occupier else attr), attr
+
+
 def cell_attr(g: Game, pal: Palette, ui, x: int, y: int):
     """(char, attr) for one map cell."""
     pid = g.grid[y][x]
     if pid < 0:
         return "~", pal.sea() | curses.A_DIM
     p = g.provinces[pid]
-    glyph = data.TERRAIN[p.terrain][1]
-    mode = ui.mapmode
-    if mode == 1:       # political
-        attr = pal.nation_bg(g.nations[p.owner].color)
-        if p.occupier and (x + y) % 2 == 0:
-            attr = pal.nation_bg(g.nations[p.occupier].color)
-    elif mode == 2:     # terrain
-        attr = pal.terrain_bg(p.terrain)
-    elif mode == 3:     # development
-        attr = pal.dev_bg(p.dev)
-    elif mode == 4:     # diplomatic
-        me = g.player
-        n = g.nations[me] if me in g.nations else None
-        owner = p.owner
-        if owner == me:
-            attr = pal.ui(5) | curses.A_REVERSE
-        elif n and owner in n.allies:
-            attr = pal.ui(4) | curses.A_REVERSE
-        elif n and g.at_war_with(me, owner):
-            attr = pal.ui(7)
-        elif n and g.truce_between(me, owner):
-            attr = pal.ui(3) | curses.A_REVERSE
-        else:
-            attr = pal.ui(1)
-    else:               # military: muted relationship tints; units pop
-        attr = pal.mil(rel_to_player(g, p.owner))
-        if p.occupier and (x + y) % 2 == 0:
-            attr = pal.mil(rel_to_player(g, p.occupier))
+    attr = province_attrs(g, pal, ui.mapmode, p, {})[(x + y) % 2]
     if ui.sel_pid == pid:
         attr |= curses.A_BOLD
-    return glyph, attr
-
+    return data.TERRAIN[p.terrain][1], attr
+
+
+class _Layer:
+    """One map mode's cells as (glyph, attr) rows. update() recolors only
+    the provinces whose attributes changed since the last frame: owner,
+    occupier, dev or the player's relations, whatever the mode shows."""
+
+    def __init__(self, g: Game, pal: Palette, mode: int):
+        self.grid = g.grid
+        self.mode = mode
+        self.attrs: dict[int, tuple[int, int]] = {}
+        sea = ("~", pal.sea() | curses.A_DIM)
+        self.rows = [[sea] * g.width for _ in range(g.height)]
+
+    def update(self, g: Game, pal: Palette) -> int:
+        """Bring the layer up to date; returns provinces recolored."""
+        memo: dict = {}
+        changed = 0
+        for pid, p in g.provinces.items():
+            attrs = province_attrs(g, pal, self.mode, p, memo)
+            if self.attrs.get(pid) == attrs:
+                continue
+            self.attrs[pid] = attrs
+            glyph = data.TERRAIN[p.terrain][1]
+            rows = self.rows
+            for x, y in p.cells:
+                rows[y][x] = (glyph, attrs[(x + y) % 2])
+            changed += 1
+        return changed
+
+
+_BORDER = None      # a frame cell that belongs to the window's box
+
+
+class MapView:
+    """The map window as last drawn, so a frame rewrites only the cells
+    that differ: usually just the cursor's old and new place.
+
+    Keeps one cached layer per map mode. Call invalidate() when anything
+    else may have written into the window, e.g. after resizing it.
+    """
 
-def draw_map(win, g: Game, pal: Palette, ui):
-    from . import engine
-    win.erase()
-    win.box()
-    title = {1: "POLITICAL", 2: "TERRAIN", 3: "DEVELOPMENT",
-             4: "DIPLOMATIC", 5: "MILITARY"}[ui.mapmode]
-    safe_addstr(win, 0, 2, f"[ Eryndor - {title} ]", curses.A_BOLD)
-    for y in range(g.height):
-        for x in range(g.width):
-            ch, attr = cell_attr(g, pal, ui, x, y)
-            safe_addstr(win, y + 1, x + 1, ch, attr)
-    sel_army = g.armies.get(ui.sel_aid) if ui.sel_aid is not None else None
-    # province tags at centers
-    for p in g.provinces.values():
-        cx, cy = p.center
-        if ui.mapmode == 1:
-            label = p.owner
-            own = g.nations[p.owner]
-            # vassal tags carry the overlord's colors; cells stay theirs
-            col = (g.nations[own.overlord].color if own.overlord
-                   else own.color)
-            base = pal.nation_bg(col)
-        elif ui.mapmode == 3:
-            label = f"{p.dev:2d}"
-            base = pal.dev_bg(p.dev)
+    def __init__(self):
+        self.layers: dict[int, _Layer] = {}
+        self.win = None
+        self.chrome = None
+        self.drawn: list[list] | None = None
+        self.written = 0            # cells written by the last draw
+
+    def invalidate(self):
+        self.drawn = None
+
+    def layer(self, g: Game, pal: Palette, mode: int) -> _Layer:
+        lay = self.layers.get(mode)
+        if lay is None or lay.grid is not g.grid or \
+                len(lay.rows) != g.height:
+            lay = self.layers[mode] = _Layer(g, pal, mode)
+        lay.update(g, pal)
+        return lay
+
+    def draw(self, win, g: Game, pal: Palette, ui):
+        h, w = win.getmaxyx()
+        frame = self._compose(g, pal, ui, h, w)
+        chrome = (ui.mapmode, ui.mode, h, w)
+        full = (self.drawn is None or win is not self.win
+                or chrome != self.chrome)
+        if not full:
+            for y in range(1, h - 1):
+                if frame[y] == self.drawn[y]:
+                    continue
+                old = self.drawn[y]
+                if any(c is _BORDER and c != old[x]
+                       for x, c in enumerate(frame[y])):
+                    full = True         # an overlay left the box: redo it
+                    break
+        self.written = 0
+        if full:
+            win.erase()
+            win.box()
+            title = {1: "POLITICAL", 2: "TERRAIN", 3: "DEVELOPMENT",
+                     4: "DIPLOMATIC", 5: "MILITARY"}[ui.mapmode]
+            safe_addstr(win, 0, 2, f"[ Eryndor - {title} ]", curses.A_BOLD)
+            if ui.mode == "move":
+                safe_addstr(win, g.height + 1, 2, "[ MOVE: select destination, "
+                            "Enter confirm, Esc cancel ]",
+                            pal.ui(3) | curses.A_BOLD)
+            for y in range(1, h - 1):
+                self._write(win, y, frame[y], None)
         else:
-            label = p.owner
-            _, base = cell_attr(g, pal, ui, cx, cy)
-        attr = base | curses.A_BOLD
-        if ui.mapmode == 5 and p.sieging:
-            # siege progress replaces the tag where it matters most
-            label = f"{min(99, int(p.siege_progress)):2d}%"
-            attr = pal.ui(7) | curses.A_BOLD
-        if (ui.mapmode == 5 and sel_army is not None
-                and sel_army.owner == g.player
-                and sel_army.move_target == p.pid):
-            attr = pal.ui(3) | curses.A_REVERSE | curses.A_BOLD
-        if p.pid == ui.sel_pid:
-            attr = base | curses.A_REVERSE | curses.A_BOLD
-        safe_addstr(win, cy + 1, cx, label, attr)
-        if p.sieging and ui.mapmode != 5:
-            safe_addstr(win, cy + 1, cx + len(label),
-                        "!", pal.ui(7) | curses.A_BOLD)
-    # armies
-    by_prov: dict[int, list] = {}
-    for a in g.armies.values():
-        by_prov.setdefault(a.location, []).append(a)
-    for pid, armies in by_prov.items():
-        p = g.provinces[pid]
-        cx, cy = p.center
-        owners = {a.owner for a in armies}
-        total = sum(a.regiments for a in armies)
-        if ui.mapmode == 5:
-            if len(owners) > 1:
-                # a battle: show the odds of the two biggest sides
-                by_owner: dict[str, int] = {}
-                for a in armies:
-                    by_owner[a.owner] = by_owner.get(a.owner, 0) \
-                        + a.regiments
-                top = sorted(by_owner.values(), reverse=True)
-                marker = f"{min(top[0], 99)}v{min(top[1], 99)}"
-                attr = pal.chip(2) | curses.A_BOLD
+            for y in range(1, h - 1):
+                if frame[y] != self.drawn[y]:
+                    self._write(win, y, frame[y], self.drawn[y])
+        self.win, self.chrome, self.drawn = win, chrome, frame
+
+    def _write(self, win, y: int, row: list, old: list | None):
+        """Write the cells of row that differ from old, a run of equal
+        attributes per call."""
+        x, w = 0, len(row)
+        while x < w:
+            cell = row[x]
+            if cell is _BORDER or (old is not None and old[x] == cell):
+                x += 1
+                continue
+            attr = cell[1]
+            end = x + 1
+            while (end < w and row[end] is not _BORDER
+                   and row[end][1] == attr
+                   and (old is None or old[end] != row[end])):
+                end += 1
+            safe_addstr(win, y, x, "".join(c[0] for c in row[x:end]), attr)
+            self.written += end - x
+            x = end
+
+    def _compose(self, g: Game, pal: Palette, ui, h: int, w: int):
+        """The window as it should look: rows of (char, attr), with
+        _BORDER where the box shows through."""
+        from . import engine
+        lay = self.layer(g, pal, ui.mapmode)
+        edge = [_BORDER] * max(0, w - g.width - 1)
+        frame = [[_BORDER] * w]
+        frame += [([_BORDER] + row + edge)[:w] for row in lay.rows]
+        frame += [[_BORDER] * w for _ in range(h - len(frame))]
+        frame = frame[:h]
+
+        def put(y, x, s, attr):         # as safe_addstr clips
+            if y < 0 or y >= h or x >= w:
+                return
+            if x < 0:
+                s = s[-x:]
+                x = 0
+            row = frame[y]
+            for i, ch in enumerate(s[:w - x]):
+                row[x + i] = (ch, attr)
+
+        if ui.sel_pid in g.provinces:
+            for x, y in g.provinces[ui.sel_pid].cells:
+                ch, attr = frame[y + 1][x + 1]
+                frame[y + 1][x + 1] = (ch, attr | curses.A_BOLD)
+        sel_army = g.armies.get(ui.sel_aid) if ui.sel_aid is not None \
+            else None
+        # province tags at centers
+        for p in g.provinces.values():
+            cx, cy = p.center
+            if ui.mapmode == 1:
+                label = p.owner
+                own = g.nations[p.owner]
+                # vassal tags carry the overlord's colors; cells stay theirs
+                col = (g.nations[own.overlord].color if own.overlord
+                       else own.color)
+                base = pal.nation_bg(col)
+            elif ui.mapmode == 3:
+                label = f"{p.dev:2d}"
+                base = pal.dev_bg(p.dev)
+            else:
+                label = p.owner
+                base = lay.rows[cy][cx][1]
+                if g.grid[cy][cx] == ui.sel_pid:
+                    base |= curses.A_BOLD
+            attr = base | curses.A_BOLD
+            if ui.mapmode == 5 and p.sieging:
+                # siege progress replaces the tag where it matters most
+                label = f"{min(99, int(p.siege_progress)):2d}%"
+                attr = pal.ui(7) | curses.A_BOLD
+            if (ui.mapmode == 5 and sel_army is not None
+                    and sel_army.owner == g.player
+                    and sel_army.move_target == p.pid):
+                attr = pal.ui(3) | curses.A_REVERSE | curses.A_BOLD
+            if p.pid == ui.sel_pid:
+                attr = base | curses.A_REVERSE | curses.A_BOLD
+            put(cy + 1, cx, label, attr)
+            if p.sieging and ui.mapmode != 5:
+                put(cy + 1, cx + len(label), "!", pal.ui(7) | curses.A_BOLD)
+        # armies
+        for pid, armies in g.army_index.by_location().items():
+            p = g.provinces[pid]
+            cx, cy = p.center
+            owners = {a.owner for a in armies}
+            total = sum(a.regiments for a in armies)
+            if ui.mapmode == 5:
+                if len(owners) > 1:
+                    # a battle: show the odds of the two biggest sides
+                    by_owner: dict[str, int] = {}
+                    for a in armies:
+                        by_owner[a.owner] = by_owner.get(a.owner, 0) \
+                            + a.regiments
+                    top = sorted(by_owner.values(), reverse=True)
+                    marker = f"{min(top[0], 99)}v{min(top[1], 99)}"
+                    attr = pal.chip(2) | curses.A_BOLD
+                else:
+                    o = next(iter(owners))
+                    lead = max(armies, key=lambda a: a.men)
+                    cap = engine.morale_max(g, o)
+                    frac = lead.morale / cap if cap else 1.0
+                    glyph = "*" if frac >= 0.66 else \
+                        ("o" if frac >= 0.33 else "x")
+                    marker = f"{glyph}{min(total, 99)}"
+                    attr = pal.chip(rel_to_player(g, o)) | curses.A_BOLD
+            elif len(owners) > 1:
+                marker = f"*{min(total, 99)}"
+                attr = pal.ui(7) | curses.A_BOLD
             else:
                 o = next(iter(owners))
-                lead = max(armies, key=lambda a: a.men)
-                cap = engine.morale_max(g, o)
-                frac = lead.morale / cap if cap else 1.0
-                glyph = "*" if frac >= 0.66 else \
-                    ("o" if frac >= 0.33 else "x")
-                marker = f"{glyph}{min(total, 99)}"
-                attr = pal.chip(rel_to_player(g, o)) | curses.A_BOLD
-        elif len(owners) > 1:
-            marker = f"*{min(total, 99)}"
-            attr = pal.ui(7) | curses.A_BOLD
-        else:
-            o = next(iter(owners))
-            marker = f"*{min(total, 99)}"
-            attr = pal.nation_fg(g.nations[o].color)
-            if o == g.player:
-                attr |= curses.A_UNDERLINE
-        # find a spot just below or above the tag, inside the province
-        spot = None
-        for dy in (1, -1, 2):
-            cand = [(cx + dx, cy + dy) for dx in (-1, 0)]
-            if all(0 <= xx < g.width and 0 <= yy < g.height
-                   and g.grid[yy][xx] == pid for xx, yy in cand):
-                spot = cand[0]
-                break
-        if spot is None:
-            spot = (cx - 3, cy)
-        sel = sel_army is not None and sel_army.location == pid
-        if sel:
-            attr |= curses.A_REVERSE
-        safe_addstr(win, spot[1] + 1, spot[0] + 1, marker, attr)
-    # cursor: invert whatever is rendered beneath it
-    cx, cy = ui.cursor
-    try:
-        under = win.inch(cy + 1, cx + 1)
-        ch = chr(under & 0xFF)
-        attr = under & ~0xFF
-        win.addstr(cy + 1, cx + 1, ch, attr ^ curses.A_REVERSE)
-    except (curses.error, ValueError):
-        pass
-    if ui.mode == "move":
-        safe_addstr(win, g.height + 1, 2,
-                    "[ MOVE: select destination, Enter confirm, Esc cancel ]",
-                    pal.ui(3) | curses.A_BOLD)
+                marker = f"*{min(total, 99)}"
+                attr = pal.nation_fg(g.nations[o].color)
+                if o == g.player:
+                    attr |= curses.A_UNDERLINE
+            # find a spot just below or above the tag, inside the province
+            spot = None
+            for dy in (1, -1, 2):
+                cand = [(cx + dx, cy + dy) for dx in (-1, 0)]
+                if all(0 <= xx < g.width and 0 <= yy < g.height
+                       and g.grid[yy][xx] == pid for xx, yy in cand):
+                    spot = cand[0]
+                    break
+            if spot is None:
+                spot = (cx - 3, cy)
+            sel = sel_army is not None and sel_army.location == pid
+            if sel:
+                attr |= curses.A_REVERSE
+            put(spot[1] + 1, spot[0] + 1, marker, attr)
+        # cursor: invert whatever is rendered beneath it
+        cx, cy = ui.cursor
+        if 0 < cy + 1 < h and 0 < cx + 1 < w and \
+                frame[cy + 1][cx + 1] is not _BORDER:
+            ch, attr = frame[cy + 1][cx + 1]
+            frame[cy + 1][cx + 1] = (ch, attr ^ curses.A_REVERSE)
+        return frame
+
+
+def draw_map(win, g: Game, pal: Palette, ui, view: MapView | None = None):
+    """Draw the map into win; with a view kept between frames, only the
+    cells that changed since its last draw are written."""
+    (view or MapView()).draw(win, g, pal, ui)
 
 
 # ----------------------------------------------------------------- top bar
 
-def draw_topbar(scr, g: Game, pal: Palette):
+def draw_topbar(scr, vm: ViewModel, pal: Palette):
     _, w = scr.getmaxyx()
-    n = g.nations[g.player]
-    income, expense, net = _balance(g)
     safe_addstr(scr, 0, 0, " " * w, pal.ui(1))
-    fl = sum(a.regiments for a in g.armies_of(g.player))
-    flmax = g.force_limit(g.player)
     parts = [
-        f" {n.name}",
-        f"{g.date_str}",
-        f"Gold {n.gold:,.0f} ({net:+.1f})",
-        f"MP {n.manpower:,.0f}",
-        f"Stab {n.stability:+d}",
-        f"Pres {n.prestige:.0f}",
-        f"Army {fl}/{flmax}",
+        f" {vm.name}",
+        f"{vm.date}",
+        f"Gold {vm.gold:,.0f} ({vm.net:+.1f})",
+        f"MP {vm.manpower:,.0f}",
+        f"Stab {vm.stability:+d}",
+        f"Pres {vm.prestige:.0f}",
+        f"Army {vm.regiments}/{vm.force_limit}",
     ]
     text = " | ".join(parts)
-    wars = g.wars_of(g.player)
-    if wars:
-        war_txt = f"  AT WAR ({len(wars)}) "
+    if vm.wars:
+        war_txt = f"  AT WAR ({len(vm.wars)}) "
         text = text[:w - 1 - len(war_txt) - 6]
         safe_addstr(scr, 0, 0, text, pal.ui(1) | curses.A_BOLD)
         safe_addstr(scr, 0, len(text), war_txt, pal.ui(7) | curses.A_BOLD)
     else:
         safe_addstr(scr, 0, 0, text[:w - 1], pal.ui(1) | curses.A_BOLD)
-    max_ae = max((o.ae.get(g.player, 0) for o in g.nations.values()
-                  if o.alive and o.tag != g.player), default=0)
-    if max_ae > data.COALITION_AE_THRESHOLD * 0.7:
+    if vm.ae_warning:
         warn = " AE! "
         safe_addstr(scr, 0, w - len(warn) - 1, warn,
                     pal.ui(7) | curses.A_BOLD)
 
 
-def _balance(g: Game):
-    from . import engine
-    return engine.monthly_balance(g, g.player)
-
-
 # ----------------------------------------------------------------- sidebar
 
-def draw_sidebar(win, g: Game, pal: Palette, ui):
-    from . import engine
+def draw_sidebar(win, vm: ViewModel, pal: Palette):
     win.erase()
     win.box()
     h, w = win.getmaxyx()
@@ -388,184 +513,137 @@ def draw_sidebar(win, g: Game, pal: Palette, ui):
         safe_addstr(win, row[0], indent, text[:iw], attr)
         row[0] += 1
 
-    me = g.nations[g.player]
     # --- wars
-    wars = g.wars_of(g.player)
-    if wars:
-        for war in wars[:3]:
-            sc = war.score_for(g.player)
+    if vm.wars:
+        for war in vm.wars[:3]:
+            sc = war.score
             col = pal.ui(5) if sc >= 0 else pal.ui(2)
             put(f"{war.name}"[:iw], pal.ui(2) | curses.A_BOLD)
             barw = max(10, iw - 14)
             filled = int((sc + 100) / 200 * barw)
             bar = "#" * filled + "-" * (barw - filled)
             put(f" {bar} {sc:+.0f}%", col)
-            vs = ", ".join(g.nations[t].name
-                           for t in war.enemies_of(g.player))
-            put(f" vs {vs}", curses.A_DIM)
+            put(f" vs {war.enemies}", curses.A_DIM)
             if sc <= data.LOSING_BADLY:
                 put(" The realm tires of this war!", pal.ui(7))
-            if abs(war.score) >= data.CAPITULATION_SCORE:
-                left = max(1, data.CAPITULATION_MONTHS - war.dom_months)
+            if war.capitulation_in is not None:
                 label = ("Enemy capitulates" if sc > 0
                          else "CAPITULATION")
-                put(f" {label} in {left} month(s)!",
+                put(f" {label} in {war.capitulation_in} month(s)!",
                     pal.ui(7) | curses.A_BOLD)
         put()
-    if me.allies:
-        put("Allies: " + ", ".join(sorted(
-            g.nations[t].name for t in me.allies)), pal.ui(4))
-    vassals = g.vassals_of(g.player)
-    if vassals:
-        put("Vassals: " + ", ".join(
-            g.nations[t].name for t in vassals), pal.ui(4))
-    if me.overlord:
-        put(f"Vassal of {g.nations[me.overlord].name}", pal.ui(3))
-    if me.annexing:
-        vt, left = me.annexing
-        put(f"Integrating {g.nations[vt].name} ({left}m)", pal.ui(6))
-    if me.rivals:
-        put("Rivals: " + ", ".join(sorted(
-            g.nations[t].name for t in me.rivals)), pal.ui(2))
-    if me.fabricating:
-        pid, left = me.fabricating
-        put(f"Fabricating claim: {g.provinces[pid].name} ({left}m)",
-            pal.ui(6))
-    if me.war_exhaustion >= 3:
-        put(f"War exhaustion: {me.war_exhaustion:.1f}", pal.ui(3))
-    hot = [p for p in g.provinces_of(g.player)
-           if p.unrest >= data.UNREST_WARN_AT]
-    if hot:
-        put(f"UNREST: {len(hot)} province(s) at revolt risk!", pal.ui(7))
-    coalition = [o.name for o in g.nations.values()
-                 if o.alive and o.in_coalition_against == g.player]
-    if coalition:
-        put("COALITION: " + ", ".join(coalition), pal.ui(7))
-    if g.missions:
+    if vm.allies:
+        put("Allies: " + ", ".join(vm.allies), pal.ui(4))
+    if vm.vassals:
+        put("Vassals: " + ", ".join(vm.vassals), pal.ui(4))
+    if vm.overlord:
+        put(f"Vassal of {vm.overlord}", pal.ui(3))
+    if vm.annexing:
+        vassal, left = vm.annexing
+        put(f"Integrating {vassal} ({left}m)", pal.ui(6))
+    if vm.rivals:
+        put("Rivals: " + ", ".join(vm.rivals), pal.ui(2))
+    if vm.fabricating:
+        where, left = vm.fabricating
+        put(f"Fabricating claim: {where} ({left}m)", pal.ui(6))
+    if vm.war_exhaustion >= 3:
+        put(f"War exhaustion: {vm.war_exhaustion:.1f}", pal.ui(3))
+    if vm.unrest_provinces:
+        put(f"UNREST: {vm.unrest_provinces} province(s) at revolt risk!",
+            pal.ui(7))
+    if vm.coalition:
+        put("COALITION: " + ", ".join(vm.coalition), pal.ui(7))
+    if vm.missions:
         put("Missions:", curses.A_BOLD)
-        for m in g.missions:
-            put(f" - {m['desc']}", pal.ui(6))
+        for desc in vm.missions:
+            put(f" - {desc}", pal.ui(6))
     put("-" * iw, curses.A_DIM)
 
     # --- selected army
-    if ui.sel_aid is not None and ui.sel_aid in g.armies:
-        a = g.armies[ui.sel_aid]
-        put(f"{a.name}", pal.nation_fg(g.nations[a.owner].color))
+    a = vm.army
+    if a is not None:
+        put(f"{a.name}", pal.nation_fg(a.color))
         put(f" {a.regiments} regiments, {a.men:,} men")
-        put(f" Morale {a.morale:.1f}/{engine.morale_max(g, a.owner):.1f}"
-            f"  at {g.provinces[a.location].name}")
+        put(f" Morale {a.morale:.1f}/{a.morale_max:.1f}  at {a.location}")
         if a.general:
             put(f" {a.general_name} (skill {a.general})", pal.ui(5))
-        if a.move_target is not None:
-            put(f" Moving to {g.provinces[a.move_target].name}", pal.ui(3))
+        if a.moving_to is not None:
+            put(f" Moving to {a.moving_to}", pal.ui(3))
         put(f" Reinforce: {'on' if a.reinforce else 'OFF'}   Supply here: "
-            f"{engine.supply_limit(g, a.owner, a.location)}")
-        att = engine.attrition_fraction(g, a)
-        if att > 0:
-            put(f" Taking attrition! (-{att * 100:.1f}%/month)",
+            f"{a.supply}")
+        if a.attrition > 0:
+            put(f" Taking attrition! (-{a.attrition * 100:.1f}%/month)",
                 pal.ui(2) | curses.A_BOLD)
         put(" [m]ove [x]split [X]disband", curses.A_DIM)
         put(" [G]eneral [i]reinforce on/off", curses.A_DIM)
         put("-" * iw, curses.A_DIM)
 
     # --- selected province
-    if ui.sel_pid is not None and ui.sel_pid in g.provinces:
-        p = g.provinces[ui.sel_pid]
-        own = g.nations[p.owner]
-        put(f"{p.name}  ({data.TERRAIN[p.terrain][0]})", curses.A_BOLD)
-        put(f" {own.name}", pal.nation_fg(own.color))
-        if p.pid == own.capital:
+    p = vm.province
+    if p is not None:
+        put(f"{p.name}  ({p.terrain})", curses.A_BOLD)
+        put(f" {p.owner}", pal.nation_fg(p.owner_color))
+        if p.capital:
             put("  * Capital *", pal.ui(3))
-        put(f" Dev {p.dev}   Fort {p.fort_level}   "
-            f"Tax {p.tax_income():.2f}/m")
-        put(f" Supply limit: {engine.supply_limit(g, g.player, p.pid)}")
+        put(f" Dev {p.dev}   Fort {p.fort_level}   Tax {p.tax:.2f}/m")
+        put(f" Supply limit: {p.supply}")
         if p.unrest >= data.UNREST_WARN_AT:
             put(f" Unrest {p.unrest:.1f}  REVOLT RISK!",
                 pal.ui(7) | curses.A_BOLD)
         else:
             put(f" Unrest {p.unrest:.1f}",
                 pal.ui(3) if p.unrest >= 3 else curses.A_DIM)
-        if p.cores != {p.owner}:
-            names = ", ".join(g.nations[t].name for t in sorted(p.cores)
-                              if t in g.nations) or "none"
-            warn = "" if p.owner in p.cores else "  (non-core tax!)"
-            put(f" Core of: {names}{warn}",
-                pal.ui(3) if p.owner not in p.cores else curses.A_DIM)
+        if p.cores is not None:
+            warn = "" if p.owner_cored else "  (non-core tax!)"
+            put(f" Core of: {p.cores}{warn}",
+                pal.ui(3) if not p.owner_cored else curses.A_DIM)
         if p.buildings:
-            put(" Buildings: " + ", ".join(
-                data.BUILDINGS[b][0] for b in p.buildings))
+            put(" Buildings: " + ", ".join(p.buildings))
         else:
             put(" Buildings: none", curses.A_DIM)
         if p.occupier:
-            put(f" OCCUPIED by {g.nations[p.occupier].name}", pal.ui(7))
+            put(f" OCCUPIED by {p.occupier}", pal.ui(7))
         if p.sieging:
-            put(f" Siege by {g.nations[p.sieging].name}: "
-                f"{p.siege_progress:.0f}%", pal.ui(2))
-        if p.pid in me.claims:
+            put(f" Siege by {p.sieging}: {p.siege_progress:.0f}%",
+                pal.ui(2))
+        if p.claimed:
             put(" You have a claim here", pal.ui(5))
-        here = [a for a in g.armies.values() if a.location == p.pid]
-        for a in here[:4]:
-            put(f"  *{a.regiments} {g.nations[a.owner].name} "
-                f"({a.men:,})", pal.nation_fg(g.nations[a.owner].color))
-        if p.owner == g.player:
-            put(f" [d]ev +1 ({p.dev_cost()}g) [b]uild [r]ecruit",
+        for chip in p.armies:
+            put(f"  *{chip.regiments} {chip.owner} ({chip.men:,})",
+                pal.nation_fg(chip.color))
+        if p.mine:
+            put(f" [d]ev +1 ({p.dev_cost}g) [b]uild [r]ecruit",
                 curses.A_DIM)
         else:
             put(" [c]laim [D]iplomacy", curses.A_DIM)
         put("-" * iw, curses.A_DIM)
 
     # --- owner relations snapshot
-    if ui.sel_pid is not None and ui.sel_pid in g.provinces:
-        p = g.provinces[ui.sel_pid]
-        if p.owner != g.player:
-            o = g.nations[p.owner]
-            put(f"{o.name}: {o.ruler}", curses.A_BOLD)
-            put(f" Opinion of you: {o.opinion_of(g.player):+.0f}   "
-                f"AE: {o.ae.get(g.player, 0):.0f}")
-            put(f" Dev {g.total_dev(o.tag)}  "
-                f"Troops ~{sum(a.regiments for a in g.armies_of(o.tag))}r")
-            if o.overlord:
-                put(f" Vassal of {g.nations[o.overlord].name}", pal.ui(4))
-            ovas = g.vassals_of(o.tag)
-            if ovas:
-                put(" Vassals: " + ", ".join(
-                    g.nations[t].name for t in ovas), pal.ui(4))
-            rel = []
-            if o.overlord == g.player:
-                rel.append("YOUR VASSAL")
-            if me.overlord == o.tag:
-                rel.append("YOUR OVERLORD")
-            if o.tag in me.allies:
-                rel.append("ALLY")
-            if o.tag in me.rivals or g.player in o.rivals:
-                rel.append("RIVAL")
-            if g.at_war_with(g.player, o.tag):
-                rel.append("AT WAR")
-            if g.truce_between(g.player, o.tag):
-                until = me.truces.get(o.tag, 0)
-                rel.append(f"truce {(until - g.abs_month) // 12 + 1}y")
-            if o.in_coalition_against == g.player:
-                rel.append("IN COALITION VS YOU")
-            if rel:
-                put(" " + "  ".join(rel), pal.ui(3))
+    o = vm.owner
+    if o is not None:
+        put(f"{o.name}: {o.ruler}", curses.A_BOLD)
+        put(f" Opinion of you: {o.opinion:+.0f}   AE: {o.ae:.0f}")
+        put(f" Dev {o.dev}  Troops ~{o.regiments}r")
+        if o.overlord:
+            put(f" Vassal of {o.overlord}", pal.ui(4))
+        if o.vassals:
+            put(" Vassals: " + ", ".join(o.vassals), pal.ui(4))
+        if o.relations:
+            put(" " + "  ".join(o.relations), pal.ui(3))
+    if p is not None:
         put("-" * iw, curses.A_DIM)
 
     # --- great powers, pinned to the bottom of the panel
-    from . import engine as _e
-    rows_gp = sorted((t for t, n in g.nations.items()
-                      if n.alive and t != data.REBEL_TAG),
-                     key=lambda t: -_e.score(g, t))
-    block = min(6, len(rows_gp)) + 1
+    block = len(vm.great_powers) + 1
     start = h - 1 - block
     if start > row[0]:
         row[0] = start
         put("Great Powers:", curses.A_BOLD)
-        for i, t in enumerate(rows_gp[:6]):
-            n = g.nations[t]
-            attr = pal.nation_fg(n.color)
-            if t == g.player:
+        for i, (name, color, score, mine) in enumerate(vm.great_powers):
+            attr = pal.nation_fg(color)
+            if mine:
                 attr |= curses.A_REVERSE
-            put(f" {i + 1}. {n.name:12} {_e.score(g, t):5.0f}", attr)
+            put(f" {i + 1}. {name:12} {score:5.0f}", attr)
 
 
 # ---------------------------------------------------------------- log bars
@@ -581,13 +659,23 @@ def draw_log(scr, g: Game, pal: Palette, top: int, lines: int):
             safe_addstr(scr, y, 0, f" {msg}", pal.log_attr(cat))
 
 
+KEYS = ("[Spc]turn [>]year [Tab]army [m]ove [r]ecruit [b]uild [d]ev "
+        "[c]laim [D]iplo [+]stab [o]ledger [g]log [1-5]map")
+# always shown: a narrow bar drops keys from the end of KEYS instead
+FILE_KEYS = "[?]help [S]ave [W]slot [L]oad [q]uit"
+
+
 def draw_keybar(scr, pal: Palette, ui, status: str = ""):
     h, w = scr.getmaxyx()
-    keys = ("[Spc]turn [>]year [Tab]army [m]ove [r]ecruit [b]uild [d]ev "
-            "[c]laim [D]iplo [+]stab [o]ledger [g]log [1-5]map [?]help "
-            "[S]ave [q]uit")
     safe_addstr(scr, h - 1, 0, " " * (w - 1), pal.ui(1))
-    text = status if status else keys
+    if status:
+        text = status
+    else:
+        keys = KEYS
+        room = max(w - 3 - len(FILE_KEYS), 0)
+        if len(keys) > room:
+            keys = keys[:max(keys.rfind(" ", 0, room + 1), 0)]
+        text = f"{keys} {FILE_KEYS}".lstrip()
     safe_addstr(scr, h - 1, 0, " " + text[:w - 2], pal.ui(1))
 
 
@@ -841,7 +929,7 @@ MAP   Arrows/hjkl move cursor - Enter selects province
       Tags show owners; *N markers are armies; ! means siege.
 
 TURNS Space ends the turn (1 month). > plays up to 12 months,
-      stopping at anything important.
+      stopping at anything important; Esc stops it sooner.
 
 ECONOMY  [d] develop province (+1 dev)   [b] build building
       [+] raise stability   Buildings: farm/market boost income,
@@ -894,7 +982,8 @@ UNREST  Negative stability and war exhaustion raise province
       rule a province decays. Defeat the stack, then besiege to
       retake your land.
 
-OTHER [o] ledger  [g] chronicle  [S] save  [L] load  [q] quit
+OTHER [o] ledger  [g] chronicle  [S] quick save  [W] save to slot
+      [L] load  [q] quit
 """
 
 
@@ -0,0 +1,161 @@
+"""Record a game as its seed plus the player's commands, and replay it.
+
+    python3 -m euv --record game.euvr          # play, recording
+    python3 -m euv replay game.euvr            # rebuild it headlessly
+
+The engine is deterministic in the seed, so the player's engine calls and
+the month each was made on are the whole game. A recording is JSON lines:
+a header, then ["cmd", month, name, args, kwargs] entries and, every
+January, ["check", month, state_hash] of the state so far, gzipped (plain
+text reads too, for hand-edited bug reports). Replay runs the months
+all-AI between commands and stops at the first checksum that differs.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+
+from . import ai, data, engine, statehash, worldgen
+from .model import Game, War
+
+FORMAT = 2
+
+# the engine calls a player makes; anything else is refused on replay
+COMMANDS = frozenset({
+    "choose_nation", "develop", "build", "recruit", "fabricate_claim",
+    "raise_stability", "move_army", "split_army", "disband_army",
+    "hire_general", "toggle_reinforce", "improve_relations",
+    "offer_alliance", "break_alliance", "declare_rival", "end_rivalry",
+    "start_annex_vassal", "release_vassal", "break_truce", "declare_war",
+    "offer_peace", "execute_peace", "refuse_peace", "apply_event_choice",
+    "answer_alliance", "answer_call_to_arms",
+})
+
+
+def command(g: Game, name: str, *args, **kwargs):
+    """Call engine.<name>(g, *args, **kwargs), recording it first when
+    g.recorder is set. Counts in g.changes, so views rebuild."""
+    if g.recorder is not None:
+        g.recorder.command(name, args, kwargs)
+    result = getattr(engine, name)(g, *args, **kwargs)
+    g.changes += 1
+    return result
+
+
+def _encode(value):
+    if isinstance(value, War):
+        return {"war": value.wid}
+    if isinstance(value, tuple) and value in data.EVENTS:
+        return {"event": value[0]}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    return value
+
+
+def _decode(g: Game, value):
+    if isinstance(value, dict) and len(value) == 1:
+        if "war" in value:
+            return g.wars[value["war"]]
+        if "event" in value:
+            return next(e for e in data.EVENTS if e[0] == value["event"])
+    if isinstance(value, list):
+        return [_decode(g, v) for v in value]
+    return value
+
+
+class Recorder:
+    """Collects a fresh game's commands, from choose_nation on; write()
+    saves them to `path`."""
+
+    def __init__(self, g: Game, path: str):
+        if g.world is None:
+            raise ValueError("only games made from a seed can be recorded")
+        self.g = g
+        self.path = path
+        self.entries: list[list] = []
+        self.header = {"format": FORMAT, "seed": g.seed,
+                       "world": list(g.world),
+                       "generator": worldgen.GENERATOR}
+
+    def command(self, name: str, args, kwargs):
+        if name not in COMMANDS:
+            raise ValueError(f"{name} is not a player command")
+        self.entries.append(["cmd", self.g.abs_month, name,
+                             _encode(args), _encode(kwargs)])
+
+    def check(self):
+        self.entries.append(["check", self.g.abs_month,
+                             statehash.state_hash(self.g)])
+
+    def write(self):
+        tmp = self.path + ".tmp"
+        with gzip.open(tmp, "wt") as f:
+            f.write(json.dumps(self.header) + "\n")
+            for e in self.entries:
+                f.write(json.dumps(e, separators=(",", ":")) + "\n")
+        os.replace(tmp, self.path)
+
+
+def read(path: str) -> tuple[dict, list[list]]:
+    with open(path, "rb") as f:
+        packed = f.read(2) == b"\x1f\x8b"
+    with (gzip.open(path, "rt") if packed else open(path)) as f:
+        header = json.loads(f.readline())
+        if header.get("format", 0) != FORMAT:
+            raise ValueError(f"recording format {header.get('format')}, "
+                             f"this game reads {FORMAT}")
+        return header, [json.loads(line) for line in f if line.strip()]
+
+
+def replay(header: dict, entries: list[list]) -> tuple[Game, int, int]:
+    """Rebuild the recorded game. Returns (game, commands, checks);
+    ValueError at the first checksum that does not match."""
+    if header.get("generator") != worldgen.GENERATOR:
+        raise ValueError(f"recording needs map generator "
+                         f"{header.get('generator')}, this game has "
+                         f"{worldgen.GENERATOR}")
+    world = tuple(header["world"])
+    g = (worldgen.generate_scaled(header["seed"], *world) if world
+         else worldgen.generate(header["seed"]))
+    commands = checks = 0
+    for kind, month, *rest in entries:
+        while g.abs_month < month and not g.game_over:
+            g.pending_events.clear()    # the player saw them; nothing waits
+            engine.advance_month(g, ai_module=ai)
+        if kind == "cmd":
+            name, args, kwargs = rest
+            if name not in COMMANDS:
+                raise ValueError(f"{name} is not a player command")
+            try:
+                getattr(engine, name)(g, *_decode(g, args),
+                                      **{k: _decode(g, v)
+                                         for k, v in kwargs.items()})
+            except (KeyError, IndexError, StopIteration) as e:
+                raise ValueError(f"replay diverged at {g.date_str}: {name} "
+                                 f"failed ({e!r}) after {commands} "
+                                 f"commands") from e
+            commands += 1
+        elif kind == "check":
+            if statehash.state_hash(g) != rest[0]:
+                raise ValueError(f"checksum mismatch at {g.date_str} "
+                                 f"after {commands} commands")
+            checks += 1
+    return g, commands, checks
+
+
+def main(args) -> int:
+    try:
+        g, commands, checks = replay(*read(args.file))
+    except ValueError as e:
+        print(f"{args.file}: {e}", file=sys.stderr)
+        return 1
+    me = g.nations.get(g.player)
+    who = f"{me.name} ({g.player})" if me else "no nation"
+    print(f"{args.file}: {commands} command(s), {checks} checksum(s) "
+          f"matched; {who}, {g.date_str}, score "
+          f"{engine.score(g, g.player) if me else 0:.0f}")
+    return 0
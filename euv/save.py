@@ -1,33 +1,261 @@
-"""Save / load the full game state as JSON."""
+"""Save / load the full game state, as compact binary or as JSON.
+
+Both formats hold the same state. A binary save is a struct-packed
+header (magic, format version, compression), a fixed-size summary for
+the load picker (read_info reads just that) and a body: the map grid
+and province cells as packed arrays, then every other value in a small
+tagged encoding with each distinct string -- tags above all -- stored
+once. load() tells the formats apart by the header, so JSON saves from
+before the binary format keep working.
+
+The map itself -- grid, province shapes, names, terrain, adjacency,
+straits -- is whatever worldgen made of the seed, so when the game knows
+how it was generated (Game.world) a save stores just a fingerprint of
+it. Loading finds the map in memory, in a cache file beside the save
+or failing both by regenerating it, checks the fingerprint and shares
+the result (topology included) with every other game loaded from it.
+Games whose map cannot be rebuilt that way embed it instead.
+"""
 from __future__ import annotations
 
+import hashlib
 import json
+import lzma
 import os
+import pickle
+import struct
+import sys
+import threading
+import zlib
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
 
+from . import data, engine, pathfind, worldgen
 from .model import Army, Game, Nation, Province, War
 
-SAVE_PATH = os.path.expanduser("~/.euv_save.json")
-AUTOSAVE_PATH = os.path.expanduser("~/.euv_autosave.json")
+SAVE_PATH = os.path.expanduser("~/.euv_save.sav")      # slot 1
+AUTOSAVE_PATH = os.path.expanduser("~/.euv_autosave.sav")
+SLOTS = 8
+AUTOSAVES = 3                    # rotated: AUTOSAVE_PATH is the newest
+# where saves went while they were JSON; still offered for loading
+LEGACY_SAVE_PATH = os.path.expanduser("~/.euv_save.json")
+LEGACY_AUTOSAVE_PATH = os.path.expanduser("~/.euv_autosave.json")
 
+MAGIC = b"EUVS"
+FORMAT_VERSION = 3       # 2: the map may be left out; 3: SaveInfo
+HEADER = struct.Struct("<4sHB")          # magic, format version, codec
+# player tag, nation name, year, month, score, width, height,
+# provinces, nations alive, log entries
+META = struct.Struct("<8s40sHBdHHIHI")
+CODECS = {"none": 0, "zlib": 1, "lzma": 2}
+# beside a save: the maps its seeds make, one file per fingerprint
+MAP_DIR = ".euv_maps"
 
-def save(g: Game, path: str = SAVE_PATH):
-    state = {
+def slot_path(slot: int) -> str:
+    """Where manual save slot 1..SLOTS lives."""
+    return SAVE_PATH if slot == 1 else _numbered(SAVE_PATH, slot)
+
+
+def autosave_paths() -> list[str]:
+    """The rotating autosaves, newest first."""
+    return [AUTOSAVE_PATH] + [_numbered(AUTOSAVE_PATH, i)
+                              for i in range(2, AUTOSAVES + 1)]
+
+
+def _numbered(path: str, i: int) -> str:
+    root, ext = os.path.splitext(path)
+    return f"{root}.{i}{ext}"
+
+
+def save(g: Game, path: str = SAVE_PATH, fmt: str | None = None,
+         compress: str = "zlib", embed_map: bool | None = None):
+    """Write g to path atomically. fmt is "binary" or "json"; by default
+    a .json path gets JSON and anything else binary. The map is embedded
+    unless embed_map is False, which only a seed-made game allows: its
+    save then needs the map cache or the same map generator to load."""
+    if fmt is None:
+        fmt = "json" if path.endswith(".json") else "binary"
+    if embed_map is None:
+        embed_map = True
+    elif not embed_map and g.world is None:
+        raise ValueError("this game's map cannot be rebuilt from its seed")
+    state = _state(g, embed_map)
+    _write(state, info_of(g, state),
+           None if g.world is None else static_map(g), path, fmt, compress)
+
+
+def _write(state: dict, info: SaveInfo, m: StaticMap | None, path: str,
+           fmt: str, compress: str, keep: int = 1):
+    """Encode state to path through a synced .tmp file, and cache the map
+    m beside it. With keep > 1 the file being
+    replaced and its predecessors move down to path.2 .. path.<keep>."""
+    if fmt == "json":
+        blob = json.dumps(state).encode()
+    else:
+        blob = dumps(state, compress, info)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    for i in range(keep, 1, -1):
+        older = path if i == 2 else _numbered(path, i - 1)
+        if os.path.exists(older):
+            os.replace(older, _numbered(path, i))
+    os.replace(tmp, path)
+    if m is not None:
+        _write_map(_map_path(path, m.fingerprint), m)
+
+
+class Autosaver:
+    """Autosaves written on a worker thread, so the turn never waits.
+
+    request() copies the game's state on the calling thread -- a fraction
+    of encoding and writing it -- and returns. Requests that arrive while
+    a save is being written are coalesced: only the newest is written
+    next. Failures are held until report() passes them to the game log
+    from the main thread.
+    """
+
+    def __init__(self, path: str = AUTOSAVE_PATH, compress: str = "zlib",
+                 keep: int = AUTOSAVES):
+        self.path = path
+        self.compress = compress
+        self.keep = keep
+        self.written = 0                   # saves completed (tests)
+        self._cond = threading.Condition()
+        self._pending: tuple | None = None
+        self._busy = False
+        self._errors: list[str] = []
+        self._thread: threading.Thread | None = None
+
+    def request(self, g: Game):
+        state = pickle.loads(pickle.dumps(_state(g),
+                                          pickle.HIGHEST_PROTOCOL))
+        m = None if g.world is None else static_map(g)
+        with self._cond:
+            self._pending = (state, info_of(g, state), m)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._work, name="autosave", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every request has been written; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._pending is None and not self._busy, timeout)
+
+    def report(self, g: Game):
+        """Log failed autosaves to g; call from the main thread."""
+        with self._cond:
+            errors, self._errors = self._errors, []
+        for e in errors:
+            g.say("event", f"Autosave failed: {e}")
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                job, self._pending = self._pending, None
+                self._busy = True
+            error = None
+            try:
+                self._save(*job)
+            except Exception as e:      # reported, not lost with the thread
+                error = str(e) or type(e).__name__
+            with self._cond:
+                self._busy = False
+                if error is None:
+                    self.written += 1
+                else:
+                    self._errors.append(error)
+                self._cond.notify_all()
+
+    def _save(self, state: dict, info: SaveInfo, m: StaticMap | None):
+        fmt = "json" if self.path.endswith(".json") else "binary"
+        _write(state, info, m, self.path, fmt, self.compress, self.keep)
+
+
+@dataclass(frozen=True)
+class SaveInfo:
+    """What the load picker shows about a save, stored ahead of its body."""
+    player: str
+    nation: str
+    year: int
+    month: int
+    score: float
+    width: int
+    height: int
+    provinces: int
+    nations: int                 # alive, rebels aside
+    log: int                     # chronicle entries kept in the save
+
+    @property
+    def date_str(self) -> str:
+        return f"{data.MONTHS[self.month]}, AE {self.year}"
+
+
+def info_of(g: Game, state: dict | None = None) -> SaveInfo:
+    n = g.nations.get(g.player)
+    log = len(state["log"]) if state else min(len(g.log), 120)
+    return SaveInfo(g.player, n.name if n else "", g.year, g.month,
+                    engine.score(g, g.player) if n else 0.0,
+                    g.width, g.height, len(g.provinces),
+                    sum(1 for t, x in g.nations.items()
+                        if x.alive and t != data.REBEL_TAG), log)
+
+
+def read_info(path: str) -> SaveInfo | None:
+    """A save's SaveInfo from its first few bytes, or None for JSON and
+    binary saves from before the summary existed."""
+    with open(path, "rb") as f:
+        raw = f.read(HEADER.size + META.size)
+    if len(raw) < HEADER.size + META.size or not raw.startswith(MAGIC):
+        return None
+    if HEADER.unpack_from(raw)[1] < 3:
+        return None
+    return _info(raw, HEADER.size)
+
+
+def _meta(info: SaveInfo | None) -> bytes:
+    i = info or SaveInfo("", "", 0, 0, 0.0, 0, 0, 0, 0, 0)
+    return META.pack(_fixed(i.player, 8), _fixed(i.nation, 40), i.year,
+                     i.month, i.score, i.width, i.height, i.provinces,
+                     i.nations, i.log)
+
+
+def _info(raw: bytes, pos: int) -> SaveInfo:
+    tag, name, *rest = META.unpack_from(raw, pos)
+    return SaveInfo(_unfixed(tag), _unfixed(name), *rest)
+
+
+def _fixed(text: str, size: int) -> bytes:
+    """text in at most size UTF-8 bytes, never splitting a character."""
+    return text.encode()[:size].decode(errors="ignore").encode()
+
+
+def _unfixed(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode()
+
+
+def _state(g: Game, embed_map: bool = True) -> dict:
+    s = {
         "seed": g.seed,
         "rng": _rng_to_json(g.rng.getstate()),
         "year": g.year, "month": g.month, "player": g.player,
         "width": g.width, "height": g.height,
-        "grid": g.grid,
-        "straits": sorted(list(s) for s in g.straits),
         "next_army": g._next_army, "next_war": g._next_war,
         "game_over": g.game_over,
         "pending_events": g.pending_events,
         "missions": g.missions,
         "log": g.log[-120:],
         "provinces": [{
-            "pid": p.pid, "name": p.name, "terrain": p.terrain,
+            "pid": p.pid,
             "culture": p.culture, "owner": p.owner, "dev": p.dev,
-            "buildings": p.buildings, "cells": p.cells, "center": p.center,
-            "neighbors": sorted(p.neighbors), "coastal": p.coastal,
+            "buildings": p.buildings,
             "occupier": p.occupier, "siege_progress": p.siege_progress,
             "sieging": p.sieging, "unrest": p.unrest,
             "reb_months": p.reb_months,
@@ -65,36 +293,57 @@ def save(g: Game, path: str = SAVE_PATH):
             "independence": w.independence,
         } for w in g.wars.values()],
     }
-    tmp = path + ".tmp"
-    with open(tmp, "w") as f:
-        json.dump(state, f)
-    os.replace(tmp, path)
+    if g.world is not None:
+        s["generator"] = worldgen.GENERATOR
+        s["world"] = list(g.world)
+        s["fingerprint"] = static_map(g).fingerprint
+    if not embed_map:
+        return s
+    s["grid"] = g.grid
+    s["straits"] = sorted(list(st) for st in g.straits)
+    for d, p in zip(s["provinces"], g.provinces.values()):
+        d.update(name=p.name, terrain=p.terrain, cells=p.cells,
+                 center=p.center, neighbors=sorted(p.neighbors),
+                 coastal=p.coastal)
+    return s
 
 
-def load(path: str = SAVE_PATH) -> Game:
-    with open(path) as f:
-        s = json.load(f)
+def load(path: str | None = None) -> Game:
+    """Read a binary or JSON save; by default the manual save, or the
+    old JSON one if there is no binary save yet."""
+    if path is None:
+        path = SAVE_PATH
+        if not os.path.exists(path) and os.path.exists(LEGACY_SAVE_PATH):
+            path = LEGACY_SAVE_PATH
+    with open(path, "rb") as f:
+        raw = f.read()
+    return _restore(loads(raw) if raw.startswith(MAGIC) else json.loads(raw),
+                    path)
+
+
+def _restore(s: dict, path: str | None = None) -> Game:
     g = Game(s["seed"])
     g.rng.setstate(_rng_from_json(s["rng"]))
     g.year, g.month, g.player = s["year"], s["month"], s["player"]
     g.width, g.height = s["width"], s["height"]
-    g.grid = s["grid"]
-    g.straits = {tuple(x) for x in s["straits"]}
+    if s.get("generator") == worldgen.GENERATOR and "world" in s:
+        g.world = tuple(s["world"])
+    if "fingerprint" in s:
+        _restore_map(g, s, path)
+    else:
+        g.grid = s["grid"]
+        g.straits = {tuple(x) for x in s["straits"]}
+        for d in s["provinces"]:
+            g.provinces[d["pid"]] = _province(d, [tuple(c) for c in d["cells"]],
+                                              tuple(d["center"]),
+                                              set(d["neighbors"]))
+        g.reindex()
+        g.topology = pathfind.build_topology(g)
     g._next_army, g._next_war = s["next_army"], s["next_war"]
     g.game_over = s["game_over"]
     g.pending_events = s.get("pending_events", [])
     g.missions = s.get("missions", [])
     g.log = [tuple(e) for e in s["log"]]
-    for d in s["provinces"]:
-        p = Province(d["pid"], d["name"], d["terrain"], d["culture"],
-                     d["owner"], d["dev"], d["buildings"],
-                     [tuple(c) for c in d["cells"]], tuple(d["center"]),
-                     set(d["neighbors"]), d["coastal"], d["occupier"],
-                     d["siege_progress"], d["sieging"], d["unrest"],
-                     d.get("reb_months", 0),
-                     set(d.get("cores", [d["owner"]])),
-                     d.get("owner_since", 0))
-        g.provinces[p.pid] = p
     for d in s["nations"]:
         n = Nation(d["tag"], d["name"], d["culture"], d["color"],
                    d["capital"], d["ruler"], d["is_player"], d["alive"],
@@ -110,7 +359,6 @@ def load(path: str = SAVE_PATH) -> Game:
                    tuple(d["annexing"]) if d.get("annexing") else None)
         g.nations[n.tag] = n
     # saves from before the rebel system lack the REB nation
-    from . import worldgen
     worldgen.make_rebels(g)
     for d in s["armies"]:
         a = Army(d["aid"], d["owner"], d["location"], d["regiments"],
@@ -128,6 +376,173 @@ def load(path: str = SAVE_PATH) -> Game:
     return g
 
 
+def _province(d: dict, cells, center, neighbors) -> Province:
+    return Province(d["pid"], d["name"], d["terrain"], d["culture"],
+                    d["owner"], d["dev"], d["buildings"], cells, center,
+                    neighbors, d["coastal"], d["occupier"],
+                    d["siege_progress"], d["sieging"], d["unrest"],
+                    d.get("reb_months", 0), set(d.get("cores", [d["owner"]])),
+                    d.get("owner_since", 0))
+
+
+# ------------------------------------------------------------ static map
+
+# (seed, world) -> StaticMap, most recently used last
+_MAPS: OrderedDict[tuple, StaticMap] = OrderedDict()
+MAP_CACHE = 4
+
+
+@dataclass(frozen=True)
+class StaticMap:
+    """The part of a game that worldgen derives from the seed and nothing
+    changes afterwards. Games loaded from one share its lists and its
+    topology; none of them is ever mutated."""
+    fingerprint: str
+    width: int
+    height: int
+    grid: list[list[int]]
+    straits: frozenset[tuple[int, int]]
+    # pid -> (name, terrain, cells, center, neighbors, coastal)
+    provinces: dict[int, tuple]
+    topology: pathfind.Topology
+
+
+def map_fingerprint(g: Game) -> str:
+    """A hash of g's static map, as StaticMap holds it."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((g.width, g.height, sorted(g.straits))).encode())
+    grid = array("i", [v for row in g.grid for v in row])
+    if sys.byteorder == "big":
+        grid.byteswap()
+    h.update(grid.tobytes())
+    for pid in sorted(g.provinces):
+        p = g.provinces[pid]
+        h.update(repr((pid, p.name, p.terrain, p.center, p.coastal,
+                       sorted(p.neighbors), p.cells)).encode())
+    return h.hexdigest()
+
+
+def static_map(g: Game) -> StaticMap:
+    """g's static map, from the cache when g is where it came from (or
+    was loaded from it)."""
+    key = (g.seed, g.world)
+    m = _MAPS.get(key)
+    if m is None or m.topology is not g.topology:
+        m = _static_of(g)
+        _remember(key, m)
+    return m
+
+
+def _static_of(g: Game) -> StaticMap:
+    return StaticMap(map_fingerprint(g), g.width, g.height, g.grid,
+                     frozenset(g.straits),
+                     {pid: (p.name, p.terrain, p.cells, p.center,
+                            p.neighbors, p.coastal)
+                      for pid, p in g.provinces.items()},
+                     pathfind.topology(g))
+
+
+def _remember(key: tuple, m: StaticMap):
+    _MAPS[key] = m
+    _MAPS.move_to_end(key)
+    while len(_MAPS) > MAP_CACHE:
+        _MAPS.popitem(last=False)
+
+
+def _restore_map(g: Game, s: dict, path: str | None):
+    """Fill in the map of a seed-made game: from the caches, which hold it
+    whatever generator made it, else from the copy the save carries, or
+    (for a save that left it out) from the seed."""
+    seed, world, fingerprint = s["seed"], tuple(s["world"]), s["fingerprint"]
+    m = _MAPS.get((seed, world))
+    if m is not None and m.fingerprint != fingerprint:
+        m = None
+    if m is None and path is not None:
+        m = _read_map(_map_path(path, fingerprint), seed)
+        if m is not None and m.fingerprint != fingerprint:
+            m = None                       # stale or damaged cache file
+    if m is None and "grid" in s:
+        m = _static_from(s, seed)
+        if path is not None and m.fingerprint == fingerprint:
+            _write_map(_map_path(path, fingerprint), m)
+    if m is None:
+        if s.get("generator") != worldgen.GENERATOR:
+            raise ValueError(f"save needs map generator "
+                             f"{s.get('generator')}, this game has "
+                             f"{worldgen.GENERATOR}, and its map is not "
+                             f"cached")
+        made = (worldgen.generate_scaled(seed, *world) if world
+                else worldgen.generate(seed))
+        m = _static_of(made)
+        if path is not None and m.fingerprint == fingerprint:
+            _write_map(_map_path(path, fingerprint), m, replace=True)
+    if m.fingerprint != fingerprint:
+        raise ValueError("save's map does not match its fingerprint")
+    _remember((seed, world), m)
+    g.grid = m.grid
+    g.straits = set(m.straits)
+    for d in s["provinces"]:
+        name, terrain, cells, center, neighbors, coastal = \
+            m.provinces[d["pid"]]
+        d.update(name=name, terrain=terrain, coastal=coastal)
+        g.provinces[d["pid"]] = _province(d, cells, center, neighbors)
+    g.reindex()
+    g.topology = m.topology
+
+
+def _map_path(save_path: str, fingerprint: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(save_path)),
+                        MAP_DIR, fingerprint + ".map")
+
+
+def _write_map(path: str, m: StaticMap, replace: bool = False):
+    """Cache m on disk (in the binary save format) unless it already is;
+    failing to is harmless."""
+    if not replace and os.path.exists(path):
+        return
+    state = {
+        "width": m.width, "height": m.height, "grid": m.grid,
+        "straits": sorted(list(st) for st in m.straits),
+        "provinces": [{
+            "pid": pid, "name": name, "terrain": terrain, "cells": cells,
+            "center": center, "neighbors": sorted(neighbors),
+            "coastal": coastal,
+        } for pid, (name, terrain, cells, center, neighbors, coastal)
+            in m.provinces.items()],
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(dumps(state))
+        os.replace(path + ".tmp", path)
+    except OSError:
+        pass
+
+
+def _read_map(path: str, seed: int) -> StaticMap | None:
+    """A map cached by _write_map, or None if missing or unreadable."""
+    try:
+        with open(path, "rb") as f:
+            s = loads(f.read())
+    except (OSError, ValueError, LookupError, struct.error, zlib.error,
+            lzma.LZMAError):
+        return None
+    return _static_from(s, seed)
+
+
+def _static_from(s: dict, seed: int) -> StaticMap:
+    """The StaticMap of a decoded save or map file that holds one."""
+    g = Game(seed)
+    g.width, g.height, g.grid = s["width"], s["height"], s["grid"]
+    g.straits = {tuple(x) for x in s["straits"]}
+    for d in s["provinces"]:
+        g.provinces[d["pid"]] = Province(
+            d["pid"], d["name"], d["terrain"], "", "",
+            cells=[tuple(c) for c in d["cells"]], center=tuple(d["center"]),
+            neighbors=set(d["neighbors"]), coastal=d["coastal"])
+    return _static_of(g)
+
+
 def _rng_to_json(state):
     version, internal, gauss = state
     return [version, list(internal), gauss]
@@ -135,3 +550,252 @@ def _rng_to_json(state):
 
 def _rng_from_json(j):
     return (j[0], tuple(j[1]), j[2])
+
+
+# ------------------------------------------------------------------ binary
+
+_NONE, _TRUE, _FALSE, _INT, _NEG, _FLOAT, _STR, _LIST, _RECORD, _FLOATS = \
+    range(10)
+_DOUBLE = struct.Struct("<d")
+
+
+def dumps(state: dict, compress: str = "zlib",
+          info: SaveInfo | None = None) -> bytes:
+    """A _state() dict as a binary save, summarised by info."""
+    state = dict(state)
+    grid = state.pop("grid", [])       # absent when the seed rebuilds it
+    provinces = [dict(p) for p in state["provinces"]]
+    cells = [p.pop("cells") for p in provinces] if grid else []
+    state["provinces"] = provinces
+
+    body = bytearray()
+    flat = [v for row in grid for v in row]
+    code = "h" if all(-32768 <= v < 32768 for v in flat) else "i"
+    body += code.encode()
+    _write_array(body, array(code, flat))
+    _write_array(body, array("I", [len(c) for c in cells]))
+    _write_array(body, array("H", [v for c in cells for xy in c
+                                   for v in xy]))
+    _encode(state, body)
+
+    payload = bytes(body)
+    if compress == "zlib":
+        payload = zlib.compress(payload, 6)
+    elif compress == "lzma":
+        payload = lzma.compress(payload)
+    elif compress != "none":
+        raise ValueError(f"unknown compression {compress!r}")
+    return (HEADER.pack(MAGIC, FORMAT_VERSION, CODECS[compress])
+            + _meta(info) + payload)
+
+
+def loads(raw: bytes) -> dict:
+    """A binary save back into the dict _state() made (as JSON would
+    give it: tuples as lists)."""
+    magic, version, codec = HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError("not an EUV save")
+    if version > FORMAT_VERSION:
+        raise ValueError(f"save format {version} is newer than this game "
+                         f"reads ({FORMAT_VERSION})")
+    payload = raw[HEADER.size + (META.size if version >= 3 else 0):]
+    if codec == CODECS["zlib"]:
+        payload = zlib.decompress(payload)
+    elif codec == CODECS["lzma"]:
+        payload = lzma.decompress(payload)
+    elif codec != CODECS["none"]:
+        raise ValueError(f"unknown compression code {codec}")
+
+    buf = payload
+    code = chr(buf[0])
+    flat, pos = _read_array(buf, 1, code)
+    counts, pos = _read_array(buf, pos, "I")
+    coords, pos = _read_array(buf, pos, "H")
+    state, pos = _decode(buf, pos)
+    if not flat:
+        return state
+
+    w = state["width"]
+    flat = flat.tolist()
+    state["grid"] = [flat[i:i + w] for i in range(0, len(flat), w)]
+    at = 0
+    for p, count in zip(state["provinces"], counts):
+        xy = coords[at:at + 2 * count].tolist()
+        p["cells"] = [xy[i:i + 2] for i in range(0, len(xy), 2)]
+        at += 2 * count
+    return state
+
+
+def _encode(value, out: bytearray):
+    """Append value as a string table and a _Packer tree."""
+    packer = _Packer()
+    packer.pack(value)
+    _varint(len(packer.strings), out)
+    for text in packer.strings:
+        raw = text.encode()
+        _varint(len(raw), out)
+        out += raw
+    out += packer.out
+
+
+def _decode(buf, pos: int):
+    n, pos = _read_uint(buf, pos)
+    strings = []
+    for _ in range(n):
+        size, pos = _read_uint(buf, pos)
+        strings.append(buf[pos:pos + size].decode())
+        pos += size
+    return _Unpacker(buf, strings).unpack(pos)
+
+
+def _write_array(out: bytearray, arr: array):
+    if sys.byteorder == "big":
+        arr.byteswap()
+    _varint(len(arr), out)
+    out += arr.tobytes()
+
+
+def _read_array(buf, pos: int, code: str):
+    n, pos = _read_uint(buf, pos)
+    arr = array(code)
+    end = pos + n * arr.itemsize
+    arr.frombytes(buf[pos:end])
+    if sys.byteorder == "big":
+        arr.byteswap()
+    return arr, end
+
+
+def _varint(n: int, out: bytearray):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_uint(buf, pos: int):
+    n = shift = 0
+    while True:
+        b = buf[pos]
+        pos += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, pos
+        shift += 7
+
+
+class _Packer:
+    """Values to tagged bytes. Strings become indexes into one table;
+    dicts become records whose key tuple ("shape") is spelled out only
+    the first time, and str -> float maps (opinions) pack flat."""
+
+    def __init__(self):
+        self.out = bytearray()
+        self.strings: dict[str, int] = {}
+        self.shapes: dict[tuple, int] = {}
+
+    def string(self, s: str) -> int:
+        return self.strings.setdefault(s, len(self.strings))
+
+    def pack(self, v):
+        out = self.out
+        if v is None:
+            out.append(_NONE)
+        elif v is True:
+            out.append(_TRUE)
+        elif v is False:
+            out.append(_FALSE)
+        elif isinstance(v, int):
+            out.append(_INT if v >= 0 else _NEG)
+            _varint(abs(v), out)
+        elif isinstance(v, float):
+            out.append(_FLOAT)
+            out += _DOUBLE.pack(v)
+        elif isinstance(v, str):
+            out.append(_STR)
+            _varint(self.string(v), out)
+        elif isinstance(v, (list, tuple)):
+            out.append(_LIST)
+            _varint(len(v), out)
+            for x in v:
+                self.pack(x)
+        elif isinstance(v, dict):
+            self.pack_dict(v)
+        else:
+            raise TypeError(f"cannot save {type(v).__name__}")
+
+    def pack_dict(self, d: dict):
+        out = self.out
+        # non-str keys become strings, as JSON would have them
+        keys = tuple(k if isinstance(k, str) else json.dumps(k) for k in d)
+        values = list(d.values())
+        if len(values) >= 4 and all(type(x) is float for x in values):
+            out.append(_FLOATS)
+            _write_array(out, array("I", [self.string(k) for k in keys]))
+            _write_array(out, array("d", values))
+            return
+        out.append(_RECORD)
+        shape = self.shapes.get(keys)
+        if shape is None:
+            shape = self.shapes[keys] = len(self.shapes)
+            _varint(shape, out)
+            _varint(len(keys), out)
+            for k in keys:
+                _varint(self.string(k), out)
+        else:
+            _varint(shape, out)
+        for x in values:
+            self.pack(x)
+
+
+class _Unpacker:
+    def __init__(self, buf: bytes, strings: list[str]):
+        self.buf = buf
+        self.strings = strings
+        self.shapes: list[tuple[str, ...]] = []
+
+    def unpack(self, pos: int):
+        buf = self.buf
+        t = buf[pos]
+        pos += 1
+        if t == _STR or t == _INT or t == _NEG:
+            n = buf[pos]                 # one-byte varint fast path
+            if n < 0x80:
+                pos += 1
+            else:
+                n, pos = _read_uint(buf, pos)
+            if t == _STR:
+                return self.strings[n], pos
+            return (n if t == _INT else -n), pos
+        if t == _FLOAT:
+            return _DOUBLE.unpack_from(buf, pos)[0], pos + 8
+        if t == _RECORD:
+            shape, pos = _read_uint(buf, pos)
+            if shape == len(self.shapes):
+                n, pos = _read_uint(buf, pos)
+                keys = []
+                for _ in range(n):
+                    i, pos = _read_uint(buf, pos)
+                    keys.append(self.strings[i])
+                self.shapes.append(tuple(keys))
+            d = {}
+            for k in self.shapes[shape]:
+                d[k], pos = self.unpack(pos)
+            return d, pos
+        if t == _LIST:
+            n, pos = _read_uint(buf, pos)
+            out = [None] * n
+            for i in range(n):
+                out[i], pos = self.unpack(pos)
+            return out, pos
+        if t == _FLOATS:
+            idx, pos = _read_array(buf, pos, "I")
+            values, pos = _read_array(buf, pos, "d")
+            strings = self.strings
+            return dict(zip([strings[i] for i in idx], values)), pos
+        if t == _NONE:
+            return None, pos
+        if t == _TRUE:
+            return True, pos
+        if t == _FALSE:
+            return False, pos
+        raise ValueError(f"corrupt save: bad value tag {t}")
@@ -0,0 +1,138 @@
+"""Headless all-AI simulations: one seed, or a sweep over many in parallel.
+
+    python3 -m euv sim --seeds 1-1000 --years 100 --workers 8 --out sweep.csv
+    python3 -m euv sim --world 400x150:5000:300 --years 10
+    python3 -m euv sim --seeds 7 --years 5 --hashes    # + per-month hashes
+
+Every run is independent and deterministic in its seed, so a sweep gives
+the same rows whatever the worker count; rows come out in seed order.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from . import ai, data, engine, statehash, worldgen
+from .model import Game
+
+COLUMNS = ["seed", "years", "nations_start", "nations_alive",
+           "wars_started", "wars_ongoing", "leader", "leader_score"]
+
+
+def simulate(g: Game, years: int, hashes: list | None = None) -> int:
+    """Run g all-AI for `years`; returns the number of wars started.
+    With `hashes`, each month's statehash.digests() is appended to it."""
+    g.player = ""
+    start = g._next_war
+    for _ in range(years * 12):
+        engine.advance_month(g, ai_module=ai)
+        if hashes is not None:
+            hashes.append(statehash.digests(g))
+    return g._next_war - start
+
+
+def metrics(g: Game, seed: int, years: int, wars_seen: int) -> dict:
+    alive = [t for t, n in g.nations.items()
+             if n.alive and t != data.REBEL_TAG]
+    scores = {t: round(engine.score(g, t), 1)
+              for t in sorted(alive, key=lambda t: -engine.score(g, t))}
+    cats: dict[str, int] = {}
+    for c, _ in g.log:
+        cats[c] = cats.get(c, 0) + 1
+    return {
+        "seed": seed,
+        "years": years,
+        "nations_start": len(g.nations) - 1,      # REB is not a nation
+        "nations_alive": len(alive),
+        "wars_started": wars_seen,
+        "wars_ongoing": len(g.wars),
+        "leader": next(iter(scores), ""),
+        "leader_score": next(iter(scores.values()), 0.0),
+        "scores": scores,
+        "log": dict(sorted(cats.items())),
+    }
+
+
+def run(seed: int, years: int = 100, world: tuple | None = None,
+        hashes: bool = False) -> dict:
+    """One seed on the standard map, or on a generate_scaled() world of
+    (width, height, provinces, nations). With `hashes`, the row also
+    holds every month's state_hash()."""
+    g = worldgen.generate_scaled(seed, *world) if world else \
+        worldgen.generate(seed)
+    stream = [] if hashes else None
+    wars_seen = simulate(g, years, stream)
+    row = metrics(g, seed, years, wars_seen)
+    if hashes:
+        row["hashes"] = [statehash.combine(d) for d in stream]
+    return row
+
+
+def sweep(seeds: list[int], years: int = 100, workers: int = 1,
+          world: tuple | None = None, hashes: bool = False):
+    """Yield run() for every seed, in seed order, over `workers` processes."""
+    if workers <= 1 or len(seeds) <= 1:
+        for seed in seeds:
+            yield run(seed, years, world, hashes)
+        return
+    chunk = max(1, len(seeds) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(run, seeds, [years] * len(seeds),
+                            [world] * len(seeds), [hashes] * len(seeds),
+                            chunksize=chunk)
+
+
+def parse_seeds(spec: str) -> list[int]:
+    """"7", "1-100" or "1,5,9-12" -> sorted unique seeds."""
+    out: set[int] = set()
+    for part in spec.split(","):
+        lo, _, hi = part.strip().partition("-")
+        out.update(range(int(lo), int(hi or lo) + 1))
+    return sorted(out)
+
+
+def parse_world(spec: str) -> tuple[int, int, int, int]:
+    """"400x150:5000:300" -> (width, height, provinces, nations)."""
+    size, provinces, nations = spec.split(":")
+    width, height = size.lower().split("x")
+    return int(width), int(height), int(provinces), int(nations)
+
+
+def write(rows, f, fmt: str = "jsonl") -> int:
+    """Stream rows to f as JSONL, or CSV with one log_<category> column
+    per category seen and the score table (and any month hashes) as JSON.
+    Returns row count."""
+    if fmt == "jsonl":
+        n = 0
+        for row in rows:
+            f.write(json.dumps(row) + "\n")
+            n += 1
+        return n
+    rows = list(rows)          # CSV needs every log category up front
+    cats = sorted({c for row in rows for c in row["log"]})
+    extra = ["scores"] + (["hashes"] if any("hashes" in row for row in rows)
+                          else [])
+    w = csv.writer(f)
+    w.writerow(COLUMNS + [f"log_{c}" for c in cats] + extra)
+    for row in rows:
+        w.writerow([row[k] for k in COLUMNS]
+                   + [row["log"].get(c, 0) for c in cats]
+                   + [json.dumps(row.get(k)) for k in extra])
+    return len(rows)
+
+
+def main(args) -> int:
+    seeds = parse_seeds(args.seeds)
+    fmt = "csv" if args.out and args.out.endswith(".csv") else "jsonl"
+    world = parse_world(args.world) if args.world else None
+    rows = sweep(seeds, args.years, args.workers, world, args.hashes)
+    if not args.out:
+        write(rows, sys.stdout, fmt)
+        return 0
+    with open(args.out, "w", newline="") as f:
+        n = write(rows, f, fmt)
+    print(f"{n} run(s) of {args.years} years written to {args.out}",
+          file=sys.stderr)
+    return 0
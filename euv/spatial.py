@@ -0,0 +1,86 @@
+"""Nearest-province queries over province centers.
+
+A uniform bucket grid in map metric: cells are twice as tall as wide, so
+rows count double (d2). Queries walk outward ring by ring and can be
+limited to a set of provinces, e.g. one nation's land.
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from collections.abc import Collection, Iterator
+
+
+def d2(a: tuple[int, int], b: tuple[int, int]) -> int:
+    """Squared map distance; y weighted because cells are tall."""
+    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 * 4
+
+
+class SpatialIndex:
+    # an `among` this small is cheaper to scan than to look up ring by ring
+    SCAN_LIMIT = 48
+
+    def __init__(self, centers: dict[int, tuple[int, int]]):
+        self.centers = dict(centers)
+        xs = [c[0] for c in self.centers.values()] or [0]
+        ys = [2 * c[1] for c in self.centers.values()] or [0]
+        area = (max(xs) - min(xs) + 1) * (max(ys) - min(ys) + 1)
+        # about two centers per bucket
+        self.size = max(1, math.isqrt(2 * area // max(1, len(self.centers))))
+        self.buckets: dict[tuple[int, int], list[int]] = {}
+        for pid in sorted(self.centers):
+            self.buckets.setdefault(self._key(self.centers[pid]),
+                                    []).append(pid)
+        keys = self.buckets or {(0, 0): []}
+        self.lo = (min(k[0] for k in keys), min(k[1] for k in keys))
+        self.hi = (max(k[0] for k in keys), max(k[1] for k in keys))
+
+    def __len__(self) -> int:
+        return len(self.centers)
+
+    def _key(self, c: tuple[int, int]) -> tuple[int, int]:
+        return c[0] // self.size, 2 * c[1] // self.size
+
+    def nearby(self, point: tuple[int, int],
+               among: Collection[int] | None = None
+               ) -> Iterator[tuple[int, int]]:
+        """Yield (d2, pid) by increasing distance from `point`, ties by
+        pid; only pids in `among` when given."""
+        if among is not None and len(among) <= self.SCAN_LIMIT:
+            yield from sorted((d2(point, self.centers[p]), p) for p in among)
+            return
+        bx, by = self._key(point)
+        # rings needed before every bucket of the grid has been visited
+        last = max(bx - self.lo[0], self.hi[0] - bx,
+                   by - self.lo[1], self.hi[1] - by, 0)
+        heap: list[tuple[int, int]] = []
+        for r in range(last + 1):
+            for key in self._ring(bx, by, r):
+                for pid in self.buckets.get(key, ()):
+                    if among is None or pid in among:
+                        heapq.heappush(heap, (d2(point, self.centers[pid]),
+                                              pid))
+            # anything in ring r+1 or beyond is at least r*size away
+            reach = (r * self.size) ** 2
+            while heap and heap[0][0] <= reach:
+                yield heapq.heappop(heap)
+        while heap:
+            yield heapq.heappop(heap)
+
+    def nearest(self, point: tuple[int, int],
+                among: Collection[int] | None = None) -> int | None:
+        """The closest pid to `point` (lowest pid on ties), or None."""
+        for _, pid in self.nearby(point, among):
+            return pid
+        return None
+
+    def _ring(self, bx: int, by: int, r: int):
+        if r == 0:
+            yield bx, by
+            return
+        for x in range(bx - r, bx + r + 1):
+            yield x, by - r
+            yield x, by + r
+        for y in range(by - r + 1, by + r):
+            yield bx - r, y
+            yield bx + r, y
@@ -0,0 +1,109 @@
+"""Deterministic digests of a game's state, one per subsystem.
+
+    python3 tests/test_statehash.py            # check the golden streams
+    python3 tests/test_statehash.py --update   # after a deliberate change
+
+state_hash(g) is the same on every run, machine and PYTHONHASHSEED for
+the same state: records are walked in id order, sets sorted, floats
+written with repr. Two games agree when every subsystem digest agrees;
+first_divergence() names the earliest month and the subsystems that
+differ, so a change in behaviour points at where it started.
+"""
+from __future__ import annotations
+
+import hashlib
+from array import array
+from dataclasses import fields
+from operator import attrgetter
+
+from .model import Army, Game, Nation, Province, War
+
+SUBSYSTEMS = ("game", "rng", "provinces", "nations", "armies", "wars")
+
+# worldgen's work: fixed for the life of a game, covered by the seed
+STATIC = {"name", "terrain", "cells", "center", "neighbors", "coastal"}
+
+
+def _fields(cls, skip=frozenset()):
+    """Getters for the compared fields of cls not in skip: plain values,
+    sets (hashed sorted) and dicts (sorted keys plus packed values)."""
+    kinds: dict[str, list[str]] = {"plain": [], "set": [], "dict": []}
+    for f in fields(cls):
+        if f.compare and f.name not in skip:
+            kind = str(f.type).partition("[")[0]
+            kinds[kind if kind in kinds else "plain"].append(f.name)
+    return tuple(_getter(names) for names in kinds.values())
+
+
+def _getter(names: list[str]):
+    """attrgetter that always returns a tuple, even for 0 or 1 names."""
+    if len(names) > 1:
+        return attrgetter(*names)
+    get = attrgetter(*names) if names else None
+    return lambda r: (get(r),) if get else ()
+
+
+PROVINCE = _fields(Province, STATIC)
+NATION = _fields(Nation)
+ARMY = _fields(Army)
+WAR = _fields(War)
+
+
+def _digest(value) -> str:
+    return hashlib.blake2b(repr(value).encode(), digest_size=8).hexdigest()
+
+
+def _rng(state: tuple) -> str:
+    version, words, gauss = state
+    h = hashlib.blake2b(array("I", words).tobytes(), digest_size=8)
+    h.update(repr((version, gauss)).encode())
+    return h.hexdigest()
+
+
+def _table(table: dict, spec) -> str:
+    """Digest of a table's records in id order. Dicts go in as packed
+    doubles: through repr, the opinion matrix alone costs about what the
+    month being hashed does."""
+    plain, sets, dicts = spec
+    h = hashlib.blake2b(digest_size=8)
+    for key in sorted(table):
+        r = table[key]
+        h.update(repr((plain(r), [sorted(v) for v in sets(r)])).encode())
+        for d in dicts(r):
+            keys = sorted(d)
+            h.update("\0".join(map(str, keys)).encode())
+            h.update(array("d", [d[k] for k in keys]).tobytes())
+    return h.hexdigest()
+
+
+def digests(g: Game) -> dict[str, str]:
+    """Subsystem -> 16 hex digits, in SUBSYSTEMS order."""
+    return {
+        "game": _digest((g.seed, g.year, g.month, g.player, g._next_army,
+                         g._next_war, g.game_over, g.missions)),
+        "rng": _rng(g.rng.getstate()),
+        "provinces": _table(g.provinces, PROVINCE),
+        "nations": _table(g.nations, NATION),
+        "armies": _table(g.armies, ARMY),
+        "wars": _table(g.wars, WAR),
+    }
+
+
+def combine(parts: dict[str, str]) -> str:
+    return hashlib.blake2b("".join(parts[s] for s in SUBSYSTEMS).encode(),
+                           digest_size=16).hexdigest()
+
+
+def state_hash(g: Game) -> str:
+    """One digest of the whole simulated state (not the log or popups)."""
+    return combine(digests(g))
+
+
+def first_divergence(a: list[dict[str, str]], b: list[dict[str, str]]
+                     ) -> tuple[int, list[str]] | None:
+    """The first index where two digest streams differ and the subsystems
+    that differ there; None when they agree over their common length."""
+    for i, (x, y) in enumerate(zip(a, b)):
+        if x != y:
+            return i, [s for s in SUBSYSTEMS if x.get(s) != y.get(s)]
+    return None
@@ -0,0 +1,82 @@
+"""Bytes sent to the terminal per frame, to see what a redraw costs.
+
+    python3 -m euv --bytes
+
+ByteMeter.install() puts a pipe in front of stdout before curses starts;
+a thread copies everything through to the real terminal, counting it.
+ncurses keeps working: with stdout not a tty it takes the terminal's
+modes and size from stderr, which must still be one. A frame's bytes
+are whatever was written between start() and stop(): once doupdate()
+returns, all of it has been relayed or is waiting in the pipe.
+"""
+from __future__ import annotations
+
+import fcntl
+import os
+import select
+import statistics
+import struct
+import sys
+import termios
+import threading
+
+
+class ByteMeter:
+    def __init__(self):
+        self.relayed = 0
+        self.frames: list[int] = []
+        self._mark = 0
+        self._lock = threading.Lock()
+        self._read = self._real = -1
+        self._thread: threading.Thread | None = None
+
+    def install(self):
+        if not os.isatty(2):
+            raise OSError("counting bytes needs stderr on the terminal")
+        sys.stdout.flush()
+        self._real = os.dup(1)
+        self._read, w = os.pipe()
+        os.dup2(w, 1)
+        os.close(w)
+        self._thread = threading.Thread(target=self._relay, daemon=True)
+        self._thread.start()
+
+    def close(self):
+        """Put stdout back; the relay drains the pipe and stops."""
+        sys.stdout.flush()
+        os.dup2(self._real, 1)      # drops the pipe's last writer: EOF
+        self._thread.join()
+        os.close(self._read)
+        os.close(self._real)
+
+    def _relay(self):
+        while True:
+            select.select([self._read], [], [])
+            with self._lock:        # read and count as one step for total()
+                chunk = os.read(self._read, 65536)
+                self.relayed += len(chunk)
+            if not chunk:
+                return
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(self._real, view):]
+
+    def total(self) -> int:
+        """Bytes written so far, relayed or still in the pipe."""
+        with self._lock:
+            waiting = fcntl.ioctl(self._read, termios.FIONREAD, b"\0" * 4)
+            return self.relayed + struct.unpack("i", waiting)[0]
+
+    def start(self):
+        self._mark = self.total()
+
+    def stop(self):
+        self.frames.append(self.total() - self._mark)
+
+    def summary(self) -> str:
+        if not self.frames:
+            return "no frames drawn"
+        f = self.frames
+        return (f"{len(f)} frames, {sum(f):,} bytes to the terminal: "
+                f"{sum(f) / len(f):,.0f} per frame on average, median "
+                f"{statistics.median(f):,.0f}, max {max(f):,}")
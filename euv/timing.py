@@ -0,0 +1,162 @@
+"""Opt-in wall-clock instrumentation of the monthly tick.
+
+    t = timing.enable(g)          # g.timing is now a Timings
+    ... advance_month(g) ...
+    t.dump("timing.json")         # or .csv
+    timing.disable(g)
+
+Phases of advance_month and each AI nation's turn are timed through
+runner(g), which is a plain call while g.timing is None. The hottest
+helpers (find_path, at_war_with, provinces_of) are only wrapped while
+enabled, so a game that never enables timing pays nothing for them.
+Helper times are inclusive: they overlap the phase that called them.
+"""
+from __future__ import annotations
+
+import csv
+import json
+import weakref
+from dataclasses import dataclass, field
+from time import perf_counter
+
+from .model import Game
+
+HELPERS = ("at_war_with", "provinces_of")   # Game methods timed per call
+
+
+@dataclass
+class Section:
+    calls: int = 0
+    total: float = 0.0                 # seconds
+    longest: float = 0.0
+    # bucket k counts calls that took [2**(k-1), 2**k) microseconds
+    buckets: dict[int, int] = field(default_factory=dict)
+
+    def add(self, seconds: float):
+        self.calls += 1
+        self.total += seconds
+        self.longest = max(self.longest, seconds)
+        k = int(seconds * 1e6).bit_length()
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+
+
+def _bucket_label(k: int) -> str:
+    return "<1us" if k == 0 else f"<{2 ** k}us"
+
+
+class Timings:
+    """Wall time, call counts and duration histograms per named section."""
+
+    def __init__(self):
+        self.sections: dict[str, Section] = {}
+
+    def record(self, name: str, seconds: float):
+        s = self.sections.get(name)
+        if s is None:
+            s = self.sections[name] = Section()
+        s.add(seconds)
+
+    def run(self, name: str, fn, *args):
+        start = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.record(name, perf_counter() - start)
+
+    def report(self) -> list[dict]:
+        """One row per section, slowest total first."""
+        rows = []
+        for name, s in sorted(self.sections.items(),
+                              key=lambda kv: -kv[1].total):
+            rows.append({
+                "section": name,
+                "calls": s.calls,
+                "total_ms": round(s.total * 1e3, 3),
+                "mean_us": round(s.total / s.calls * 1e6, 2),
+                "max_us": round(s.longest * 1e6, 2),
+                "histogram": {_bucket_label(k): s.buckets[k]
+                              for k in sorted(s.buckets)},
+            })
+        return rows
+
+    def dump(self, path: str):
+        """Write the report as JSON, or CSV if path ends in .csv."""
+        rows = self.report()
+        with open(path, "w", newline="") as f:
+            if not path.endswith(".csv"):
+                json.dump(rows, f, indent=1)
+                return
+            labels = sorted({k for s in self.sections.values()
+                             for k in s.buckets})
+            w = csv.writer(f)
+            w.writerow(["section", "calls", "total_ms", "mean_us", "max_us"]
+                       + [_bucket_label(k) for k in labels])
+            for r in rows:
+                w.writerow([r["section"], r["calls"], r["total_ms"],
+                            r["mean_us"], r["max_us"]]
+                           + [r["histogram"].get(_bucket_label(k), 0)
+                              for k in labels])
+
+    def summary(self, top: int = 12) -> str:
+        lines = [f"{'section':<16}{'calls':>9}{'total ms':>11}{'mean us':>10}"]
+        for r in self.report()[:top]:
+            lines.append(f"{r['section']:<16}{r['calls']:>9}"
+                         f"{r['total_ms']:>11.1f}{r['mean_us']:>10.1f}")
+        return "\n".join(lines)
+
+
+def _call(name: str, fn, *args):
+    return fn(*args)
+
+
+def runner(g: Game):
+    """run(name, fn, *args): timed when g.timing is set, else a plain call."""
+    return _call if g.timing is None else g.timing.run
+
+
+def _timed(t: Timings, name: str, fn):
+    def wrapper(*args):
+        start = perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            t.record(name, perf_counter() - start)
+    return wrapper
+
+
+_find_path = None          # engine.find_path while a wrapper is installed
+_timed_games: weakref.WeakSet[Game] = weakref.WeakSet()   # share the wrapper
+
+
+def _timed_find_path(g: Game, *args):
+    if g.timing is None:
+        return _find_path(g, *args)
+    return g.timing.run("find_path", _find_path, g, *args)
+
+
+def enable(g: Game) -> Timings:
+    global _find_path
+    from . import engine
+    disable(g)
+    g.timing = Timings()
+    for name in HELPERS:
+        setattr(g, name, _timed(g.timing, name, getattr(g, name)))
+    _timed_games.add(g)
+    if _find_path is None:
+        _find_path = engine.find_path
+        engine.find_path = _timed_find_path
+    return g.timing
+
+
+def disable(g: Game):
+    """Stop timing g; its helpers go back to the plain methods. find_path
+    is unwrapped once no other game is timed."""
+    global _find_path
+    from . import engine
+    g.timing = None
+    for name in HELPERS:
+        g.__dict__.pop(name, None)
+    _timed_games.discard(g)
+    if _find_path is not None and not _timed_games:
+        engine.find_path = _find_path
+        _find_path = None
@@ -0,0 +1,235 @@
+"""What the top bar and sidebar show, gathered from the game in one pass.
+
+build() does every engine query the panels need: balance, war scores,
+the great-power ranking, supply and attrition for the selection. The
+render functions only read the result. The app rebuilds it when the
+world changes (Game.changes: each month and player command) or the
+selection does, so moving the cursor costs the engine nothing.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from . import data, engine
+from .model import Game
+
+
+@dataclass
+class WarView:
+    name: str
+    score: float                    # from the player's side
+    enemies: str
+    capitulation_in: int | None     # months, when one side is crushed
+
+
+@dataclass
+class ArmyView:
+    name: str
+    color: int
+    regiments: int
+    men: int
+    morale: float
+    morale_max: float
+    location: str
+    general: int
+    general_name: str
+    moving_to: str | None
+    reinforce: bool
+    supply: int
+    attrition: float
+
+
+@dataclass
+class ArmyChip:
+    """An army as listed under a province."""
+    owner: str
+    color: int
+    regiments: int
+    men: int
+
+
+@dataclass
+class ProvinceView:
+    name: str
+    terrain: str
+    owner: str
+    owner_color: int
+    capital: bool
+    mine: bool
+    dev: int
+    dev_cost: int
+    fort_level: int
+    tax: float
+    supply: int
+    unrest: float
+    cores: str | None               # None when only the owner has a core
+    owner_cored: bool
+    buildings: list[str]
+    occupier: str | None
+    sieging: str | None
+    siege_progress: float
+    claimed: bool
+    armies: list[ArmyChip]
+
+
+@dataclass
+class OwnerView:
+    """The selected province's owner, when it is not the player."""
+    name: str
+    ruler: str
+    opinion: float
+    ae: float
+    dev: int
+    regiments: int
+    overlord: str | None
+    vassals: list[str]
+    relations: list[str]
+
+
+@dataclass
+class ViewModel:
+    # top bar
+    name: str
+    date: str
+    gold: float
+    net: float
+    manpower: float
+    stability: int
+    prestige: float
+    regiments: int
+    force_limit: int
+    ae_warning: bool
+    # sidebar
+    wars: list[WarView]
+    allies: list[str]
+    vassals: list[str]
+    overlord: str | None
+    annexing: tuple[str, int] | None    # (vassal, months left)
+    rivals: list[str]
+    fabricating: tuple[str, int] | None  # (province, months left)
+    war_exhaustion: float
+    unrest_provinces: int
+    coalition: list[str]
+    missions: list[str]
+    great_powers: list[tuple[str, int, float, bool]] = field(
+        default_factory=list)           # (name, color, score, is player)
+    army: ArmyView | None = None
+    province: ProvinceView | None = None
+    owner: OwnerView | None = None
+
+
+def build(g: Game, sel_pid: int | None, sel_aid: int | None) -> ViewModel:
+    me = g.nations[g.player]
+    name = {t: n.name for t, n in g.nations.items()}
+    _, _, net = engine.monthly_balance(g, g.player)
+    wars = []
+    for w in g.wars_of(g.player):
+        sc = w.score_for(g.player)
+        left = None
+        if abs(w.score) >= data.CAPITULATION_SCORE:
+            left = max(1, data.CAPITULATION_MONTHS - w.dom_months)
+        wars.append(WarView(w.name, sc, ", ".join(
+            name[t] for t in w.enemies_of(g.player)), left))
+    max_ae = max((o.ae.get(g.player, 0) for o in g.nations.values()
+                  if o.alive and o.tag != g.player), default=0)
+    ranked = sorted((t for t, n in g.nations.items()
+                     if n.alive and t != data.REBEL_TAG),
+                    key=lambda t: -engine.score(g, t))
+    vm = ViewModel(
+        name=me.name, date=g.date_str, gold=me.gold, net=net,
+        manpower=me.manpower, stability=me.stability,
+        prestige=me.prestige,
+        regiments=sum(a.regiments for a in g.armies_of(g.player)),
+        force_limit=g.force_limit(g.player),
+        ae_warning=max_ae > data.COALITION_AE_THRESHOLD * 0.7,
+        wars=wars,
+        allies=sorted(name[t] for t in me.allies),
+        vassals=[name[t] for t in g.vassals_of(g.player)],
+        overlord=name[me.overlord] if me.overlord else None,
+        annexing=((name[me.annexing[0]], me.annexing[1])
+                  if me.annexing else None),
+        rivals=sorted(name[t] for t in me.rivals),
+        fabricating=((g.provinces[me.fabricating[0]].name,
+                      me.fabricating[1]) if me.fabricating else None),
+        war_exhaustion=me.war_exhaustion,
+        unrest_provinces=sum(1 for p in g.provinces_of(g.player)
+                             if p.unrest >= data.UNREST_WARN_AT),
+        coalition=[o.name for o in g.nations.values()
+                   if o.alive and o.in_coalition_against == g.player],
+        missions=[m["desc"] for m in g.missions],
+        great_powers=[(name[t], g.nations[t].color, engine.score(g, t),
+                       t == g.player) for t in ranked[:6]],
+    )
+    if sel_aid is not None and sel_aid in g.armies:
+        vm.army = _army(g, g.armies[sel_aid])
+    if sel_pid is not None and sel_pid in g.provinces:
+        p = g.provinces[sel_pid]
+        vm.province = _province(g, p, name)
+        if p.owner != g.player:
+            vm.owner = _owner(g, g.nations[p.owner], name)
+    return vm
+
+
+def _army(g: Game, a) -> ArmyView:
+    return ArmyView(
+        name=a.name, color=g.nations[a.owner].color,
+        regiments=a.regiments, men=a.men, morale=a.morale,
+        morale_max=engine.morale_max(g, a.owner),
+        location=g.provinces[a.location].name,
+        general=a.general, general_name=a.general_name,
+        moving_to=(g.provinces[a.move_target].name
+                   if a.move_target is not None else None),
+        reinforce=a.reinforce,
+        supply=engine.supply_limit(g, a.owner, a.location),
+        attrition=engine.attrition_fraction(g, a))
+
+
+def _province(g: Game, p, name: dict[str, str]) -> ProvinceView:
+    own = g.nations[p.owner]
+    cores = None
+    if p.cores != {p.owner}:
+        cores = ", ".join(name[t] for t in sorted(p.cores)
+                          if t in name) or "none"
+    return ProvinceView(
+        name=p.name, terrain=data.TERRAIN[p.terrain][0],
+        owner=own.name, owner_color=own.color,
+        capital=p.pid == own.capital, mine=p.owner == g.player,
+        dev=p.dev, dev_cost=p.dev_cost(), fort_level=p.fort_level,
+        tax=p.tax_income(),
+        supply=engine.supply_limit(g, g.player, p.pid),
+        unrest=p.unrest, cores=cores, owner_cored=p.owner in p.cores,
+        buildings=[data.BUILDINGS[b][0] for b in p.buildings],
+        occupier=name[p.occupier] if p.occupier else None,
+        sieging=name[p.sieging] if p.sieging else None,
+        siege_progress=p.siege_progress,
+        claimed=p.pid in g.nations[g.player].claims,
+        armies=[ArmyChip(name[a.owner], g.nations[a.owner].color,
+                         a.regiments, a.men)
+                for a in g.army_index.at(p.pid)[:4]])
+
+
+def _owner(g: Game, o, name: dict[str, str]) -> OwnerView:
+    me = g.nations[g.player]
+    rel = []
+    if o.overlord == g.player:
+        rel.append("YOUR VASSAL")
+    if me.overlord == o.tag:
+        rel.append("YOUR OVERLORD")
+    if o.tag in me.allies:
+        rel.append("ALLY")
+    if o.tag in me.rivals or g.player in o.rivals:
+        rel.append("RIVAL")
+    if g.at_war_with(g.player, o.tag):
+        rel.append("AT WAR")
+    if g.truce_between(g.player, o.tag):
+        until = me.truces.get(o.tag, 0)
+        rel.append(f"truce {(until - g.abs_month) // 12 + 1}y")
+    if o.in_coalition_against == g.player:
+        rel.append("IN COALITION VS YOU")
+    return OwnerView(
+        name=o.name, ruler=o.ruler, opinion=o.opinion_of(g.player),
+        ae=o.ae.get(g.player, 0), dev=g.total_dev(o.tag),
+        regiments=sum(a.regiments for a in g.armies_of(o.tag)),
+        overlord=name[o.overlord] if o.overlord else None,
+        vassals=[name[t] for t in g.vassals_of(o.tag)],
+        relations=rel)
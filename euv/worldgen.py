@@ -2,15 +2,25 @@
 
 A hand-drawn landmass mask is partitioned into provinces by flood fill from
 spread-out seed points, grouped into nations, and flavoured with terrain,
-cultures and names. The same seed always produces the same world.
+cultures and names. generate_scaled() swaps the mask for noise-shaped
+landmasses of any size. The same seed always produces the same world.
 """
 from __future__ import annotations
 
+import heapq
+import math
 import random
-from collections import deque
+import string
+from collections import Counter, deque
 
-from . import data
+try:
+    import numpy as np
+except ImportError:          # optional: only speeds up farthest-point seeds
+    np = None
+
+from . import data, pathfind
 from .model import Game, Nation, Province
+from .spatial import SpatialIndex, d2 as _d2
 
 # 60 x 22 cells. '#' land, '.' sea. Hand-shaped continent.
 LAND_MASK = [
@@ -40,6 +50,10 @@ LAND_MASK = [
 
 NATION_SIZES = [6, 6, 5, 5, 4, 4, 4, 3, 3, 3, 3, 2, 2, 2]
 
+# bump whenever a seed stops producing the same map: saves that rebuild
+# their map from the seed (see save.py) record it
+GENERATOR = 1
+
 
 def _land_cells(mask: list[str]) -> list[tuple[int, int]]:
     return [(x, y) for y, row in enumerate(mask)
@@ -48,21 +62,65 @@ def _land_cells(mask: list[str]) -> list[tuple[int, int]]:
 
 def _farthest_point_seeds(cells: list[tuple[int, int]], n: int,
                           rng: random.Random) -> list[tuple[int, int]]:
-    """Greedy farthest-point sampling for evenly spread seeds."""
-    seeds = [rng.choice(cells)]
-    dist = {c: _d2(c, seeds[0]) for c in cells}
+    """Greedy farthest-point sampling for evenly spread seeds.
+
+    Each pick is the cell farthest (by _d2) from all earlier picks, ties
+    going to the earliest cell in `cells`. Uses NumPy when importable.
+    """
+    first = rng.choice(cells)
+    if np is not None:
+        return _fps_numpy(cells, n, first)
+    return _fps_grid(cells, n, first)
+
+
+def _fps_grid(cells, n, first):
+    """Lazy max-heap of distances; a new seed only updates the buckets
+    within reach of the current farthest distance."""
+    size = max(1, math.isqrt(2 * len(cells) // n))   # about the seed spacing
+    buckets: dict[tuple[int, int], list[int]] = {}
+    for i, (x, y) in enumerate(cells):
+        buckets.setdefault((x // size, 2 * y // size), []).append(i)
+    lo_x = min(k[0] for k in buckets)
+    hi_x = max(k[0] for k in buckets)
+    lo_y = min(k[1] for k in buckets)
+    hi_y = max(k[1] for k in buckets)
+    dist = [_d2(c, first) for c in cells]
+    heap = [(-d, i) for i, d in enumerate(dist)]
+    heapq.heapify(heap)
+    seeds = [first]
     while len(seeds) < n:
-        best = max(cells, key=lambda c: dist[c])
+        while -heap[0][0] != dist[heap[0][1]]:   # superseded entry
+            heapq.heappop(heap)
+        reach, i = -heap[0][0], heap[0][1]
+        best = cells[i]
         seeds.append(best)
-        for c in cells:
-            d = _d2(c, best)
-            if d < dist[c]:
-                dist[c] = d
+        # only cells nearer than `reach` can improve: |dx|, |2dy| <= r
+        r = math.isqrt(reach)
+        bx, by = best[0], 2 * best[1]
+        for gy in range(max(lo_y, (by - r) // size),
+                        min(hi_y, (by + r) // size) + 1):
+            for gx in range(max(lo_x, (bx - r) // size),
+                            min(hi_x, (bx + r) // size) + 1):
+                for j in buckets.get((gx, gy), ()):
+                    d = _d2(cells[j], best)
+                    if d < dist[j]:
+                        dist[j] = d
+                        heapq.heappush(heap, (-d, j))
     return seeds
 
 
-def _d2(a, b):
-    return (a[0] - b[0]) ** 2 + (a[1] - b[1]) ** 2 * 4  # y weighted: cells are tall
+def _fps_numpy(cells, n, first):
+    """Whole-array distance updates; argmax keeps the first maximum."""
+    xy = np.array(cells, dtype=np.int64)
+    x, y = xy[:, 0], xy[:, 1]
+    dist = (x - first[0]) ** 2 + (y - first[1]) ** 2 * 4
+    seeds = [first]
+    while len(seeds) < n:
+        best = cells[int(dist.argmax())]
+        seeds.append(best)
+        np.minimum(dist, (x - best[0]) ** 2 + (y - best[1]) ** 2 * 4,
+                   out=dist)
+    return seeds
 
 
 def _flood_partition(cells, seeds):
@@ -118,16 +176,23 @@ def _terrain_for(culture: str, coastal: bool, y: int, h: int,
 
 def _make_name(culture: str, used: set[str], rng: random.Random) -> str:
     c = data.CULTURES[culture]
-    for _ in range(200):
-        name = rng.choice(c["prov"]) + rng.choice(c["suff"])
-        if name not in used:
-            used.add(name)
-            return name
+    combos = len(c["prov"]) * len(c["suff"])
+    if len(used) < combos or not _all_used(culture, used):
+        for _ in range(200):
+            name = rng.choice(c["prov"]) + rng.choice(c["suff"])
+            if name not in used:
+                used.add(name)
+                return name
     name = rng.choice(c["prov"]) + rng.choice(c["suff"]) + str(len(used))
     used.add(name)
     return name
 
 
+def _all_used(culture: str, used: set[str]) -> bool:
+    c = data.CULTURES[culture]
+    return all(p + s in used for p in c["prov"] for s in c["suff"])
+
+
 def _make_tag(name: str, used: set[str]) -> str:
     base = "".join(ch for ch in name.upper() if ch.isalpha())
     for cand in (base[:3], base[0] + base[2:4], base[:2] + base[-1]):
@@ -139,11 +204,18 @@ def _make_tag(name: str, used: set[str]) -> str:
         if cand not in used:
             used.add(cand)
             return cand
+    for a in string.ascii_uppercase + string.digits:
+        for b in string.ascii_uppercase + string.digits:
+            cand = base[0] + a + b
+            if cand not in used:
+                used.add(cand)
+                return cand
     raise ValueError("tag space exhausted")
 
 
 def generate(seed: int = 7) -> Game:
     g = Game(seed)
+    g.world = ()
     rng = g.rng
     mask = LAND_MASK
     g.height, g.width = len(mask), len(mask[0])
@@ -152,7 +224,143 @@ def generate(seed: int = 7) -> Game:
     n_prov = 52
     seeds = _farthest_point_seeds(cells, n_prov, rng)
     owner = _flood_partition(cells, seeds)
+    _build_world(g, rng, mask, owner, NATION_SIZES)
+    return g
+
+
+def generate_scaled(seed: int = 7, width: int = 120, height: int = 44,
+                    provinces: int = 200, nations: int = 40,
+                    land: float = 0.5) -> Game:
+    """A world of any size: noise-shaped landmasses instead of LAND_MASK.
 
+    `land` is the fraction of cells that are land. 400 x 150 cells with
+    5,000 provinces and 300 nations takes a few seconds; like generate(),
+    the same arguments always give the same world.
+    """
+    if not 0 < nations <= provinces:
+        raise ValueError("need 1 <= nations <= provinces")
+    g = Game(seed)
+    g.world = (width, height, provinces, nations, land)
+    rng = g.rng
+    g.height, g.width = height, width
+    mask = _noise_mask(width, height, land, provinces, rng)
+    cells = _land_cells(mask)
+    if len(cells) < provinces:
+        raise ValueError(f"{len(cells)} land cells cannot hold "
+                         f"{provinces} provinces")
+    seeds = _spaced_seeds(cells, provinces, rng)
+    owner = _flood_partition(cells, seeds)
+    _build_world(g, rng, mask, owner, _nation_sizes(provinces, nations, rng))
+    return g
+
+
+def _noise_mask(w: int, h: int, land: float, provinces: int,
+                rng: random.Random) -> list[str]:
+    """Fractal value noise, faded towards the edges, cut at the `land`
+    quantile. Specks too small to hold a province are sunk."""
+    field = [[0.0] * w for _ in range(h)]
+    amp, step = 1.0, max(w, 2 * h) / 3
+    while step >= 2:
+        gw, gh = int(w / step) + 2, int(h * 2 / step) + 2
+        lattice = [[rng.random() for _ in range(gw)] for _ in range(gh)]
+        for y in range(h):
+            fy = y * 2 / step          # cells are tall: y counts double
+            iy = int(fy)
+            ty = fy - iy
+            ty = ty * ty * (3 - 2 * ty)
+            row0, row1, out = lattice[iy], lattice[iy + 1], field[y]
+            for x in range(w):
+                fx = x / step
+                ix = int(fx)
+                tx = fx - ix
+                tx = tx * tx * (3 - 2 * tx)
+                top = row0[ix] + (row0[ix + 1] - row0[ix]) * tx
+                bot = row1[ix] + (row1[ix + 1] - row1[ix]) * tx
+                out[x] += amp * (top + (bot - top) * ty)
+        amp, step = amp * 0.5, step / 2
+    for y in range(h):
+        ey = min(y + 1, h - y) / h
+        for x in range(w):
+            ex = min(x + 1, w - x) / w
+            field[y][x] *= min(1.0, 6 * min(ex, ey))   # seas at the rim
+    ranked = sorted(v for row in field for v in row)
+    cut = ranked[min(len(ranked) - 1, int(len(ranked) * (1 - land)))]
+    grid = [[v > cut for v in row] for row in field]
+
+    min_cells = max(4, w * h * land / provinces / 2)
+    seen: set[tuple[int, int]] = set()
+    for y in range(h):
+        for x in range(w):
+            if not grid[y][x] or (x, y) in seen:
+                continue
+            blob, q = [(x, y)], deque([(x, y)])
+            seen.add((x, y))
+            while q:
+                cx, cy = q.popleft()
+                for nx, ny in ((cx+1, cy), (cx-1, cy), (cx, cy+1), (cx, cy-1)):
+                    if (0 <= nx < w and 0 <= ny < h and grid[ny][nx]
+                            and (nx, ny) not in seen):
+                        seen.add((nx, ny))
+                        blob.append((nx, ny))
+                        q.append((nx, ny))
+            if len(blob) < min_cells:
+                for bx, by in blob:
+                    grid[by][bx] = False
+    return ["".join("#" if v else "." for v in row) for row in grid]
+
+
+def _spaced_seeds(cells: list[tuple[int, int]], n: int,
+                  rng: random.Random) -> list[tuple[int, int]]:
+    """Dart throwing: evenly spread seeds in one pass per spacing.
+
+    Cells are visited in a shuffled order and kept if no kept seed is
+    within the spacing (under _d2); the spacing shrinks until n are kept.
+    Linear in cells, where farthest-point sampling is cells x seeds.
+    """
+    order = list(cells)
+    rng.shuffle(order)
+    r2 = 2 * len(cells) / n               # _d2 units: cells are 1 x 2
+    seeds: list[tuple[int, int]] = []
+    taken: set[tuple[int, int]] = set()
+    while len(seeds) < n:
+        size = max(1, int(r2 ** 0.5))
+        buckets: dict[tuple[int, int], list[tuple[int, int]]] = {}
+        for s in seeds:
+            buckets.setdefault((s[0] // size, 2 * s[1] // size), []).append(s)
+        for c in order:
+            if c in taken:
+                continue
+            bx, by = c[0] // size, 2 * c[1] // size
+            if any(_d2(c, s) < r2
+                   for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                   for s in buckets.get((bx + dx, by + dy), ())):
+                continue
+            seeds.append(c)
+            taken.add(c)
+            buckets.setdefault((bx, by), []).append(c)
+            if len(seeds) == n:
+                break
+        r2 *= 0.7
+    return seeds
+
+
+def _nation_sizes(provinces: int, nations: int,
+                  rng: random.Random) -> list[int]:
+    """Target province counts, skewed like NATION_SIZES, summing to
+    `provinces`."""
+    weights = [rng.uniform(0.3, 1.0) ** 2 for _ in range(nations)]
+    total = sum(weights)
+    sizes = [max(1, int(provinces * w / total)) for w in weights]
+    i = 0
+    while sum(sizes) < provinces:
+        sizes[i % nations] += 1
+        i += 1
+    return sizes
+
+
+def _build_world(g: Game, rng: random.Random, mask: list[str],
+                 owner: dict[tuple[int, int], int], sizes: list[int]):
+    """Provinces, adjacency, straits and nations from a partitioned mask."""
     # group cells per province, drop tiny fragments into neighbours
     prov_cells: dict[int, list[tuple[int, int]]] = {}
     for c, pid in owner.items():
@@ -192,9 +400,9 @@ def generate(seed: int = 7) -> Game:
                         g.provinces[other].neighbors.add(pid)
 
     _connect_islands(g)
-    _assign_nations(g, rng)
+    g.topology = pathfind.build_topology(g)
+    _assign_nations(g, rng, sizes)
     make_rebels(g)
-    return g
 
 
 def make_rebels(g: Game):
@@ -206,7 +414,7 @@ def make_rebels(g: Game):
         return
     g.nations[data.REBEL_TAG] = Nation(
         tag=data.REBEL_TAG, name="Rebels", culture="aurean",
-        color=14, capital=min(g.provinces), ruler="The Mob",
+        color=data.REBEL_COLOR, capital=min(g.provinces), ruler="The Mob",
         gold=0.0, manpower=0.0, stability=0)
 
 
@@ -229,32 +437,38 @@ def _connect_islands(g: Game):
         cid += 1
     if cid <= 1:
         return
-    sizes = {i: sum(1 for p in comp.values() if p == i) for i in range(cid)}
-    main = max(sizes, key=lambda i: sizes[i])
-    for i in range(cid):
-        if i == main:
-            continue
-        island = [p for p in pids if comp[p] == i]
-        mainland = [p for p in pids if comp[p] == main]
-        a, b = min(((a, b) for a in island for b in mainland),
-                   key=lambda ab: _d2(g.provinces[ab[0]].center,
-                                      g.provinces[ab[1]].center))
+    sizes = Counter(comp.values())
+    main = max(range(cid), key=lambda i: sizes[i])
+    mainland = SpatialIndex({p: g.provinces[p].center for p in pids
+                             if comp[p] == main})
+    islands: dict[int, list[int]] = {}
+    for p in pids:
+        if comp[p] != main:
+            islands.setdefault(comp[p], []).append(p)
+    for _, island in sorted(islands.items()):
+        # closest (island, mainland) pair; ties to the lowest ids
+        pairs = []
+        for a in island:
+            d, b = next(mainland.nearby(g.provinces[a].center))
+            pairs.append((d, a, b))
+        _, a, b = min(pairs)
         g.provinces[a].neighbors.add(b)
         g.provinces[b].neighbors.add(a)
         g.straits.add((min(a, b), max(a, b)))
 
 
-def _assign_nations(g: Game, rng: random.Random):
+def _assign_nations(g: Game, rng: random.Random,
+                    nation_sizes: list[int] = NATION_SIZES):
     pids = list(g.provinces)
     centers = {pid: g.provinces[pid].center for pid in pids}
 
     # nation capitals: farthest-point sampling over province centers
     cap_cells = _farthest_point_seeds([centers[p] for p in pids],
-                                      len(NATION_SIZES), rng)
+                                      len(nation_sizes), rng)
     cell_to_pid = {centers[p]: p for p in pids}
     capitals = [cell_to_pid[c] for c in cap_cells]
 
-    sizes = list(NATION_SIZES)
+    sizes = list(nation_sizes)
     rng.shuffle(sizes)
     used_tags: set[str] = set()
     used_nation_names: set[str] = set()
@@ -306,7 +520,7 @@ def _assign_nations(g: Game, rng: random.Random):
             counts[i] += 1
 
     # create nations
-    palette = list(range(len(capitals)))
+    palette = [i % data.REBEL_COLOR for i in range(len(capitals))]
     for i, cap in enumerate(capitals):
         culture = g.provinces[cap].culture
         names = [n for n in data.CULTURES[culture]["nation"]
@@ -314,7 +528,10 @@ def _assign_nations(g: Game, rng: random.Random):
         if not names:
             names = [n for c in data.CULTURES.values() for n in c["nation"]
                      if n not in used_nation_names]
-        name = rng.choice(names)
+        if names:
+            name = rng.choice(names)
+        else:                            # big worlds outgrow the name lists
+            name = _make_name(culture, used_nation_names, rng)
         used_nation_names.add(name)
         tag = _make_tag(name, used_tags)
         ruler = (f"{data.RULER_TITLE[culture]} "
@@ -326,7 +543,7 @@ def _assign_nations(g: Game, rng: random.Random):
     tags = list(g.nations)
     for pid, i in assignment.items():
         p = g.provinces[pid]
-        p.owner = tags[i]
+        g.set_owner(pid, tags[i])
         p.cores.add(tags[i])           # initial owners core their land
         p.owner_since = g.abs_month
 
@@ -334,6 +551,7 @@ def _assign_nations(g: Game, rng: random.Random):
     for tag, n in g.nations.items():
         cap = g.provinces[n.capital]
         cap.dev = max(cap.dev, rng.randint(8, 10))
+        g.invalidate(tag)
         n.manpower = g.manpower_max(tag) * 0.7
         regs = max(2, int(g.force_limit(tag) * 0.6))
         g.new_army(tag, n.capital, regs)
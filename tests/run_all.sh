@@ -2,6 +2,10 @@
 # Full test suite: engine balance sims + scripted TUI sessions.
 set -euo pipefail
 cd "$(dirname "$0")/.."
+# saves, autosaves and map caches go to a scratch home, not the user's
+HOME="$(mktemp -d)"
+export HOME
+trap 'rm -rf "$HOME"' EXIT
 echo "== engine simulations =="
 for seed in 7 13 42 99; do
     python3 tests/sim.py "$seed" 100 > /dev/null && echo "sim seed $seed ok"
@@ -16,6 +20,34 @@ echo "== rivalries, war goals, stability scaling =="
 python3 tests/test_rivals.py | tail -1
 echo "== vassals, cores & reconquest =="
 python3 tests/test_vassals.py | tail -1
+echo "== maintained indexes vs full scans =="
+python3 tests/test_indexes.py | tail -1
+echo "== A* pathfinding vs reference BFS =="
+python3 tests/test_pathfind.py | tail -1
+echo "== tick timing instrumentation =="
+python3 tests/test_timing.py | tail -1
+echo "== parallel simulation sweeps =="
+python3 tests/test_sim.py | tail -1
+echo "== scaled world generation =="
+python3 tests/test_worldgen.py | tail -1
+echo "== spatial index vs brute force =="
+python3 tests/test_spatial.py | tail -1
+echo "== binary and JSON saves =="
+python3 tests/test_save.py | tail -1
+echo "== command recording and replay =="
+python3 tests/test_replay.py | tail -1
+echo "== golden state hash streams =="
+python3 tests/test_statehash.py | tail -1
+echo "== cheap game forks =="
+python3 tests/test_fork.py | tail -1
+echo "== incremental map drawing =="
+python3 tests/test_render.py | tail -1
+echo "== bytes sent per frame =="
+python3 tests/test_termbytes.py | tail -1
+echo "== panel view model =="
+python3 tests/test_viewmodel.py | tail -1
+echo "== background fast-forward =="
+python3 tests/test_fastforward.py | tail -1
 echo "== TUI: scripted session =="
 python3 tests/tui_driver.py | tail -1
 echo "== TUI: war & peace flow =="
@@ -1,40 +1,39 @@
-"""Headless balance/stability simulation: run the world all-AI for N years."""
+"""Headless balance/stability simulation: run the world all-AI for N years.
+
+For sweeps over many seeds use `python3 -m euv sim` (see euv/sim.py).
+"""
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-from euv import ai, engine, worldgen
+from euv import engine, timing, worldgen
+from euv import sim as simulation
 
 
-def run(seed=7, years=100, verbose=True):
+def run(seed=7, years=100, verbose=True, timing_path=None):
     g = worldgen.generate(seed)
-    g.player = ""   # all AI
-    start_nations = sum(1 for n in g.nations.values()
-                    if n.alive and n.tag != 'REB')
-    wars_seen = 0
-    for _ in range(years * 12):
-        before = len(g.wars)
-        engine.advance_month(g, ai_module=ai)
-        if len(g.wars) > before:
-            wars_seen += len(g.wars) - before
-    alive = [t for t, n in g.nations.items()
-         if n.alive and t != 'REB']
+    if timing_path:
+        timing.enable(g)
+    wars_seen = simulation.simulate(g, years)
+    m = simulation.metrics(g, seed, years, wars_seen)
+    alive = list(m["scores"])
     if verbose:
-        print(f"seed={seed} after {years}y: {len(alive)}/{start_nations} "
-              f"nations alive, {wars_seen} wars started, "
-              f"{len(g.wars)} ongoing")
-        rank = sorted(alive, key=lambda t: -engine.score(g, t))
-        for t in rank:
+        print(f"seed={seed} after {years}y: {m['nations_alive']}/"
+              f"{m['nations_start']} nations alive, {wars_seen} wars "
+              f"started, {m['wars_ongoing']} ongoing")
+        for t in alive:
             n = g.nations[t]
             print(f"  {t} {n.name:10} provs={len(g.provinces_of(t)):2} "
                   f"dev={g.total_dev(t):3} gold={n.gold:7.0f} "
                   f"mp={n.manpower:6.0f} stab={n.stability:+d} "
                   f"armies={sum(a.regiments for a in g.armies_of(t))} "
                   f"score={engine.score(g, t):.0f}")
-        cats = {}
-        for c, _ in g.log:
-            cats[c] = cats.get(c, 0) + 1
-        print("  log:", cats)
+        print("  log:", m["log"])
+        rates = g.tick_cache.hit_rates()
+        print("  tick cache hits:", ", ".join(
+            f"{name} {rate:.0%}" for name, rate in rates.items()))
+        if g.timing is not None:
+            print(g.timing.summary())
     # sanity assertions
     assert alive, "everyone died"
     assert wars_seen > 0, "no wars ever happened"
@@ -42,10 +41,14 @@ def run(seed=7, years=100, verbose=True):
         assert g.nations[t].gold > -100000, f"{t} runaway debt"
     total_provs = sum(len(g.provinces_of(t)) for t in alive)
     assert total_provs == len(g.provinces), "provinces lost owner"
+    if timing_path:
+        g.timing.dump(timing_path)
+        timing.disable(g)
     return g
 
 
 if __name__ == "__main__":
     seed = int(sys.argv[1]) if len(sys.argv) > 1 else 7
     years = int(sys.argv[2]) if len(sys.argv) > 2 else 100
-    run(seed, years)
+    report = sys.argv[3] if len(sys.argv) > 3 else None   # .json / .csv
+    run(seed, years, timing_path=report)
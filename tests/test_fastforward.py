@@ -0,0 +1,119 @@
+"""Fast-forward on a worker thread: same months, same stops, readable."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import ai, data, engine, statehash, worldgen
+from euv.fastforward import FastForward
+
+
+def blocking(g, months):
+    """The turn loop as it ran on the UI thread: months done, why stopped."""
+    wars = len(g.wars_of(g.player))
+    for done in range(1, months + 1):
+        engine.advance_month(g, ai_module=ai)
+        if g.game_over:
+            return done, "over"
+        if g.pending_events:
+            return done, "event"
+        if len(g.wars_of(g.player)) != wars:
+            return done, "war"
+        if g.year >= data.END_YEAR and g.month == 0:
+            return done, "end"
+    return months, "done"
+
+
+def player_world(seed):
+    g = worldgen.generate(seed)
+    engine.choose_nation(g, max(g.nations, key=g.total_dev))
+    return g
+
+
+def test_same_months_and_stops_as_the_blocking_loop():
+    stops = set()
+    for seed in (3, 7, 11):
+        g = player_world(seed)
+        for _ in range(8):
+            ref = g.fork()
+            want = blocking(ref, 24)
+            ff = FastForward(g, 24, ai_module=ai)
+            ff.start()
+            reason = ff.result()
+            assert (ff.done, reason) == want, (seed, ff.done, reason, want)
+            assert statehash.state_hash(g) == statehash.state_hash(ref)
+            stops.add(ff.reason)
+            g.pending_events.clear()        # as if the player answered
+    assert "event" in stops and len(stops) >= 2, stops
+    print(f"ok: worker turns match the blocking loop (stops: "
+          f"{', '.join(sorted(stops))})")
+
+
+def test_stop_lands_on_a_month_boundary():
+    g = worldgen.generate(5)
+    g.player = max(g.nations, key=g.total_dev)
+    ref = g.fork()
+    calls = []
+
+    def answer(g):                  # nobody is there to read popups
+        calls.append(g.abs_month)
+        g.pending_events.clear()
+
+    ff = FastForward(g, 1200, ai_module=ai, on_month=answer)
+    ff.start()
+    while ff.done < 5:
+        time.sleep(0.001)
+    ff.stop()
+    assert ff.result() == "stopped" and 5 <= ff.done < 1200
+    assert len(calls) == ff.done and ff.rate() > 0
+    g.verify_indexes()
+    for _ in range(ff.done):
+        engine.advance_month(ref, ai_module=ai)
+        ref.pending_events.clear()
+    assert statehash.state_hash(g) == statehash.state_hash(ref)
+    print(f"ok: stop() halted after {ff.done} whole months "
+          f"({ff.rate():.0f} months/s)")
+
+
+def test_a_reader_gets_the_lock_between_months():
+    g = worldgen.generate(9)
+    g.player = max(g.nations, key=g.total_dev)
+    ff = FastForward(g, 120, ai_module=ai,
+                     on_month=lambda g: g.pending_events.clear())
+    seen = []
+    ff.start()
+    while not ff.wait(0.002):
+        with ff.lock:
+            g.verify_indexes()          # never half a month
+            seen.append(ff.done)
+    assert ff.result() in ("done", "war", "over", "end")
+    assert len(set(seen)) >= 3, seen
+    print(f"ok: a reader held the lock {len(seen)} times mid-run and "
+          f"always saw whole months")
+
+
+def test_worker_errors_reach_the_caller():
+    g = worldgen.generate(3)
+    g.player = max(g.nations, key=g.total_dev)
+
+    def broken(g):
+        raise RuntimeError("boom")
+
+    ff = FastForward(g, 12, ai_module=ai, on_month=broken)
+    ff.start()
+    try:
+        ff.result()
+    except RuntimeError as e:
+        assert str(e) == "boom" and ff.reason == "error"
+    else:
+        raise AssertionError("the worker's error must not be swallowed")
+    print("ok: an error on the worker is raised by result()")
+
+
+if __name__ == "__main__":
+    test_same_months_and_stops_as_the_blocking_loop()
+    test_stop_lands_on_a_month_boundary()
+    test_a_reader_gets_the_lock_between_months()
+    test_worker_errors_reach_the_caller()
+    print("ALL FAST-FORWARD TESTS PASSED")
@@ -0,0 +1,91 @@
+"""Game.fork(): shares the map, copies the rest, plays on identically."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import engine, sim, statehash, timing, worldgen
+
+
+def check_fork(g, years):
+    before = statehash.state_hash(g)
+    f = g.fork()
+    assert statehash.state_hash(f) == before
+    f.verify_indexes()
+    assert f.grid is g.grid and f.topology is g.topology
+    for pid, p in g.provinces.items():
+        q = f.provinces[pid]
+        assert q is not p and q.cells is p.cells and \
+            q.neighbors is p.neighbors
+        assert q.cores is not p.cores and q.buildings is not p.buildings
+    for tag, n in g.nations.items():
+        assert f.nations[tag].opinions is not n.opinions
+    assert all(f.armies[aid] is not a for aid, a in g.armies.items())
+    assert f.rng is not g.rng
+
+    ahead = []
+    sim.simulate(f, years, ahead)            # the fork looks ahead...
+    assert statehash.state_hash(g) == before  # ...the original stays put
+    f.verify_indexes()
+    behind = []
+    sim.simulate(g, years, behind)
+    assert statehash.first_divergence(ahead, behind) is None
+    return len(ahead)
+
+
+def test_fork_plays_on_like_the_original():
+    g = worldgen.generate(7)
+    sim.simulate(g, 40)
+    assert g.wars or g.armies
+    months = check_fork(g, 10)
+    print(f"ok: a fork plays {months} months exactly as the original does")
+
+
+def test_fork_of_a_player_game():
+    g = worldgen.generate(3)
+    tag = max(g.nations, key=g.total_dev)
+    engine.choose_nation(g, tag)
+    f = g.fork()
+    f.nations[tag].gold = 10_000
+    ok, msg = engine.develop(f, tag, g.nations[tag].capital)
+    assert ok, msg
+    assert g.nations[tag].gold < 10_000
+    f.say("event", "only in the fork")
+    assert f.provinces[f.nations[tag].capital].dev != \
+        g.provinces[g.nations[tag].capital].dev
+    assert g.log[-1][1] != "only in the fork"
+    assert f.missions == g.missions and f.missions[0] is not g.missions[0]
+    print("ok: player actions in a fork leave the original untouched")
+
+
+def test_fork_of_a_timed_game():
+    g = worldgen.generate(7)
+    timing.enable(g)
+    f = g.fork()
+    assert f.timing is None and "provinces_of" not in vars(f)
+    p = f.provinces_of(max(g.nations, key=g.total_dev))[0]
+    assert p is not g.provinces[p.pid]
+    old = p.owner
+    other = next(t for t in f.nations if t != old)
+    engine._transfer_province(f, p.pid, other)
+    assert p not in f.provinces_of(old) and p in f.provinces_of(other)
+    assert g.provinces[p.pid].owner == old
+    f.verify_indexes()
+    g.verify_indexes()
+    timing.disable(g)
+    print("ok: a fork of a timed game reads and changes only itself")
+
+
+def test_fork_large_world():
+    g = worldgen.generate_scaled(5, 200, 75, 1000, 80)
+    sim.simulate(g, 1)
+    check_fork(g, 1)
+    print("ok: forks of a 1000-province world match too")
+
+
+if __name__ == "__main__":
+    test_fork_plays_on_like_the_original()
+    test_fork_of_a_player_game()
+    test_fork_of_a_timed_game()
+    test_fork_large_world()
+    print("ALL FORK TESTS PASSED")
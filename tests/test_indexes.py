@@ -0,0 +1,152 @@
+"""Maintained Game indexes agree with brute-force scans (headless)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import ai, data, engine, save, worldgen
+
+
+def fresh(seed=7):
+    g = worldgen.generate(seed)
+    g.player = ""               # all AI
+    return g
+
+
+def test_indexes_through_a_century():
+    for seed in (13, 42):
+        g = fresh(seed)
+        g.check_indexes = True          # verify_indexes() every month
+        for _ in range(100 * 12):
+            engine.advance_month(g, ai_module=ai)
+    print("ok: ownership, army and war indexes match full scans over 100 years")
+
+
+def test_index_survives_direct_deletes():
+    g = fresh()
+    tag = next(t for t in sorted(g.nations) if g.armies_of(t))
+    for a in list(g.armies.values()):
+        del g.armies[a.aid]
+    assert not g.armies_of(tag)
+    a = g.new_army(tag, g.nations[tag].capital, 2)
+    assert g.armies_of(tag) == [a]
+    engine.disband_army(g, a.aid)
+    assert not g.armies_of(tag)
+    g.verify_indexes()
+    print("ok: army index follows del / pop on the table")
+
+
+def test_army_index_follows_moves():
+    g = fresh()
+    tag = next(t for t in sorted(g.nations) if g.armies_of(t))
+    a = g.armies_of(tag)[0]
+    pid = a.location
+    if a.regiments < 2:
+        engine.recruit(g, tag, pid)     # joins the army already there
+    ok, _ = engine.split_army(g, a.aid)
+    assert ok and len(g.army_index.stack(pid, tag)) == 2
+    regs = g.army_index.regiments(pid, tag)
+    b = g.army_index.stack(pid, tag)[-1]
+    nb = min(g.provinces[pid].neighbors)
+    engine.move_army(g, b.aid, nb)
+    engine._movement_phase(g)
+    assert b in g.army_index.at(nb) and b not in g.army_index.at(pid)
+    assert g.army_index.regiments(pid, tag) + \
+        g.army_index.regiments(nb, tag) == regs
+    engine.move_army(g, b.aid, pid)
+    engine._movement_phase(g)         # marches back and merges
+    assert b.aid not in g.armies and g.army_index.regiments(pid, tag) == regs
+    engine.disband_army(g, a.aid)
+    assert not g.army_index.stack(pid, tag)
+    assert g.army_index.regiments(pid, tag) == 0
+    g.verify_indexes()
+    print("ok: army index follows split, move, merge and disband")
+
+
+def test_transfer_and_elimination():
+    g = fresh()
+    small = min((t for t in g.nations if t != data.REBEL_TAG),
+                key=lambda t: len(g.provinces_of(t)))
+    taker = next(t for t in sorted(g.nations)
+                 if t not in (small, data.REBEL_TAG))
+    for p in g.provinces_of(small):
+        engine._transfer_province(g, p.pid, taker)
+    assert not g.provinces_of(small)
+    assert not g.armies_of(small), "eliminated nations keep no armies"
+    assert not g.nations[small].alive
+    g.verify_indexes()
+    print("ok: transfers and elimination keep the indexes exact")
+
+
+def test_war_index_follows_edits():
+    g = fresh()
+    tags = sorted(t for t in g.nations if t != data.REBEL_TAG)
+    a, b, c = tags[:3]
+    w = g.new_war([a], [b], None)
+    assert g.at_war_with(a, b) and g.at_war_with(b, a)
+    assert not g.at_war_with(a, c)
+    g.join_war(w, c, "def")
+    assert g.at_war_with(a, c) and not g.at_war_with(b, c)
+    assert g.wars_of(c) == [w] and g.enemies_of(a) == {b, c}
+    w2 = g.new_war([c], [a], None)
+    g.verify_indexes()
+    del g.wars[w.wid]                   # as a test or a peace would
+    assert g.at_war_with(a, c), "still enemies in the second war"
+    assert not g.at_war_with(a, b) and g.wars_of(b) == []
+    g.wars.pop(w2.wid)
+    assert not g.enemies_of(a)
+    g.verify_indexes()
+    print("ok: war index follows joins, deletes and overlapping wars")
+
+
+def test_tick_cache_invalidation():
+    g = fresh()
+    tag = next(t for t in sorted(g.nations) if t != data.REBEL_TAG)
+    p = g.provinces_of(tag)[0]
+    g.nations[tag].gold = 10_000
+    dev, mp = g.total_dev(tag), g.manpower_max(tag)
+    income = engine.monthly_balance(g, tag)[0]
+    hits = g.tick_cache.hits.get("total_dev", 0)
+    assert g.total_dev(tag) == dev
+    assert g.tick_cache.hits["total_dev"] == hits + 1
+    engine.develop(g, tag, p.pid)
+    assert g.total_dev(tag) == dev + 1
+    assert engine.monthly_balance(g, tag)[0] > income
+    engine.build(g, tag, p.pid, "barracks")
+    assert g.manpower_max(tag) > mp
+    other = next(t for t in sorted(g.nations)
+                 if t not in (tag, data.REBEL_TAG))
+    before = g.total_dev(other)
+    engine._transfer_province(g, p.pid, other)
+    assert g.total_dev(other) == before + p.dev
+    assert not g.tick_cache.stale()
+    rates = g.tick_cache.hit_rates()
+    assert 0 < rates["total_dev"] < 1
+    print("ok: tick cache drops a nation's values when its land changes")
+
+
+def test_index_rebuilt_on_load():
+    import tempfile
+    g = fresh()
+    for _ in range(36):
+        engine.advance_month(g, ai_module=ai)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "s.json")
+        save.save(g, path)
+        g2 = save.load(path)
+    g2.verify_indexes()
+    for tag in g.nations:
+        assert [p.pid for p in g.provinces_of(tag)] == \
+            [p.pid for p in g2.provinces_of(tag)]
+    print("ok: indexes rebuilt on load")
+
+
+if __name__ == "__main__":
+    test_indexes_through_a_century()
+    test_index_survives_direct_deletes()
+    test_army_index_follows_moves()
+    test_transfer_and_elimination()
+    test_war_index_follows_edits()
+    test_tick_cache_invalidation()
+    test_index_rebuilt_on_load()
+    print("ALL INDEX TESTS PASSED")
@@ -0,0 +1,158 @@
+"""A* pathfinding returns the same routes the reference BFS did (headless)."""
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import ai, data, engine, pathfind, save, worldgen
+from euv.spatial import d2
+
+
+def fresh(seed=7):
+    g = worldgen.generate(seed)
+    g.player = ""               # all AI
+    return g
+
+
+def bfs_path(g, tag, start, goal):
+    """The original breadth-first search, kept as the reference."""
+    if start == goal:
+        return [start]
+    prev = {start: -1}
+    q = deque([start])
+    while q:
+        cur = q.popleft()
+        for nb in sorted(g.provinces[cur].neighbors):
+            if nb in prev:
+                continue
+            if nb != goal and not engine.can_pass(g, tag, nb):
+                continue
+            prev[nb] = cur
+            if nb == goal:
+                path = [goal]
+                while path[-1] != start:
+                    path.append(prev[path[-1]])
+                return path[::-1]
+            q.append(nb)
+    return None
+
+
+def check_all_pairs(g, tags):
+    pids = sorted(g.provinces)
+    for tag in tags:
+        for s in pids:
+            for t in pids:
+                assert engine.find_path(g, tag, s, t) == bfs_path(g, tag, s, t), \
+                    (tag, s, t)
+
+
+def test_matches_bfs_over_a_campaign():
+    for seed in (7, 42):
+        g = fresh(seed)
+        rng = random.Random(seed)
+        for year in range(60):
+            for _ in range(12):
+                engine.advance_month(g, ai_module=ai)
+            if year % 30 == 29:
+                alive = sorted(t for t, n in g.nations.items() if n.alive)
+                check_all_pairs(g, rng.sample(alive, 3) + [data.REBEL_TAG])
+    print("ok: A* routes equal BFS routes for every pair, mid-campaign")
+
+
+def test_passage_changes_within_a_month():
+    g = fresh()
+    tags = sorted(t for t in g.nations if t != data.REBEL_TAG)
+    a = tags[0]
+    home = g.nations[a].capital
+    far = next(t for t in tags[1:]
+               if not any(g.provinces[nb].owner == a
+                          for p in g.provinces_of(t) for nb in p.neighbors)
+               and g.provinces_of(t))
+    inner = [p.pid for p in g.provinces_of(far)
+             if all(g.provinces[nb].owner == far
+                    for nb in g.provinces[p.pid].neighbors)]
+    goal = g.provinces_of(far)[0].pid
+    before = engine.find_path(g, a, home, goal)
+    assert before == bfs_path(g, a, home, goal)
+    g.ally(a, far)                       # same month: must not reuse bitmap
+    assert engine.find_path(g, a, home, goal) == bfs_path(g, a, home, goal)
+    for pid in inner:
+        assert engine.find_path(g, a, home, pid) == bfs_path(g, a, home, pid)
+    g.unally(a, far)
+    w = g.new_war([a], [far], None)
+    assert engine.find_path(g, a, home, goal) == bfs_path(g, a, home, goal)
+    del g.wars[w.wid]
+    g.set_overlord(far, a)
+    assert engine.find_path(g, a, home, goal) == bfs_path(g, a, home, goal)
+    print("ok: alliances, wars and vassalage reach the passage bitmap at once")
+
+
+def test_route_cache_follows_passage():
+    g = fresh()
+    tag = max((t for t in g.nations if t != data.REBEL_TAG),
+              key=lambda t: len(g.provinces_of(t)))
+    a = g.armies_of(tag)[0]
+    goal = max((p.pid for p in g.provinces_of(tag)),
+               key=lambda pid: len(bfs_path(g, tag, a.location, pid) or []))
+    planned = engine.find_path(g, tag, a.location, goal)
+    assert len(planned) > 2
+    ok, _ = engine.move_army(g, a.aid, goal)
+    assert ok
+    calls = []
+    real = engine.find_path
+    engine.find_path = lambda *args: calls.append(args) or real(*args)
+    try:
+        engine._movement_phase(g)
+        assert a.location == planned[1] and not calls, "route reused"
+        other = next(t for t in sorted(g.nations)
+                     if t not in (tag, data.REBEL_TAG))
+        g.ally(tag, other)               # passage changed: plan again
+        engine._movement_phase(g)
+        assert len(calls) == 1 and a.location == planned[2]
+    finally:
+        engine.find_path = real
+    print("ok: marching armies reuse their route until passage changes")
+
+
+def test_topology_rebuilt_on_load():
+    import tempfile
+    g = fresh()
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "s.json")
+        save.save(g, path)
+        g2 = save.load(path)
+    assert g2.topology == g.topology
+    print("ok: topology rebuilt on load")
+
+
+def test_distance_and_hop_tables():
+    g = fresh()
+    topo = pathfind.topology(g)
+    for a in g.provinces:
+        for b in g.provinces:
+            assert topo.dist(a, b) == pathfind.center_dist(g, a, b) == \
+                d2(g.provinces[a].center, g.provinces[b].center) ** 0.5
+            path = bfs_path(g, data.REBEL_TAG, a, b)   # rebels go anywhere
+            assert topo.hops(a, b) == len(path) - 1
+    small = pathfind.HopTable(topo.adj)
+    small.max_rows = 4
+    for a in range(10):
+        assert small.row(a) == topo.hops.row(a)
+    assert len(small._rows) == 4 and 9 in small._rows
+    assert topo.dist.complete and topo.hops.complete
+    big = worldgen.generate_scaled(2, 300, 110, 3000, 60)
+    table = pathfind.topology(big).dist
+    assert not table.complete
+    assert table.max_rows * 3000 * 8 <= pathfind.TABLE_BYTES
+    print("ok: distance and hop tables are exact and bounded")
+
+
+if __name__ == "__main__":
+    test_matches_bfs_over_a_campaign()
+    test_passage_changes_within_a_month()
+    test_route_cache_follows_passage()
+    test_topology_rebuilt_on_load()
+    test_distance_and_hop_tables()
+    print("ALL PATHFIND TESTS PASSED")
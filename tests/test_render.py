@@ -0,0 +1,108 @@
+"""The map's kept view redraws only what changed, and the same picture."""
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+
+from euv import ai, engine, render, sim, worldgen  # noqa: E402
+from fake_curses import FakePalette, FakeWindow     # noqa: E402
+
+
+class UI:
+    def __init__(self, g):
+        self.cursor = g.provinces[0].center
+        self.sel_pid = None
+        self.sel_aid = None
+        self.mapmode = 1
+        self.mode = "normal"
+
+
+def setup(seed=7, years=30):
+    g = worldgen.generate(seed)
+    sim.simulate(g, years)
+    g.player = max(g.nations, key=g.total_dev)
+    return g, FakePalette(), UI(g)
+
+
+def full(g, pal, ui):
+    win = FakeWindow(g.height + 2, g.width + 2)
+    render.draw_map(win, g, pal, ui)
+    return win.cells
+
+
+def test_incremental_matches_full_draw():
+    g, pal, ui = setup()
+    view = render.MapView()
+    win = FakeWindow(g.height + 2, g.width + 2)
+    rng = random.Random(1)
+    for step in range(300):
+        r = rng.random()
+        if r < 0.5:
+            ui.cursor = (rng.randrange(g.width), rng.randrange(g.height))
+        elif r < 0.6:
+            ui.mapmode = rng.randint(1, 5)
+        elif r < 0.7:
+            ui.sel_pid = rng.choice([None] + sorted(g.provinces))
+        elif r < 0.75:
+            ui.sel_aid = rng.choice([None] + sorted(g.armies))
+            ui.mode = rng.choice(["normal", "move"])
+        elif r < 0.8:
+            engine.advance_month(g, ai_module=ai)
+        render.draw_map(win, g, pal, ui, view)
+        assert win.cells == full(g, pal, ui), f"step {step}"
+    print("ok: 300 frames drawn incrementally match full redraws")
+
+
+def test_cursor_move_writes_few_cells():
+    g, pal, ui = setup()
+    view = render.MapView()
+    win = FakeWindow(g.height + 2, g.width + 2)
+    render.draw_map(win, g, pal, ui, view)
+    first = view.written
+    assert first >= g.width * g.height
+    erased = win.calls["erase"]
+    ui.cursor = (ui.cursor[0] + 1, ui.cursor[1])
+    render.draw_map(win, g, pal, ui, view)
+    assert view.written <= 2 and win.calls["erase"] == erased
+    render.draw_map(win, g, pal, ui, view)
+    assert view.written == 0
+    ui.mapmode = 3                  # a new title: the whole window again
+    render.draw_map(win, g, pal, ui, view)
+    assert win.calls["erase"] == erased + 1
+    print(f"ok: a cursor step writes 2 cells, not {first}")
+
+
+def test_layers_follow_the_provinces():
+    g, pal, ui = setup(13, 5)
+    view = render.MapView()
+    lay = view.layer(g, pal, 1)
+    assert lay.update(g, pal) == 0
+    p = next(p for p in g.provinces.values() if not p.occupier)
+    other = next(t for t in g.nations if t != p.owner)
+    p.occupier = other
+    assert lay.update(g, pal) == 1
+    for x, y in p.cells:
+        assert lay.rows[y][x] == render.cell_attr(g, pal, ui, x, y)
+    print("ok: an occupied province recolors alone, stripes included")
+
+
+def test_keybar_keeps_the_file_keys():
+    pal = FakePalette()
+    for width in (160, 110, 80):
+        win = FakeWindow(3, width)
+        render.draw_keybar(win, pal, None)
+        bar = win.text()[2]
+        assert "[Spc]turn" in bar and render.FILE_KEYS in bar, width
+        assert ("[1-5]map" in bar) == (width == 160), width
+    print("ok: save, slot and load keys stay on the bar at 80 columns")
+
+
+if __name__ == "__main__":
+    test_incremental_matches_full_draw()
+    test_cursor_move_writes_few_cells()
+    test_layers_follow_the_provinces()
+    test_keybar_keeps_the_file_keys()
+    print("ALL RENDER TESTS PASSED")
@@ -0,0 +1,161 @@
+"""Recorded commands replay to the same game; divergence is reported."""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import ai, app, data, engine, replay, save, statehash, worldgen
+
+
+def state_of(g):
+    state = json.loads(json.dumps(save._state(g)))
+    state.pop("pending_events")
+    return state
+
+
+def answer_popups(g):
+    """What a player clicking the first choice of every popup does."""
+    while g.pending_events:
+        ev = g.pending_events.pop(0)
+        if "event" in ev:
+            event = next(e for e in data.EVENTS if e[0] == ev["event"])
+            replay.command(g, "apply_event_choice", g.player, event, 0)
+        elif "peace" in ev:
+            offer = ev["peace"]
+            w = g.wars.get(offer["wid"])
+            if w is not None and w.side_of(g.player):
+                replay.command(g, "refuse_peace", w, offer)
+        elif "alliance" in ev:
+            replay.command(g, "answer_alliance", g.player, ev["alliance"],
+                           True)
+        elif "cta" in ev:
+            cta = ev["cta"]
+            w = g.wars.get(cta["wid"])
+            if w is not None and not w.side_of(g.player):
+                replay.command(g, "answer_call_to_arms", g.player, w,
+                               cta["side"], cta["caller"], False)
+
+
+def play(g, years, path):
+    """A scripted player: develop, recruit, march, declare war on a
+    neighbour, answer every popup; checkpoints every January."""
+    rec = g.recorder = replay.Recorder(g, path)
+    tag = max((t for t in g.nations if t != data.REBEL_TAG),
+              key=lambda t: g.total_dev(t))
+    replay.command(g, "choose_nation", tag)
+    for _ in range(years * 12):
+        answer_popups(g)
+        if g.game_over:
+            break
+        me = g.nations[g.player]
+        mine = sorted(p.pid for p in g.provinces_of(g.player))
+        replay.command(g, "develop", g.player, mine[g.month % len(mine)])
+        replay.command(g, "recruit", g.player, me.capital)
+        for a in sorted(g.armies_of(g.player), key=lambda a: a.aid)[:1]:
+            replay.command(g, "toggle_reinforce", a.aid)
+            if g.month == 6:
+                nb = sorted(g.provinces[a.location].neighbors)
+                replay.command(g, "move_army", a.aid, nb[0])
+        if g.month == 3 and not g.wars_of(g.player):
+            border = sorted({g.provinces[nb].owner for p in mine
+                             for nb in g.provinces[p].neighbors} - {tag})
+            if border:
+                replay.command(g, "declare_war", g.player, border[0])
+        engine.advance_month(g, ai_module=ai)
+        if g.month == 0:
+            rec.check()
+    rec.write()
+    return rec
+
+
+def test_replay_matches_the_played_game():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "game.euvr")
+        g = worldgen.generate(7)
+        rec = play(g, 12, path)
+        names = {e[2] for e in rec.entries if e[0] == "cmd"}
+        assert {"declare_war", "apply_event_choice", "move_army"} <= names
+        size = os.path.getsize(path)
+
+        g2, commands, checks = replay.replay(*replay.read(path))
+        assert commands == sum(e[0] == "cmd" for e in rec.entries)
+        assert checks == 12
+        assert g2.date_str == g.date_str and g2.player == g.player
+        assert state_of(g2) == state_of(g)
+        assert statehash.state_hash(g2) == statehash.state_hash(g)
+        save.save(g, os.path.join(d, "s.sav"))
+        assert size < os.path.getsize(os.path.join(d, "s.sav")) / 3
+
+        plain = os.path.join(d, "plain.euvr")      # as a person edits it
+        with open(plain, "w") as f:
+            f.write("\n".join(json.dumps(x) for x in
+                              [rec.header] + rec.entries[:40]) + "\n")
+        assert replay.read(plain) == (rec.header, rec.entries[:40])
+    print(f"ok: {commands} commands over 12 years replay to the same game "
+          f"({size} bytes)")
+
+
+def test_divergence_is_reported():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "game.euvr")
+        rec = play(worldgen.generate(13), 4, path)
+        header, entries = replay.read(path)
+        first = next(i for i, e in enumerate(entries)
+                     if e[0] == "cmd" and e[2] == "develop")
+        dropped = entries[:first] + entries[first + 1:]
+        try:
+            replay.replay(header, dropped)
+        except ValueError as e:
+            assert "mismatch" in str(e) or "diverged" in str(e), e
+        else:
+            raise AssertionError("a missing command must be noticed")
+
+        for bad in ({**header, "generator": 0}, {**header, "seed": 14}):
+            try:
+                replay.replay(bad, entries)
+            except ValueError:
+                continue
+            raise AssertionError(f"{bad} must not replay")
+        try:
+            rec.command("advance_month", (), {})
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("only player commands are recorded")
+        g = worldgen.generate(13)
+        g.world = None
+        try:
+            replay.Recorder(g, path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("a map without a seed cannot be replayed")
+    print("ok: dropped commands, wrong seed or generator are reported")
+
+
+def test_loading_a_save_ends_the_recording():
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "game.euvr")
+        g = worldgen.generate(7)
+        rec = play(g, 1, path)
+        replay.command(g, "develop", g.player, g.nations[g.player].capital)
+        want = statehash.state_hash(g)
+        sav = os.path.join(d, "other.sav")
+        save.save(worldgen.generate(13), sav)
+        ui = app.UIState()
+        app.load_game(g, ui, sav)
+        assert g.recorder is None and rec.path in ui.status
+        g2, commands, _ = replay.replay(*replay.read(path))
+        assert statehash.state_hash(g2) == want     # up to the load
+        assert replay.read(path)[1][-1][2] == "develop"
+    print(f"ok: a load writes the recording ({commands} commands) and "
+          f"stops it")
+
+
+if __name__ == "__main__":
+    test_replay_matches_the_played_game()
+    test_divergence_is_reported()
+    test_loading_a_save_ends_the_recording()
+    print("ALL REPLAY TESTS PASSED")
@@ -0,0 +1,277 @@
+"""Binary saves restore exactly what JSON saves do; old saves still load."""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import engine, save, sim, worldgen
+
+
+def state_of(g):
+    """The saved state as plain JSON data, for comparing games."""
+    return json.loads(json.dumps(save._state(g)))
+
+
+def mid_game(seed=7, years=30):
+    g = worldgen.generate(seed)
+    sim.simulate(g, years)
+    return g
+
+
+def test_binary_matches_json():
+    g = mid_game()
+    want = state_of(g)
+    with tempfile.TemporaryDirectory() as d:
+        js = os.path.join(d, "s.json")
+        save.save(g, js)
+        sizes = {"json": os.path.getsize(js)}
+        for codec in save.CODECS:
+            path = os.path.join(d, f"s.{codec}.sav")
+            save.save(g, path, compress=codec)
+            sizes[codec] = os.path.getsize(path)
+            assert state_of(save.load(path)) == want, codec
+        assert state_of(save.load(js)) == want
+    assert sizes["none"] < sizes["json"] / 2
+    assert sizes["zlib"] < sizes["none"]
+    print("ok: every codec restores the JSON state; sizes (bytes) "
+          + ", ".join(f"{k} {v}" for k, v in sizes.items()))
+
+
+def test_restored_game_plays_on_identically():
+    g = mid_game(13, 10)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "s.sav")
+        save.save(g, path)
+        g2 = save.load(path)
+    sim.simulate(g, 5)
+    sim.simulate(g2, 5)
+    assert state_of(g2) == state_of(g)
+    g2.verify_indexes()
+    print("ok: a loaded binary save continues exactly like the original")
+
+
+def test_format_detection_and_versions():
+    g = worldgen.generate(3)
+    blob = save.dumps(save._state(g), "zlib")
+    magic, version, codec = save.HEADER.unpack_from(blob)
+    assert (magic, version, codec) == (save.MAGIC, save.FORMAT_VERSION,
+                                       save.CODECS["zlib"])
+    newer = save.HEADER.pack(save.MAGIC, save.FORMAT_VERSION + 1, 0)
+    try:
+        save.loads(newer + blob[save.HEADER.size:])
+    except ValueError as e:
+        assert "newer" in str(e)
+    else:
+        raise AssertionError("a newer format must be refused")
+    with tempfile.TemporaryDirectory() as d:
+        old = os.path.join(d, "legacy")           # JSON without the suffix
+        save.save(g, old, fmt="json")
+        assert state_of(save.load(old)) == state_of(g)
+    print("ok: header is versioned; JSON is detected by content")
+
+
+def test_keys_and_values_as_json_has_them():
+    state = {"a": {1: "x", "2": None}, "f": {"t": 1.5, "u": -0.0, "v": 2.0,
+                                             "w": 1e300},
+             "l": [(1, 2), [], {}], "b": [True, False, -7, 2 ** 40]}
+    payload = save.dumps({**state, "grid": [[0]], "width": 1,
+                          "provinces": [{"cells": [(0, 0)]}]}, "none")
+    back = save.loads(payload)
+    for k in state:
+        assert back[k] == json.loads(json.dumps(state[k])), k
+    assert back["provinces"] == [{"cells": [[0, 0]]}]
+    print("ok: tuples, int keys and floats decode as JSON would")
+
+
+def test_map_rebuilt_from_seed():
+    g = mid_game(5, 10)
+    want = state_of(g)
+    with tempfile.TemporaryDirectory() as d:
+        seeded, embedded = os.path.join(d, "s.sav"), os.path.join(d, "e.sav")
+        save.save(g, seeded, embed_map=False)
+        save.save(g, embedded)
+        assert os.path.getsize(seeded) < os.path.getsize(embedded)
+        cached = save._map_path(seeded, save.map_fingerprint(g))
+        assert os.path.exists(cached)
+        for how in ("memory", "map file", "regenerated"):
+            if how != "memory":
+                save._MAPS.clear()
+            if how == "regenerated":
+                with open(cached, "wb") as f:
+                    f.write(b"EUVS garbage")
+            g2 = save.load(seeded)
+            assert state_of(g2) == want, how
+            assert g2.world == () and g2.topology is save.static_map(g2).topology
+        g3 = save.load(seeded)
+        assert g3.topology is g2.topology and g3.grid is g2.grid
+
+        raw = json.loads(json.dumps(save._state(g, embed_map=False)))
+        older = os.path.join(d, "older.json")   # by another map generator
+        with open(older, "w") as f:
+            json.dump({**raw, "generator": 0}, f)
+        save._MAPS.clear()
+        g4 = save.load(older)                   # the map file has its map
+        assert g4.world is None                 # this generator can't redo it
+        assert state_of(g4) == {k: v for k, v in want.items()
+                                if k not in ("generator", "world",
+                                             "fingerprint")}
+        full = state_of(g)
+        os.mkdir(os.path.join(d, "new"))        # no cached maps there
+        save._MAPS.clear()
+        for s, key, bad in ((raw, "fingerprint", "0" * 32),
+                            (raw, "generator", 0), (raw, "seed", 6),
+                            (full, "fingerprint", "0" * 32)):
+            path = os.path.join(d, "new", "bad.json")
+            with open(path, "w") as f:
+                json.dump({**s, key: bad}, f)
+            try:
+                save.load(path)
+            except ValueError:
+                continue
+            raise AssertionError(f"bad {key} must not load")
+
+        os.mkdir(os.path.join(d, "copied"))     # the save without its cache
+        copied = os.path.join(d, "copied", "e.sav")
+        shutil.copy(embedded, copied)
+        save._MAPS.clear()
+        worldgen.GENERATOR += 1                 # and a newer map generator
+        try:
+            g5 = save.load(copied)
+        finally:
+            worldgen.GENERATOR -= 1
+        assert g5.world is None
+        assert state_of(g5) == {k: v for k, v in want.items()
+                                if k not in ("generator", "world",
+                                             "fingerprint")}
+        assert os.path.exists(save._map_path(copied, save.map_fingerprint(g)))
+    print("ok: seed-built maps load from memory, cache file or worldgen")
+    print("ok: a cached or embedded map loads saves from another generator")
+
+
+def test_map_embedded_when_seed_cannot_rebuild():
+    g = mid_game(9, 5)
+    g.world = None                      # e.g. loaded from an old save
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "s.sav")
+        save.save(g, path)
+        assert not os.path.exists(os.path.join(d, save.MAP_DIR))
+        g2 = save.load(path)
+        assert state_of(g2) == state_of(g) and g2.world is None
+        try:
+            save.save(g, path, embed_map=False)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("nothing to rebuild the map from")
+        big = worldgen.generate_scaled(4, 90, 34, 120, 30)
+        save.save(big, path)
+        save._MAPS.clear()
+        assert state_of(save.load(path)) == state_of(big)
+    print("ok: maps the seed cannot rebuild are embedded and not cached")
+
+
+def test_autosave_in_background():
+    g = mid_game(11, 3)
+    with tempfile.TemporaryDirectory() as d:
+        saver = save.Autosaver(os.path.join(d, "auto.sav"))
+        saver.request(g)
+        want = state_of(g)
+        sim.simulate(g, 1)              # the game moves on meanwhile
+        assert saver.flush(30)
+        assert state_of(save.load(saver.path)) == want
+        assert not os.path.exists(saver.path + ".tmp")
+
+        with saver._cond:               # worker held off: requests pile up
+            for _ in range(3):
+                sim.simulate(g, 1)
+                saver.request(g)
+        assert saver.flush(30) and saver.written == 2
+        assert state_of(save.load(saver.path)) == state_of(g)
+
+        broken = save.Autosaver(os.path.join(d, "missing", "auto.sav"))
+        broken.request(g)
+        assert broken.flush(30) and broken.written == 0
+        broken.report(g)
+        assert g.log[-1][1].startswith("Autosave failed: ")
+        logged = len(g.log)
+        broken.report(g)                # each failure is reported once
+        assert len(g.log) == logged
+    print("ok: autosaves snapshot, coalesce and report failures")
+
+
+def test_info_header():
+    g = mid_game(7, 20)
+    g.player = max((t for t, n in g.nations.items() if n.alive),
+                   key=lambda t: len(g.provinces_of(t)))
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "s.sav")
+        save.save(g, path)
+        with open(path, "rb") as f:
+            head = f.read(save.HEADER.size + save.META.size)
+        short = os.path.join(d, "short.sav")    # the summary is all it needs
+        with open(short, "wb") as f:
+            f.write(head)
+        info = save.read_info(short)
+        assert info == save.read_info(path) == save.info_of(g)
+        assert (info.player, info.nation, info.date_str) == \
+            (g.player, g.nations[g.player].name, g.date_str)
+        assert info.provinces == len(g.provinces) and info.log <= 120
+        assert info.score == engine.score(g, g.player)
+
+        js = os.path.join(d, "s.json")
+        save.save(g, js)
+        assert save.read_info(js) is None
+
+        # a version 2 save: the same body with no summary in front
+        blob = save.dumps(save._state(g), "zlib")
+        old = save.HEADER.pack(save.MAGIC, 2, save.CODECS["zlib"]) + \
+            blob[save.HEADER.size + save.META.size:]
+        assert save.loads(old) == save.loads(blob)
+    long = save._fixed("Ærøskøbing Ærøskøbing Ærøskøbing Ærøskøbing", 40)
+    assert len(long) <= 40 and long.decode().startswith("Ærøskøbing")
+    print("ok: summary read from the first bytes; version 2 still loads")
+
+
+def test_autosaves_rotate():
+    g = mid_game(3, 1)
+    with tempfile.TemporaryDirectory() as d:
+        saver = save.Autosaver(os.path.join(d, "auto.sav"), keep=3)
+        years = []
+        for _ in range(4):
+            sim.simulate(g, 1)
+            years.append(g.year)
+            saver.request(g)
+            assert saver.flush(30)
+        paths = [saver.path] + [os.path.join(d, f"auto.{i}.sav")
+                                for i in (2, 3)]
+        assert [save.read_info(p).year for p in paths] == years[:0:-1]
+        assert not os.path.exists(os.path.join(d, "auto.4.sav"))
+        assert sorted(os.listdir(d)) == [save.MAP_DIR, "auto.2.sav",
+                                         "auto.3.sav", "auto.sav"]
+        for p in paths:                 # the picker reads the header alone
+            with open(p, "rb") as f:
+                head = f.read(save.HEADER.size + save.META.size)
+            with open(p + ".head", "wb") as f:
+                f.write(head)
+            assert save.read_info(p + ".head") == save.read_info(p)
+    assert save.slot_path(1) == save.SAVE_PATH
+    assert len({save.slot_path(i) for i in range(1, save.SLOTS + 1)}) == \
+        save.SLOTS
+    print("ok: autosaves rotate, newest first, each described by its "
+          "header; slots are distinct files")
+
+
+if __name__ == "__main__":
+    test_binary_matches_json()
+    test_restored_game_plays_on_identically()
+    test_format_detection_and_versions()
+    test_keys_and_values_as_json_has_them()
+    test_map_rebuilt_from_seed()
+    test_map_embedded_when_seed_cannot_rebuild()
+    test_autosave_in_background()
+    test_info_header()
+    test_autosaves_rotate()
+    print("ALL SAVE TESTS PASSED")
@@ -0,0 +1,112 @@
+"""Spatial index: ring queries agree with brute force (headless)."""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import engine, pathfind, worldgen
+from euv.model import Game, Province
+from euv.spatial import SpatialIndex, d2
+
+
+def test_nearby_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(60):
+        w, h = rng.randint(1, 120), rng.randint(1, 50)
+        centers = {pid: (rng.randrange(w), rng.randrange(h))
+                   for pid in range(rng.randint(1, 300))}
+        index = SpatialIndex(centers)
+        for _ in range(10):
+            pt = (rng.randrange(-5, w + 5), rng.randrange(-5, h + 5))
+            ranked = sorted((d2(pt, c), pid) for pid, c in centers.items())
+            assert list(index.nearby(pt)) == ranked
+            for k in (3, 100):        # scanned and ring-searched filters
+                among = set(rng.sample(sorted(centers),
+                                       min(k, len(centers))))
+                want = min((d, p) for d, p in ranked if p in among)[1]
+                assert index.nearest(pt, among) == want
+        assert index.nearest((0, 0), set()) is None
+    print("ok: nearby() ranks like a full sort, filters included")
+
+
+def archipelago(seed):
+    """Random islands: provinces chained within a cluster, none across."""
+    rng = random.Random(seed)
+    g = Game(seed)
+    pid = 0
+    for _ in range(rng.randint(2, 8)):
+        cx, cy = rng.randrange(100), rng.randrange(40)
+        chain = []
+        for _ in range(rng.randint(1, 12)):
+            c = (cx + rng.randint(-6, 6), cy + rng.randint(-3, 3))
+            g.provinces[pid] = Province(pid, f"P{pid}", "plains", "aurean",
+                                        owner="", center=c)
+            if chain:
+                g.provinces[pid].neighbors.add(chain[-1])
+                g.provinces[chain[-1]].neighbors.add(pid)
+            chain.append(pid)
+            pid += 1
+    return g
+
+
+def reference_straits(g):
+    """The original bridging: min over every (island, mainland) pair."""
+    comp, cid = {}, 0
+    for pid in g.provinces:
+        if pid in comp:
+            continue
+        comp[pid], stack = cid, [pid]
+        while stack:
+            for nb in g.provinces[stack.pop()].neighbors:
+                if nb not in comp:
+                    comp[nb] = cid
+                    stack.append(nb)
+        cid += 1
+    sizes = {i: sum(1 for c in comp.values() if c == i) for i in range(cid)}
+    main = max(sizes, key=lambda i: sizes[i])
+    out = set()
+    for i in range(cid):
+        if i == main:
+            continue
+        island = [p for p in g.provinces if comp[p] == i]
+        mainland = [p for p in g.provinces if comp[p] == main]
+        a, b = min(((a, b) for a in island for b in mainland),
+                   key=lambda ab: d2(g.provinces[ab[0]].center,
+                                     g.provinces[ab[1]].center))
+        out.add((min(a, b), max(a, b)))
+    return out
+
+
+def test_straits_join_the_nearest_pair():
+    bridged = 0
+    for seed in range(40):
+        g = archipelago(seed)
+        want = reference_straits(g)
+        worldgen._connect_islands(g)
+        assert g.straits == want
+        bridged += len(want)
+    print(f"ok: {bridged} straits match the full pairwise search")
+
+
+def test_retreat_to_nearest_own_province():
+    g = worldgen.generate(7)
+    tag = g.provinces[0].owner
+    own = [p.pid for p in g.provinces_of(tag)]
+    start = own[0]
+    a = g.new_army(tag, start, 4)
+    engine._retreat(g, a)
+    here = g.provinces[start].center
+    want = min((d2(here, g.provinces[p].center), p) for p in own
+               if p != start)[1]
+    assert a.location == want
+    assert pathfind.topology(g).spatial.nearest(here) == start
+    g.verify_indexes()
+    print("ok: beaten armies fall back to the nearest own province")
+
+
+if __name__ == "__main__":
+    test_nearby_matches_brute_force()
+    test_straits_join_the_nearest_pair()
+    test_retreat_to_nearest_own_province()
+    print("ALL SPATIAL TESTS PASSED")
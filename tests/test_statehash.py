@@ -0,0 +1,121 @@
+"""Per-month state hashes: stable, and equal to the recorded golden streams.
+
+    python3 tests/test_statehash.py            # check
+    python3 tests/test_statehash.py --update   # rewrite golden_hashes.json
+
+Run --update only for a change that is meant to alter the simulation,
+and say so in the commit.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+from euv import data, save, sim, statehash, worldgen
+
+GOLDEN = os.path.join(HERE, "golden_hashes.json")
+SEEDS = [7, 13, 42]
+YEARS = 100
+SHORT = 4           # hex digits kept per subsystem per month
+
+
+def stream(seed, years=YEARS):
+    """statehash.digests() after every month of an all-AI run."""
+    hashes = []
+    sim.simulate(worldgen.generate(seed), years, hashes)
+    return hashes
+
+
+def date_after(months):
+    """The date `months` months after the start of a standard game."""
+    return (f"{data.MONTHS[months % 12]}, "
+            f"AE {data.START_YEAR + months // 12}")
+
+
+def packed(digests):
+    return "".join(digests[s][:SHORT] for s in statehash.SUBSYSTEMS)
+
+
+def unpacked(line):
+    return {s: line[i * SHORT:(i + 1) * SHORT]
+            for i, s in enumerate(statehash.SUBSYSTEMS)}
+
+
+def test_matches_golden_streams():
+    with open(GOLDEN) as f:
+        golden = json.load(f)
+    assert golden["subsystems"] == list(statehash.SUBSYSTEMS)
+    assert golden["years"] == YEARS
+    for seed in SEEDS:
+        want = [unpacked(line) for line in golden["seeds"][str(seed)]]
+        got = [unpacked(packed(d)) for d in stream(seed)]
+        diff = statehash.first_divergence(want, got)
+        if diff is not None:
+            i, parts = diff
+            raise AssertionError(
+                f"seed {seed} diverges at {date_after(i + 1)} (month "
+                f"{i + 1}) in {', '.join(parts)}")
+        assert len(got) == len(want) == YEARS * 12
+    print(f"ok: seeds {SEEDS} match their golden {YEARS}-year hash streams")
+
+
+def test_first_divergence_names_month_and_subsystem():
+    a = worldgen.generate(5)
+    b = worldgen.generate(5)
+    ha, hb = [], []
+    sim.simulate(a, 1, ha)
+    sim.simulate(b, 1, hb)
+    assert ha == hb and statehash.first_divergence(ha, hb) is None
+    b.nations[sorted(b.nations)[0]].gold += 1     # one nation, one month
+    sim.simulate(a, 1, ha)
+    sim.simulate(b, 1, hb)
+    i, parts = statehash.first_divergence(ha, hb)
+    assert i == 12 and "nations" in parts and "provinces" not in parts
+    b.provinces[0].unrest += 0.5
+    assert statehash.digests(b)["provinces"] != hb[-1]["provinces"]
+    print("ok: a changed nation is found in the first month it differs")
+
+
+def test_stable_across_save_and_hash_seed():
+    g = worldgen.generate(11)
+    sim.simulate(g, 10)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "s.sav")
+        save.save(g, path)
+        assert statehash.state_hash(save.load(path)) == \
+            statehash.state_hash(g)
+    code = ("from euv import sim, statehash, worldgen\n"
+            "g = worldgen.generate(11)\n"
+            "sim.simulate(g, 10)\n"
+            "print(statehash.state_hash(g))\n")
+    for hash_seed in ("1", "2"):
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True,
+            check=True, cwd=os.path.join(HERE, ".."),
+            env={**os.environ, "PYTHONHASHSEED": hash_seed})
+        assert out.stdout.strip() == statehash.state_hash(g), hash_seed
+    print("ok: the hash survives save/load and any PYTHONHASHSEED")
+
+
+def update():
+    golden = {"subsystems": list(statehash.SUBSYSTEMS), "years": YEARS,
+              "seeds": {str(s): [packed(d) for d in stream(s)]
+                        for s in SEEDS}}
+    with open(GOLDEN, "w") as f:
+        json.dump(golden, f, indent=0)
+        f.write("\n")
+    print(f"wrote {GOLDEN}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--update"]:
+        update()
+        sys.exit()
+    test_matches_golden_streams()
+    test_first_divergence_names_month_and_subsystem()
+    test_stable_across_save_and_hash_seed()
+    print("ALL STATE HASH TESTS PASSED")
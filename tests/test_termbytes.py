@@ -0,0 +1,108 @@
+"""Bytes per frame: a kept screen sends only what changed, and says so.
+
+Runs the game's draw() in a pseudo-terminal with the byte meter on.
+"""
+import fcntl
+import json
+import os
+import pty
+import struct
+import sys
+import tempfile
+import termios
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+
+CHILD = r"""
+import curses, json, sys
+from euv import app, engine, render, termbytes, viewmodel, worldgen
+
+app.meter = termbytes.ByteMeter()
+app.meter.install()
+builds = []
+build = viewmodel.build
+viewmodel.build = lambda *args: builds.append(args) or build(*args)
+
+def frames(stdscr):
+    curses.curs_set(0)
+    pal = render.Palette()
+    g = worldgen.generate(3)
+    engine.choose_nation(g, max(g.nations, key=g.total_dev))
+    g.pending_events.clear()
+    ui = app.UIState()
+    ui.cursor = g.provinces[g.nations[g.player].capital].center
+    out = {}
+    app.draw(stdscr, g, pal, ui)
+    out["first"] = app.meter.frames[-1]
+    app.draw(stdscr, g, pal, ui)
+    out["same"] = app.meter.frames[-1]
+    ui.cursor = (ui.cursor[0] + 1, ui.cursor[1])
+    app.draw(stdscr, g, pal, ui)
+    out["cursor"] = app.meter.frames[-1]
+    out["views"] = len(builds)
+    ui.status = "Saved to slot 1"
+    app.draw(stdscr, g, pal, ui)
+    out["status"] = app.meter.frames[-1]
+    pop = curses.newwin(8, 40, 5, 5)        # as a popup does
+    pop.box()
+    pop.refresh()
+    del pop
+    app.draw(stdscr, g, pal, ui)
+    out["after_popup"] = app.meter.frames[-1]
+    return out
+
+out = curses.wrapper(frames)
+app.meter.close()
+with open(sys.argv[1], "w") as f:
+    json.dump(out, f)
+print(app.meter.summary())
+"""
+
+
+def run_child(rows=40, cols=140):
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "out.json")
+        pid, fd = pty.fork()
+        if pid == 0:
+            fcntl.ioctl(0, termios.TIOCSWINSZ,
+                        struct.pack("HHHH", rows, cols, 0, 0))
+            os.chdir(ROOT)
+            # a fresh environment: readline may have exported LINES and
+            # COLUMNS behind os.environ's back, and ncurses prefers them
+            env = {k: v for k, v in os.environ.items()
+                   if k not in ("LINES", "COLUMNS")}
+            env["TERM"] = "xterm-256color"
+            os.execve(sys.executable, [sys.executable, "-c", CHILD, path],
+                      env)
+        screen = b""
+        while True:
+            try:
+                chunk = os.read(fd, 65536)
+            except OSError:
+                break
+            if not chunk:
+                break
+            screen += chunk
+        _, status = os.waitpid(pid, 0)
+        assert status == 0, screen[-500:]
+        with open(path) as f:
+            return json.load(f), screen
+
+
+def test_frames_send_only_changes():
+    out, screen = run_child()
+    assert out["first"] > 3000                  # the whole screen
+    assert out["same"] == 0
+    assert 0 < out["cursor"] < 120
+    assert out["views"] == 1                    # the cursor built no view
+    assert 0 < out["status"] < 200
+    assert out["after_popup"] > out["cursor"]   # the covered part repaints
+    assert b"frames" in screen and b"per frame" in screen
+    print(f"ok: full frame {out['first']} B, cursor step {out['cursor']} B, "
+          f"unchanged frame 0 B")
+
+
+if __name__ == "__main__":
+    test_frames_send_only_changes()
+    print("ALL TERMINAL BYTE TESTS PASSED")
@@ -0,0 +1,84 @@
+"""Opt-in tick timing: report contents and a clean switch-off (headless)."""
+import csv
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import ai, engine, timing, worldgen
+
+PHASES = ("movement", "battle", "siege", "economy", "subjects", "supply",
+          "attrition", "unrest", "diplomacy", "capitulation", "missions",
+          "events")
+
+
+def fresh(seed=7):
+    g = worldgen.generate(seed)
+    g.player = ""               # all AI
+    return g
+
+
+def test_report_covers_phases_and_helpers():
+    g = fresh()
+    t = timing.enable(g)
+    for _ in range(24):
+        engine.advance_month(g, ai_module=ai)
+    for name in PHASES:
+        assert t.sections[name].calls == 24, name
+    alive = [tag for tag, n in g.nations.items() if n.alive]
+    assert any(name.startswith("ai ") and name[3:] in alive
+               for name in t.sections)
+    for name in ("find_path", "at_war_with", "provinces_of"):
+        s = t.sections[name]
+        assert s.calls > 0 and sum(s.buckets.values()) == s.calls, name
+    with tempfile.TemporaryDirectory() as d:
+        t.dump(os.path.join(d, "t.json"))
+        t.dump(os.path.join(d, "t.csv"))
+        with open(os.path.join(d, "t.json")) as f:
+            rows = json.load(f)
+        with open(os.path.join(d, "t.csv")) as f:
+            table = list(csv.DictReader(f))
+    assert {r["section"] for r in rows} == set(t.sections)
+    assert [r["section"] for r in table] == [r["section"] for r in rows]
+    timing.disable(g)
+    print("ok: timing report covers every phase and hot helper")
+
+
+def test_disabled_is_invisible():
+    plain = engine.find_path
+    g, h = fresh(), fresh()
+    timing.enable(h)
+    for _ in range(36):
+        engine.advance_month(g, ai_module=ai)
+        engine.advance_month(h, ai_module=ai)
+    assert [(a.aid, a.location, a.men) for a in g.armies.values()] == \
+        [(a.aid, a.location, a.men) for a in h.armies.values()]
+    assert g.rng.getstate() == h.rng.getstate(), "timing changed the game"
+    timing.disable(h)
+    assert engine.find_path is plain
+    assert h.timing is None and "provinces_of" not in vars(h)
+    print("ok: timing off leaves no wrappers and never changes the game")
+
+
+def test_two_games_timed_at_once():
+    plain = engine.find_path
+    g, h = fresh(), fresh(13)
+    tg, th = timing.enable(g), timing.enable(h)
+    timing.disable(h)
+    for _ in range(24):
+        engine.advance_month(g, ai_module=ai)
+    assert tg.sections["find_path"].calls > 0, "g lost its find_path time"
+    assert "find_path" not in th.sections
+    assert engine.find_path is not plain
+    timing.disable(g)
+    assert engine.find_path is plain
+    print("ok: disabling one game leaves another's find_path timed")
+
+
+if __name__ == "__main__":
+    test_report_covers_phases_and_helpers()
+    test_disabled_is_invisible()
+    test_two_games_timed_at_once()
+    print("ALL TIMING TESTS PASSED")
@@ -0,0 +1,111 @@
+"""The panels' view model: built from the game, rebuilt when it changes."""
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+sys.path.insert(0, os.path.join(HERE, "..", "benchmarks"))
+
+from euv import (ai, app, engine, render, replay, save,  # noqa: E402
+                 viewmodel, worldgen)
+from fake_curses import FakePalette, FakeWindow                 # noqa: E402
+
+
+def at_war():
+    """A mid-game world whose player is in a war."""
+    g = worldgen.generate(7)
+    for _ in range(40 * 12):
+        engine.advance_month(g, ai_module=ai)
+        if g.wars:
+            break
+    g.player = next(iter(g.wars.values())).attackers[0]
+    return g
+
+
+def test_changes_count_months_and_commands():
+    g = worldgen.generate(3)
+    assert g.changes == 0
+    replay.command(g, "choose_nation", max(g.nations, key=g.total_dev))
+    engine.advance_month(g, ai_module=ai)
+    g.nations[g.player].gold = 0
+    ok, _ = replay.command(g, "raise_stability", g.player)
+    assert not ok and g.changes == 3        # refused commands count too
+    assert g.fork().changes == 3
+    print("ok: each month and player command bumps Game.changes")
+
+
+def test_view_matches_the_game():
+    g = at_war()
+    me = g.nations[g.player]
+    a = g.armies_of(g.player)[0]
+    foreign = next(p for p in g.provinces.values() if p.owner != g.player)
+    vm = viewmodel.build(g, foreign.pid, a.aid)
+    assert vm.name == me.name and vm.date == g.date_str
+    assert vm.net == engine.monthly_balance(g, g.player)[2]
+    assert [w.name for w in vm.wars] == [w.name for w in g.wars_of(g.player)]
+    scores = [s for _, _, s, _ in vm.great_powers]
+    assert scores == sorted(scores, reverse=True) and len(scores) <= 6
+    assert vm.army.name == a.name and vm.army.location == \
+        g.provinces[a.location].name
+    assert vm.province.name == foreign.name and not vm.province.mine
+    assert vm.owner.name == g.nations[foreign.owner].name
+    mine = viewmodel.build(g, me.capital, None)
+    assert mine.province.capital and mine.owner is None and mine.army is None
+
+    pal = FakePalette()
+    side = FakeWindow(36, 48)
+    render.draw_sidebar(side, vm, pal)
+    text = "\n".join(side.text())
+    assert vm.wars[0].name[:46] in text and "Great Powers:" in text
+    assert f"{foreign.name}  (" in text and a.name in text
+    top = FakeWindow(1, 140)
+    render.draw_topbar(top, vm, pal)
+    assert top.text()[0].startswith(f" {me.name} | {g.date_str}")
+    assert "AT WAR" in top.text()[0]
+    print("ok: the view holds what the panels show, and they draw from it")
+
+
+def test_rebuilt_view_follows_a_command():
+    g = at_war()
+    tag = g.player
+    g.nations[tag].gold = 10_000
+    pid = g.nations[tag].capital
+    before = viewmodel.build(g, pid, None)
+    changes = g.changes
+    ok, msg = replay.command(g, "develop", tag, pid)
+    assert ok, msg
+    assert g.changes == changes + 1
+    after = viewmodel.build(g, pid, None)
+    assert after.province.dev == before.province.dev + 1
+    assert after.gold < before.gold
+    print("ok: a command's effect shows in the next view")
+
+
+def test_load_rebuilds_the_view():
+    other = worldgen.generate(5)
+    other.player = max(other.nations, key=other.total_dev)
+    g = worldgen.generate(3)
+    g.player = max(g.nations, key=g.total_dev)
+    ui = app.UIState()
+    ui.sel_pid = 0
+    shown = app.view_key(g, ui)
+    before = viewmodel.build(g, ui.sel_pid, ui.sel_aid)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "other.sav")
+        save.save(other, path)
+        app.load_game(g, ui, path)
+    assert ui.status == "Game loaded." and g.changes == 0
+    assert app.view_key(g, ui) != shown     # same count, new game
+    after = viewmodel.build(g, ui.sel_pid, ui.sel_aid)
+    assert after.name == other.nations[other.player].name != before.name
+    assert after.province.name != before.province.name
+    print("ok: loading a save rebuilds the panels, whatever its count")
+
+
+if __name__ == "__main__":
+    test_changes_count_months_and_commands()
+    test_view_matches_the_game()
+    test_rebuilt_view_follows_a_command()
+    test_load_rebuilds_the_view()
+    print("ALL VIEW MODEL TESTS PASSED")
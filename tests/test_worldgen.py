@@ -0,0 +1,118 @@
+"""Scaled world generation: deterministic, well-formed at any size."""
+import os
+import random
+import sys
+import tempfile
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from euv import data, save, sim, worldgen
+
+
+def summary(g):
+    return ([(p.pid, p.name, p.owner, p.terrain, p.dev, p.center,
+              sorted(p.neighbors)) for p in g.provinces.values()],
+            [(n.tag, n.name, n.capital, n.color) for n in g.nations.values()])
+
+
+def check_world(g, provinces, nations):
+    assert len(g.provinces) == provinces
+    real = [t for t in g.nations if t != data.REBEL_TAG]
+    assert len(real) == nations
+    assert all(len(t) == 3 for t in real)
+    assert all(g.nations[t].color != data.REBEL_COLOR for t in real)
+    for pid, p in g.provinces.items():
+        assert p.owner in g.nations and p.owner != data.REBEL_TAG
+        assert all(g.grid[y][x] == pid for x, y in p.cells)
+        assert all(pid in g.provinces[nb].neighbors for nb in p.neighbors)
+    for tag in real:
+        assert g.provinces[g.nations[tag].capital].owner == tag
+    start = min(g.provinces)
+    seen, q = {start}, deque([start])          # straits join every island
+    while q:
+        for nb in g.provinces[q.popleft()].neighbors:
+            if nb not in seen:
+                seen.add(nb)
+                q.append(nb)
+    assert len(seen) == provinces
+    g.verify_indexes()
+
+
+def naive_seeds(cells, n, first):
+    """The original full-rescan sampler, kept as the reference."""
+    seeds = [first]
+    dist = {c: worldgen._d2(c, first) for c in cells}
+    while len(seeds) < n:
+        best = max(cells, key=lambda c: dist[c])
+        seeds.append(best)
+        for c in cells:
+            dist[c] = min(dist[c], worldgen._d2(c, best))
+    return seeds
+
+
+def test_fast_sampler_matches_reference():
+    rng = random.Random(1)
+    samplers = [worldgen._fps_grid]
+    if worldgen.np is not None:
+        samplers.append(worldgen._fps_numpy)
+    for _ in range(150):
+        w, h = rng.randint(1, 40), rng.randint(1, 20)
+        cells = [(x, y) for y in range(h) for x in range(w)
+                 if rng.random() < 0.6] or [(0, 0)]
+        n = rng.randint(1, len(cells))
+        first = rng.choice(cells)
+        ref = naive_seeds(cells, n, first)
+        for sample in samplers:
+            assert sample(cells, n, first) == ref
+    cells = worldgen._land_cells(worldgen.LAND_MASK)
+    assert worldgen._farthest_point_seeds(cells, 52, random.Random(7)) == \
+        naive_seeds(cells, 52, random.Random(7).choice(cells))
+    print(f"ok: {len(samplers)} fast sampler(s) pick the reference seeds")
+
+
+def test_scaled_world_is_deterministic():
+    a = worldgen.generate_scaled(3, 120, 44, 200, 40)
+    b = worldgen.generate_scaled(3, 120, 44, 200, 40)
+    c = worldgen.generate_scaled(4, 120, 44, 200, 40)
+    assert summary(a) == summary(b)
+    assert summary(a) != summary(c)
+    check_world(a, 200, 40)
+    print("ok: same seed and size, same world")
+
+
+def test_full_scale_world():
+    g = worldgen.generate_scaled(7, 400, 150, 5000, 300)
+    assert (g.width, g.height) == (400, 150)
+    check_world(g, 5000, 300)
+    print("ok: 400x150 world with 5000 provinces and 300 nations")
+
+
+def test_scaled_world_saves_and_plays():
+    row = sim.run(5, 1, (90, 34, 120, 30))
+    assert row["nations_start"] == 30 and row["nations_alive"] >= 1
+    g = worldgen.generate_scaled(5, 90, 34, 120, 30)
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "big.json")
+        save.save(g, path)
+        assert summary(save.load(path)) == summary(g)
+    print("ok: scaled worlds simulate and survive save/load")
+
+
+def test_rejects_impossible_sizes():
+    for args in ((60, 22, 52, 0), (60, 22, 10, 20), (10, 6, 500, 10)):
+        try:
+            worldgen.generate_scaled(1, *args)
+        except ValueError:
+            continue
+        raise AssertionError(f"{args} should not generate")
+    print("ok: impossible sizes raise ValueError")
+
+
+if __name__ == "__main__":
+    test_fast_sampler_matches_reference()
+    test_scaled_world_is_deterministic()
+    test_full_scale_world()
+    test_scaled_world_saves_and_plays()
+    test_rejects_impossible_sizes()
+    print("ALL WORLDGEN TESTS PASSED")
@@ -156,7 +156,11 @@ def main():
     expect(d, "New Game", "back to title")
     d.send_key(KEY_DOWN, 0.2)
     d.send_key(ENTER, 0.8)                 # load game
-    expect(d, "Eryndor", "loaded game map")
+    if "Load which save" in d.text():      # older saves or autosaves too
+        expect(d, "Slot 1", "save picker")
+        d.send_key(ENTER, 0.8)             # slot 1, just saved, is first
+    expect(d, "Eryndor - POLITICAL", "loaded game map")
+    expect(d, "Gold", "loaded game top bar")
     print("ALL TUI CHECKS PASSED")
     d.quit()
 